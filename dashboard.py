@@ -2,6 +2,10 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import subprocess
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
 
 st.set_page_config(page_title="Trading Sniper Dashboard", layout="wide")
 st.title("📈 Dashboard de Sinais de Trading")
@@ -16,6 +20,31 @@ if st.button("🔄 Atualizar Sinais Agora"):
             st.error("Erro ao atualizar os sinais.")
             st.text(result.stderr)
 
+
+@st.cache_resource(show_spinner="Carregando candles...")
+def carregar_universo(data_dir):
+    from replay import load_recorded_bars
+    from strategy_registry import IndicatorEngine
+
+    # O engine memoiza os indicadores: novas expressões só calculam os campos ainda não vistos
+    return load_recorded_bars(data_dir), IndicatorEngine()
+
+
+# Screener do universo
+with st.expander("🧮 Screener"):
+    expressao = st.text_input("Expressão", "rsi < 30 and stoch_k crosses_above stoch_d and close > ema_200")
+    rank_by = st.text_input("Ordenar por (opcional)", "")
+    data_dir = st.text_input("Pasta de candles", "../data")
+    if st.button("🔎 Buscar") and expressao:
+        from screener import panel_for, screen
+
+        try:
+            frames, engine = carregar_universo(data_dir)
+            painel = panel_for(frames, expressao, rank_by or None, engine=engine)
+            st.dataframe(screen(painel, expressao, rank_by=rank_by or None), use_container_width=True)
+        except (SyntaxError, KeyError, FileNotFoundError) as e:
+            st.error(f"Erro no screener: {e}")
+
 # Carregamento dos dados
 try:
     df = pd.read_csv("last_signals.csv")
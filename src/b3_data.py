@@ -0,0 +1,114 @@
+"""
+B3 data path: downloads the whole .SA universe in a few batched multi-ticker yfinance requests and
+splits the wide result into one OHLCV frame per symbol.
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+logging.getLogger("yfinance").setLevel(logging.CRITICAL)
+
+OHLCV_FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+B3_SUFFIX = ".SA"
+B3_INTERVAL = "15m"
+B3_PERIOD = "5d"
+BATCH_SIZE = 40
+BATCH_WORKERS = 2
+
+
+def yahoo_ticker(symbol):
+    return symbol if symbol.endswith(B3_SUFFIX) else symbol + B3_SUFFIX
+
+
+def download_batch(tickers, period=B3_PERIOD, interval=B3_INTERVAL):
+    """One multi-ticker yfinance request; returns the wide (field, ticker) frame."""
+    import yfinance as yf
+
+    return yf.download(tickers, period=period, interval=interval, group_by="column", auto_adjust=True,
+                       threads=True, progress=False)
+
+
+def split_wide(wide, tickers):
+    """
+    Splits a wide yfinance frame with (field, ticker) columns into {ticker: OHLCV frame} with one
+    reshape of the whole value matrix; rows where a ticker has no bar are dropped from its frame.
+    """
+    if wide is None or wide.empty:
+        return {}
+    if not isinstance(wide.columns, pd.MultiIndex):
+        # Single-ticker downloads may come back flat
+        wide = pd.concat({tickers[0]: wide}, axis=1).swaplevel(axis=1)
+    if not set(wide.columns.get_level_values(0)) & set(OHLCV_FIELDS):
+        wide = wide.swaplevel(axis=1)  # group_by="ticker" layout
+
+    columns = pd.MultiIndex.from_product([OHLCV_FIELDS, tickers])
+    values = wide.reindex(columns=columns).to_numpy(dtype=np.float64)
+    # (bars, fields * tickers) -> (tickers, bars, fields)
+    values = values.reshape(len(wide), len(OHLCV_FIELDS), len(tickers)).transpose(2, 0, 1)
+    present = ~np.isnan(values[:, :, 3])
+
+    frames = {}
+    for k, ticker in enumerate(tickers):
+        rows = present[k]
+        if rows.any():
+            frames[ticker] = pd.DataFrame(values[k, rows], index=wide.index[rows], columns=OHLCV_FIELDS)
+    return frames
+
+
+def load_yfinance(tickers, period=B3_PERIOD, interval=B3_INTERVAL, batch_size=BATCH_SIZE, workers=BATCH_WORKERS,
+                  download=download_batch):
+    """
+    Downloads yfinance tickers in batches of `batch_size` tickers, `workers` batches at a time.
+    :return: dict ticker -> OHLCV DataFrame (Open/High/Low/Close/Volume, datetime index).
+    """
+    tickers = list(tickers)
+    batches = [tickers[i:i + batch_size] for i in range(0, len(tickers), batch_size)]
+
+    def fetch(batch):
+        try:
+            return split_wide(download(batch, period=period, interval=interval), batch)
+        except Exception as e:
+            print(f"⚠️ Erro ao baixar lote yfinance ({batch[0]}..{batch[-1]}): {e}")
+            return {}
+
+    frames = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for batch_frames in executor.map(fetch, batches):
+            frames.update(batch_frames)
+    return frames
+
+
+def load_b3_universe(symbols, period=B3_PERIOD, interval=B3_INTERVAL, batch_size=BATCH_SIZE,
+                     workers=BATCH_WORKERS, download=download_batch):
+    """
+    Downloads every B3 symbol (with or without the .SA suffix) in batched requests (see load_yfinance).
+    :return: dict yahoo ticker (PETR4.SA) -> OHLCV DataFrame (Open/High/Low/Close/Volume, datetime index).
+    """
+    tickers = [yahoo_ticker(symbol) for symbol in symbols]
+    started = time.perf_counter()
+    frames = load_yfinance(tickers, period, interval, batch_size, workers, download)
+    print(f"🇧🇷 {len(frames)}/{len(tickers)} ativos B3 em {-(-len(tickers) // batch_size)} lotes "
+          f"({time.perf_counter() - started:.1f}s)")
+    return frames
+
+
+def record_fixture(symbols, path, period=B3_PERIOD, interval=B3_INTERVAL, download=download_batch):
+    """Saves one live multi-ticker download as a Parquet fixture for offline tests (see fixture_download)."""
+    tickers = [yahoo_ticker(symbol) for symbol in symbols]
+    wide = download(tickers, period=period, interval=interval)
+    wide.columns = [f"{field}|{ticker}" for field, ticker in wide.columns]
+    wide.to_parquet(path)
+    return path
+
+
+def fixture_download(path):
+    """A `download` replacement for load_b3_universe serving a recorded fixture."""
+    wide = pd.read_parquet(path)
+    wide.columns = pd.MultiIndex.from_tuples([tuple(col.split("|", 1)) for col in wide.columns])
+
+    def download(tickers, period=None, interval=None):
+        return wide.loc[:, wide.columns.get_level_values(1).isin(tickers)]
+    return download
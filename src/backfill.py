@@ -0,0 +1,277 @@
+import argparse
+import json
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+import requests
+
+BAR_COLUMNS = ["ts", "open", "high", "low", "close", "volume"]
+
+INTERVAL_MS = {
+    "1m": 60_000, "3m": 180_000, "5m": 300_000, "15m": 900_000, "30m": 1_800_000,
+    "1h": 3_600_000, "2h": 7_200_000, "4h": 14_400_000, "6h": 21_600_000, "12h": 43_200_000,
+    "1d": 86_400_000,
+}
+
+BINANCE_KLINES_URL = "https://api.binance.com/api/v3/klines"
+BINANCE_PAGE_BARS = 1000
+POLYGON_AGGS_URL = "https://api.polygon.io/v2/aggs/ticker/{ticker}/range/{multiplier}/{timespan}/{start}/{end}"
+# Polygon's limit caps the base (1-minute) aggregates behind a response, not the bars returned
+POLYGON_BASE_LIMIT = 50_000
+
+MAX_RETRIES = 5
+CHECKPOINT_FILE = "checkpoint.json"
+
+
+class RateLimiter:
+    """Token bucket shared by all download threads: at most `rate` requests per second."""
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def page_windows(since_ms, until_ms, interval, page_bars):
+    """
+    Splits [since_ms, until_ms) in windows of `page_bars` bars, newest first, so every page of a
+    symbol can be requested independently (and concurrently) instead of following a cursor.
+    :return: List of (start_ms, end_ms, complete); the newest window is incomplete when it ends at until_ms.
+    """
+    span = INTERVAL_MS[interval] * page_bars
+    first = since_ms - since_ms % INTERVAL_MS[interval]
+    starts = np.arange(first, until_ms, span, dtype=np.int64)[::-1]
+    return [(int(start), int(min(start + span, until_ms)) - 1, int(start + span) <= until_ms) for start in starts]
+
+
+def polygon_page_bars(interval):
+    """Bars of `interval` in a window of POLYGON_BASE_LIMIT minutes, the most one Polygon request covers."""
+    return max(1, POLYGON_BASE_LIMIT * 60_000 // INTERVAL_MS[interval])
+
+
+def reaches_end(page, end_ms, interval):
+    """True if the last bar of a page is the one holding end_ms (nothing was cut at the end)."""
+    return not page.empty and int(page["ts"].max()) + INTERVAL_MS[interval] > end_ms
+
+
+def _get_json(session, url, params, limiter):
+    for attempt in range(MAX_RETRIES):
+        limiter.acquire()
+        response = session.get(url, params=params, timeout=30)
+        if response.status_code == 429 or response.status_code >= 500:
+            time.sleep(float(response.headers.get("Retry-After", 2 ** attempt)))
+            continue
+        response.raise_for_status()
+        return response.json()
+    raise RuntimeError(f"Erro HTTP persistente em {url}")
+
+
+def fetch_binance_page(session, symbol, interval, start_ms, end_ms, limiter):
+    data = _get_json(session, BINANCE_KLINES_URL, {
+        "symbol": symbol.replace("-", ""), "interval": interval,
+        "startTime": start_ms, "endTime": end_ms, "limit": BINANCE_PAGE_BARS,
+    }, limiter)
+    if not data:
+        page = pd.DataFrame(columns=BAR_COLUMNS)
+        page.attrs["exhausted"] = True
+        return page
+    raw = np.array([row[:6] for row in data], dtype=object)
+    page = pd.DataFrame({
+        "ts": raw[:, 0].astype(np.int64),
+        **{col: raw[:, i + 1].astype(np.float64) for i, col in enumerate(BAR_COLUMNS[1:])},
+    })
+    # A full page may have been cut by the limit; a shorter one holds every bar of the window
+    page.attrs["exhausted"] = len(data) < BINANCE_PAGE_BARS
+    return page
+
+
+def fetch_polygon_page(session, symbol, interval, start_ms, end_ms, limiter, api_key):
+    """Aggregates of one window, following next_url until Polygon has no more results for it."""
+    minutes = INTERVAL_MS[interval] // 60_000
+    multiplier, timespan = (minutes // 1440, "day") if minutes >= 1440 else \
+        (minutes // 60, "hour") if minutes >= 60 and minutes % 60 == 0 else (minutes, "minute")
+    url = POLYGON_AGGS_URL.format(ticker=symbol, multiplier=multiplier, timespan=timespan, start=start_ms, end=end_ms)
+    params = {"adjusted": "true", "sort": "asc", "limit": POLYGON_BASE_LIMIT, "apiKey": api_key}
+    results = []
+    while url:
+        data = _get_json(session, url, params, limiter)
+        results.extend(data.get("results") or [])
+        # next_url carries the query of the first request, except the key
+        url, params = data.get("next_url"), {"apiKey": api_key}
+    if not results:
+        page = pd.DataFrame(columns=BAR_COLUMNS)
+    else:
+        df = pd.DataFrame(results)
+        page = pd.DataFrame({
+            "ts": df["t"].astype(np.int64), "open": df["o"], "high": df["h"],
+            "low": df["l"], "close": df["c"], "volume": df["v"],
+        })
+    page.attrs["exhausted"] = True
+    return page
+
+
+class Checkpoint:
+    """Completed page windows of one symbol, persisted atomically after every page."""
+    def __init__(self, symbol_dir):
+        self.path = os.path.join(symbol_dir, CHECKPOINT_FILE)
+        self.lock = threading.Lock()
+        self.done = set()
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                self.done = set(json.load(f)["done"])
+
+    def mark(self, window_start):
+        with self.lock:
+            self.done.add(window_start)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"done": sorted(self.done)}, f)
+            os.replace(tmp, self.path)
+
+
+def symbol_dir(out_dir, venue, symbol, interval):
+    return os.path.join(out_dir, venue, symbol, interval)
+
+
+def backfill(symbols, venue="binance", interval="15m", since=None, until=None, out_dir="data",
+             workers=8, rate=8.0, session=None, api_key=None):
+    """
+    Downloads the history of `symbols` between `since` and `until` (datetimes, default: 3 years ago
+    and now), fetching all pages of all symbols concurrently under a shared rate limit.
+    Each page is written as data/<venue>/<symbol>/<interval>/part-<start>.parquet and checkpointed,
+    so an interrupted run resumes with the missing pages only.
+    :return: dict symbol -> number of bars written in this run.
+    """
+    until = until or datetime.now(timezone.utc)
+    since = since or until - timedelta(days=3 * 365)
+    since_ms, until_ms = int(since.timestamp() * 1000), int(until.timestamp() * 1000)
+    session = session or requests.Session()
+    limiter = RateLimiter(rate)
+    page_bars = BINANCE_PAGE_BARS if venue == "binance" else polygon_page_bars(interval)
+
+    jobs = []
+    checkpoints = {}
+    for symbol in symbols:
+        path = symbol_dir(out_dir, venue, symbol, interval)
+        os.makedirs(path, exist_ok=True)
+        checkpoints[symbol] = Checkpoint(path)
+        for start, end, complete in page_windows(since_ms, until_ms, interval, page_bars):
+            if start not in checkpoints[symbol].done:
+                jobs.append((symbol, start, end, complete))
+
+    def run(job):
+        symbol, start, end, complete = job
+        if venue == "binance":
+            page = fetch_binance_page(session, symbol, interval, start, end, limiter)
+        else:
+            page = fetch_polygon_page(session, symbol, interval, start, end, limiter, api_key)
+        if not page.empty:
+            page.to_parquet(os.path.join(symbol_dir(out_dir, venue, symbol, interval), f"part-{start}.parquet"),
+                            index=False)
+        # The newest window is still growing and is fetched again by the next run, as is a window
+        # whose response may have been cut short (bars not reaching its end on a full page)
+        if complete and (reaches_end(page, end, interval) or page.attrs.get("exhausted")):
+            checkpoints[symbol].mark(start)
+        return symbol, len(page)
+
+    written = {symbol: 0 for symbol in symbols}
+    print(f"⬇️ {len(jobs)} páginas a baixar para {len(symbols)} ativos ({venue} {interval})")
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(run, job) for job in jobs]
+        for future in as_completed(futures):
+            try:
+                symbol, bars = future.result()
+                written[symbol] += bars
+            except Exception as e:
+                print(f"⚠️ Página falhou (será retomada na próxima execução): {e}")
+                print(traceback.format_exc())
+    return written
+
+
+def merge_parts(path, out_file):
+    """
+    Streams the part files of a symbol, oldest first, into one sorted and de-duplicated Parquet
+    file, holding one part in memory at a time.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    parts = sorted((f for f in os.listdir(path) if f.startswith("part-")), key=lambda f: int(f[5:-8]))
+    writer = None
+    last_ts = None
+    try:
+        for part in parts:
+            df = pd.read_parquet(os.path.join(path, part)).sort_values("ts")
+            if last_ts is not None:
+                df = df[df["ts"] > last_ts]
+            df = df.drop_duplicates("ts")
+            if df.empty:
+                continue
+            last_ts = df["ts"].iloc[-1]
+            table = pa.Table.from_pandas(df[BAR_COLUMNS], preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(out_file, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+    return out_file
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill de histórico OHLCV")
+    parser.add_argument("--venue", choices=["binance", "polygon"], default="binance")
+    parser.add_argument("--symbols", nargs="*", help="default: ativos dos CSVs da Quantfury")
+    parser.add_argument("--interval", default="15m", choices=sorted(INTERVAL_MS))
+    parser.add_argument("--since", type=datetime.fromisoformat, help="ex: 2022-01-01")
+    parser.add_argument("--until", type=datetime.fromisoformat)
+    parser.add_argument("--out", default="../data")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=8.0, help="requisições por segundo")
+    parser.add_argument("--merge", action="store_true", help="gera <symbol>.parquet ao final")
+    args = parser.parse_args()
+
+    from strategy_utils import read_crypto_symbols_from_csv, read_stocks_symbols_from_csv, get_config
+
+    symbols = args.symbols
+    if not symbols:
+        if args.venue == "binance":
+            symbols = read_crypto_symbols_from_csv()
+        else:
+            stocks = read_stocks_symbols_from_csv()
+            symbols = [s for broker, tickers in stocks.items() if broker != "B3" for s in tickers]
+    api_key = get_config()["polygon"]["api_key"] if args.venue == "polygon" else None
+
+    since = args.since.replace(tzinfo=timezone.utc) if args.since else None
+    until = args.until.replace(tzinfo=timezone.utc) if args.until else None
+    written = backfill(symbols, args.venue, args.interval, since, until, args.out,
+                       workers=args.workers, rate=args.rate, api_key=api_key)
+    print(f"✅ {sum(written.values())} barras gravadas em {args.out}")
+
+    if args.merge:
+        for symbol in symbols:
+            path = symbol_dir(args.out, args.venue, symbol, args.interval)
+            merge_parts(path, os.path.join(args.out, f"{symbol}.parquet"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+import hashlib
+import json
+import os
+import sys
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from backfill import INTERVAL_MS
+from backtest_engine import BacktestState, backtest_frame, SIGNAL_COLUMNS
+from compact_frames import bar_times
+
+DEFAULT_CACHE_DIR = "../cache/backtest"
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+DEFAULT_BLOCK_BARS = 1000
+DEFAULT_WARMUP_BARS = 100
+
+# Modules whose code decides the trades: editing any of them invalidates the cache
+CODE_MODULES = ("backtest_engine", "exit_simulation", "signal_generators", "strategy_runner", "strategy_catalog",
+                "strategy_registry", "indicators", "indicator_kernels", "trade_excursions")
+
+# Params that do not change the trades of a symbol (data window params only pick the bars, which are
+# hashed or tracked separately)
+NEUTRAL_PARAMS = {"data_dir", "chunk_size", "print_signals", "ignore_market_open", "full_scan", "cache_dir",
+                  "cache_max_bytes", "monte_carlo_simulations", "monte_carlo_skip_rate", "incremental_dir",
+                  "profile", "profile_budget", "profile_dir", "period", "binance_limit", "trade_charts",
+                  "chart_dir"}
+
+
+@lru_cache(maxsize=1)
+def code_version():
+    """Hash of the source of every module in CODE_MODULES."""
+    digest = hashlib.sha256()
+    for name in CODE_MODULES:
+        module = sys.modules.get(name) or __import__(name)
+        with open(module.__file__, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def params_key(params):
+    return json.dumps({k: v for k, v in sorted(params.items()) if k not in NEUTRAL_PARAMS}, default=str)
+
+
+def frame_fingerprint(df):
+    """Content hash of a bar frame (values and column names, not the index)."""
+    digest = hashlib.sha256(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    digest.update(",".join(map(str, df.columns)).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class BacktestCache:
+    """
+    On-disk, content-addressed store of backtest results: one JSON file per key with the trades
+    and the end state, evicted least-recently-used first when the folder grows past max_bytes.
+    Safe to share between processes (files are written atomically).
+    """
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + ".json")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path)  # recently used
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def put(self, key, trades, state):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"trades": trades, "state": state.to_dict()}, f)
+        os.replace(tmp, path)
+
+    def evict(self):
+        """Deletes the least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            removed += 1
+        return removed
+
+
+def _shift_trades(trades, delta):
+    return [{**trade, "entry_index": trade["entry_index"] + delta, "exit_index": trade["exit_index"] + delta}
+            for trade in trades]
+
+
+def _shift_state(state, delta):
+    """Copy of a BacktestState dict with its bar indexes moved by delta."""
+    state = dict(state)
+    state["next_bar"] += delta
+    if state["entry_index"] is not None:
+        state["entry_index"] += delta
+    if state.get("excursion") is not None:
+        state["excursion"] = {**state["excursion"], "peak_bar": state["excursion"]["peak_bar"] + delta,
+                              "through": state["excursion"]["through"] + delta}
+    return state
+
+
+def time_blocks(times, block_ms):
+    """(start, stop) row ranges of the bars falling in each `block_ms` span of absolute time."""
+    if len(times) == 0:
+        return []
+    ids = np.asarray(times) // block_ms
+    edges = np.flatnonzero(np.diff(ids)) + 1
+    bounds = np.concatenate([[0], edges, [len(times)]])
+    return list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+
+
+def cached_backtest(df, symbol, signal_fn, params, cache, interval="", block_bars=DEFAULT_BLOCK_BARS,
+                    warmup_bars=DEFAULT_WARMUP_BARS, columns=SIGNAL_COLUMNS):
+    """
+    Backtests a symbol in blocks of `block_bars` bars (plus a `warmup_bars` lookback, as in
+    chunked_backtester), caching each block under a hash of its bars, the position state it
+    starts from, the strategy code version and the params. Blocks are aligned on absolute time
+    (`block_bars` bars of `interval`, inferred from the bars when not given) and cached with bar
+    indexes relative to their frame, so a rerun over unchanged data is read from the cache, and
+    one over a history with new bars appended, or a rolling window, only recomputes the blocks
+    that changed.
+    """
+    state = BacktestState()
+    trades = []
+    times = bar_times(df)
+    interval_ms = INTERVAL_MS.get(interval) or int(np.diff(times).min(initial=np.iinfo(np.int64).max)) or 1
+    base_key = f"{symbol}|{interval}|{code_version()}|{params_key(params)}|{warmup_bars}"
+    for start, stop in time_blocks(times, block_bars * interval_ms):
+        offset = max(0, start - warmup_bars)
+        frame = df.iloc[offset:stop].reset_index(drop=True)
+        relative_state = _shift_state(state.to_dict(), -offset)
+        key = hashlib.sha256(
+            f"{base_key}|{times[start]}-{times[stop - 1]}|{json.dumps(relative_state)}|{frame_fingerprint(frame)}"
+            .encode("utf-8")
+        ).hexdigest()
+
+        entry = cache.get(key)
+        if entry is not None:
+            block_trades = _shift_trades(entry["trades"], offset)
+            state = BacktestState.from_dict(_shift_state(entry["state"], offset))
+        else:
+            signals = signal_fn(frame.copy(), params)
+            block_trades = backtest_frame(signals, symbol, state, params, offset=offset, columns=columns)
+            cache.put(key, _shift_trades(block_trades, -offset),
+                      BacktestState.from_dict(_shift_state(state.to_dict(), -offset)))
+        trades.extend(block_trades)
+    return trades
@@ -0,0 +1,230 @@
+import numpy as np
+
+from exit_simulation import first_passage, NO_HIT, STOP_LOSS_HIT
+from strategy_catalog import SIGNAL_COLUMNS
+from trade_excursions import add_excursions
+
+BUY = 1
+SELL = -1
+NO_SIGNAL = 0
+
+
+class BacktestState:
+    """
+    Position state of a symbol's backtest, carried between successive slices of its history.
+
+    Bar indexes are global (counted from the first bar of the full history), so trades
+    produced slice by slice are identical to the ones of a single in-memory run.
+    """
+    def __init__(self):
+        self.next_bar = 0
+        self.in_position = False
+        self.entry_index = None
+        self.entry_price = 0.0
+        self.entry_strategy = None
+        self.stop_loss = None
+        self.take_profit = None
+        # Excursion of the open position's bars so far (see trade_excursions.add_excursions)
+        self.excursion = None
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls()
+        state.__dict__.update(data)
+        return state
+
+
+def signal_codes(values):
+    """Encodes a BUY/SELL/None column (or an already numeric one) as int8 BUY/SELL/NO_SIGNAL codes."""
+    if values.dtype.kind in "iuf":
+        return np.nan_to_num(values).astype(np.int8)
+    return ((values == "BUY").astype(np.int8) - (values == "SELL").astype(np.int8)).astype(np.int8)
+
+
+def first_signals(matrix):
+    """
+    Reduces an (n_bars, n_strategies) int8 signal matrix to one signal per bar: the first column
+    holding BUY or SELL wins.
+    :return: (codes, strategy_ids) int8 arrays; strategy_ids is -1 where there is no signal.
+    """
+    if matrix.shape[1] == 0:
+        return np.zeros(len(matrix), dtype=np.int8), np.full(len(matrix), -1, dtype=np.int8)
+    first = (matrix != NO_SIGNAL).argmax(axis=1)
+    codes = matrix[np.arange(len(matrix)), first].astype(np.int8)
+    return codes, np.where(codes != NO_SIGNAL, first, -1).astype(np.int8)
+
+
+def resolve_signals(df, columns=SIGNAL_COLUMNS):
+    """
+    Reduces the per-strategy signal columns to one signal per bar.
+
+    The first column (in `columns` order) holding BUY or SELL wins, as in the original row loop.
+    :return: (codes, strategy_ids) int8 arrays; codes are BUY/SELL/NO_SIGNAL and strategy_ids
+             index into `columns` (-1 when there is no signal).
+    """
+    matrix = np.zeros((len(df), len(columns)), dtype=np.int8)
+    for k, col in enumerate(columns):
+        if col in df.columns:
+            matrix[:, k] = signal_codes(df[col].to_numpy())
+    return first_signals(matrix)
+
+
+def _column(df, name):
+    for col in (name, name.lower()):
+        if col in df.columns:
+            return df[col].to_numpy(dtype=np.float64)
+    return None
+
+
+def _bar_times(df):
+    """Epoch-ms bar times of a frame with a date/ts column or a datetime index, else None."""
+    from compact_frames import DATE_COLUMNS, bar_times  # compact_frames imports this module
+
+    if any(col in df.columns for col in DATE_COLUMNS + ("ts",)) or df.index.dtype.kind == "M":
+        return bar_times(df)
+    return None
+
+
+def exit_levels(df, close, params):
+    """
+    Builds the per-bar stop-loss and take-profit levels a trade entered on that bar would use.
+
+    Levels come from the strategies' "stop_loss"/"take_profit" columns when present and fall back to
+    params["stop_loss_pct"] / params["take_profit_pct"] below/above the close.
+    :return: (stop_loss, take_profit); either is None when no level is set at all.
+    """
+    levels = []
+    for name, sign in (("stop_loss", -1), ("take_profit", 1)):
+        pct = params.get(name + "_pct")
+        default = close * (1 + sign * pct / 100) if pct else np.full(len(close), np.nan)
+        level = _column(df, name)
+        level = default if level is None else np.where(np.isnan(level), default, level)
+        levels.append(None if np.isnan(level).all() else level)
+    return tuple(levels)
+
+
+def backtest_arrays(close, codes, strategy_ids, symbol, state, offset=0, timeout=7, columns=SIGNAL_COLUMNS,
+                    high=None, low=None, open_prices=None, stop_loss=None, take_profit=None, tie_break="stop"):
+    """
+    Runs the long-only BUY -> SELL/timeout state machine over one slice of bars.
+
+    Instead of visiting every bar, it jumps from entry to exit using the sorted BUY/SELL positions.
+    When High/Low and stop-loss/take-profit levels are given, a trade also exits on the first bar
+    touching one of its levels (see exit_simulation.first_passage), filled at the level.
+    :param close: Close prices of the slice.
+    :param codes: Signal codes of the slice (see resolve_signals).
+    :param strategy_ids: Strategy index of each signal.
+    :param state: BacktestState, updated in place.
+    :param offset: Global index of the first bar of the slice.
+    :param stop_loss: Per-bar stop-loss level of a trade entered on that bar (NaN disables it).
+    :param take_profit: Per-bar take-profit level of a trade entered on that bar (NaN disables it).
+    :param tie_break: Level that wins when one bar touches both, see first_passage.
+    :return: List of closed trades. A position still open at the end of the slice stays in `state`.
+    """
+    trades = []
+    n = len(close)
+    buys = np.flatnonzero(codes == BUY)
+    sells = np.flatnonzero(codes == SELL)
+    i = max(state.next_bar - offset, 0)
+
+    intrabar = high is not None and low is not None and (stop_loss is not None or take_profit is not None)
+    if intrabar:
+        stop_loss = np.full(n, np.nan) if stop_loss is None else stop_loss
+        take_profit = np.full(n, np.nan) if take_profit is None else take_profit
+        # One batched search for every BUY bar that could become an entry in this slice
+        touches = first_passage(high, low, buys, stop_loss[buys], take_profit[buys], timeout,
+                                open_prices=open_prices, tie_break=tie_break)
+    entry_k = None
+
+    while i < n:
+        if not state.in_position:
+            k = np.searchsorted(buys, i)
+            if k == len(buys):
+                i = n
+                break
+            entry = buys[k]
+            entry_k = k
+            state.in_position = True
+            state.entry_index = offset + int(entry)
+            state.entry_price = float(close[entry])
+            state.entry_strategy = columns[strategy_ids[entry]]
+            if intrabar:
+                state.stop_loss = float(stop_loss[entry])
+                state.take_profit = float(take_profit[entry])
+            i = entry + 1
+        else:
+            entry = state.entry_index - offset
+            deadline = entry + timeout
+            k = np.searchsorted(sells, max(entry + 1, i))
+            next_sell = sells[k] if k < len(sells) else n
+            exit_bar = min(deadline, next_sell)
+
+            touch_bar, touch_price, touch_kind = -1, np.nan, NO_HIT
+            if intrabar and entry_k is not None:
+                touch_bar, touch_price, touch_kind = (touches[0][entry_k], touches[1][entry_k], touches[2][entry_k])
+            elif high is not None and low is not None and state.stop_loss is not None:
+                # Position carried over from a previous slice: search only its remaining bars
+                start = max(entry + 1, i)
+                hit = first_passage(high, low, [start - 1], [state.stop_loss], [state.take_profit],
+                                    deadline - start + 1, open_prices=open_prices, tie_break=tie_break)
+                touch_bar, touch_price, touch_kind = hit[0][0], hit[1][0], hit[2][0]
+
+            if touch_kind != NO_HIT and touch_bar <= exit_bar:
+                exit_bar = int(touch_bar)
+                exit_price = float(touch_price)
+                exit_reason = "stop_loss" if touch_kind == STOP_LOSS_HIT else "take_profit"
+            elif exit_bar >= n:
+                i = n
+                break
+            else:
+                exit_price = float(close[exit_bar])
+                exit_reason = "timeout" if exit_bar - entry >= timeout else "signal"
+
+            trades.append({
+                "symbol": symbol,
+                "strategy": state.entry_strategy,
+                "entry_index": state.entry_index,
+                "exit_index": offset + int(exit_bar),
+                "entry_price": state.entry_price,
+                "exit_price": exit_price,
+                "bars_held": int(exit_bar - entry),
+                "return_%": round((exit_price - state.entry_price) / state.entry_price * 100, 2),
+                "exit_reason": exit_reason
+            })
+            state.in_position = False
+            state.stop_loss = state.take_profit = None
+            entry_k = None
+            i = exit_bar + 1
+
+    state.next_bar = offset + n
+    return trades
+
+
+def backtest_frame(df, symbol, state, params=None, offset=0, columns=SIGNAL_COLUMNS):
+    """
+    Backtests one slice of a symbol's signal frame ("Close"/"close" and optional High/Low/Open columns).
+    Exits honour params["timeout"], the stop-loss/take-profit levels (see exit_levels) and
+    params["tie_break"]. With High/Low, trades also get their excursions (see trade_excursions),
+    and with bar dates their exit time ("exit_ts", epoch ms).
+    """
+    params = params or {}
+    codes, strategy_ids = resolve_signals(df, columns)
+    close = _column(df, "Close")
+    high, low = _column(df, "High"), _column(df, "Low")
+    stop_loss, take_profit = exit_levels(df, close, params)
+    carried = state.excursion if state.in_position else None
+    trades = backtest_arrays(close, codes, strategy_ids, symbol, state, offset=offset,
+                             timeout=params.get("timeout", 7), columns=columns,
+                             high=high, low=low, open_prices=_column(df, "Open"),
+                             stop_loss=stop_loss, take_profit=take_profit,
+                             tie_break=params.get("tie_break", "stop"))
+    if high is not None and low is not None:
+        add_excursions(trades, high, low, close, offset, state, carried)
+    times = _bar_times(df) if trades else None
+    if times is not None:
+        for trade in trades:
+            trade["exit_ts"] = int(times[trade["exit_index"] - offset])
+    return trades
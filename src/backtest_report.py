@@ -0,0 +1,184 @@
+import os
+
+import numpy as np
+import pandas as pd
+from fpdf import FPDF
+
+GROUP_COLUMNS = ["symbol", "strategy"]
+
+PDF_MAX_ROWS = 500
+HTML_MAX_ROWS = 2000
+PDF_COLUMNS = [
+    ("symbol", "Ativo", 30), ("strategy", "Estrategia", 38), ("total_trades", "Trades", 16),
+    ("win_rate", "Win %", 16), ("expectancy", "Exp. %", 18), ("profit_factor", "PF", 14),
+    ("total_return", "Total %", 20), ("max_drawdown", "Max DD %", 20),
+]
+
+
+def equity_curves(trades_df, by=GROUP_COLUMNS):
+    """
+    Adds the compounded equity (starting at 1.0) and drawdown of each symbol/strategy group after
+    every trade, in trade order, using grouped cumulative sums of log returns.
+    """
+    order = "exit_index" if "exit_index" in trades_df.columns else None
+    df = trades_df.sort_values(by + [order] if order else by, kind="stable")
+    log_equity = np.log1p(df["return_%"].to_numpy() / 100)
+    keys = [df[col] for col in by]
+    df = df.assign(log_equity=log_equity)
+    df["log_equity"] = df.groupby(keys, sort=False, observed=True)["log_equity"].cumsum()
+    peak = df.groupby(keys, sort=False, observed=True)["log_equity"].cummax().clip(lower=0)
+    df["equity"] = np.exp(df["log_equity"])
+    df["drawdown"] = 1 - np.exp(df["log_equity"] - peak)
+    return df.drop(columns="log_equity")
+
+
+def summarize_trades(trades_df, by=GROUP_COLUMNS):
+    """
+    Computes every report statistic per group with vectorized group reductions.
+
+    Percent columns: win_rate, avg_win, avg_loss, expectancy (average return per trade, i.e.
+    win_rate * avg_win - loss_rate * avg_loss), total_return and max_drawdown of the compounded
+    equity curve. profit_factor is gross profit / gross loss (inf without losing trades).
+    Trades with excursions (see trade_excursions) also get avg_mae and avg_mfe, in percent.
+    """
+    curves = equity_curves(trades_df, by)
+    returns = curves["return_%"].to_numpy()
+    stats = pd.DataFrame({
+        "win": returns > 0,
+        "gain": np.clip(returns, 0, None),
+        "loss": np.clip(-returns, 0, None),
+        "return": returns,
+        "equity": curves["equity"].to_numpy(),
+        "drawdown": curves["drawdown"].to_numpy(),
+    }, index=curves.index)
+    excursions = {}
+    if "mae_%" in curves.columns:
+        stats["mae"] = curves["mae_%"].to_numpy()
+        stats["mfe"] = curves["mfe_%"].to_numpy()
+        excursions = {"avg_mae": ("mae", "mean"), "avg_mfe": ("mfe", "mean")}
+    grouped = stats.groupby([curves[col] for col in by], sort=True, observed=True)
+
+    summary = grouped.agg(
+        total_trades=("return", "size"),
+        wins=("win", "sum"),
+        win_rate=("win", "mean"),
+        expectancy=("return", "mean"),
+        gross_profit=("gain", "sum"),
+        gross_loss=("loss", "sum"),
+        total_return=("equity", "last"),
+        max_drawdown=("drawdown", "max"),
+        **excursions,
+    )
+    losses = summary["total_trades"] - summary["wins"]
+    summary["avg_win"] = summary["gross_profit"] / summary["wins"].where(summary["wins"] > 0)
+    summary["avg_loss"] = summary["gross_loss"] / losses.where(losses > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        summary["profit_factor"] = summary["gross_profit"] / summary["gross_loss"]
+    summary["win_rate"] *= 100
+    summary["total_return"] = (summary["total_return"] - 1) * 100
+    summary["max_drawdown"] *= 100
+    return summary.reset_index().round(2)
+
+
+def _write_pdf(summary, overall, filename, max_rows=PDF_MAX_ROWS, charts=()):
+    pdf = FPDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+    pdf.set_font("Arial", "B", 14)
+    pdf.cell(0, 10, "Resumo do Backtest", ln=True)
+
+    pdf.set_font("Arial", "", 10)
+    for line in overall:
+        pdf.cell(0, 6, line, ln=True)
+
+    # Only the best groups go to the PDF; the full table is in the CSV/Parquet/HTML outputs
+    top = summary.nlargest(max_rows, "total_return")
+    pdf.ln(4)
+    pdf.set_font("Arial", "B", 12)
+    pdf.cell(0, 10, f"Resumo por Ativo e Estratégia (top {len(top)} de {len(summary)})", ln=True)
+
+    def header():
+        pdf.set_font("Arial", "B", 8)
+        for _, title, width in PDF_COLUMNS:
+            pdf.cell(width, 6, title, border=1)
+        pdf.ln()
+        pdf.set_font("Arial", "", 8)
+
+    columns = [col for col, _, _ in PDF_COLUMNS]
+    widths = [width for _, _, width in PDF_COLUMNS]
+    rows = top[columns].astype(str).to_numpy().tolist()
+    header()
+    for row in rows:
+        if pdf.get_y() + 6 > pdf.h - pdf.b_margin:
+            pdf.add_page()
+            header()
+        for value, width in zip(row, widths):
+            pdf.cell(width, 6, value[:20], border=1)
+        pdf.ln()
+
+    # Trade charts (chart_service), two per page
+    charts = [(caption, path) for caption, path in charts if path]
+    for k, (caption, path) in enumerate(charts):
+        if k % 2 == 0:
+            pdf.add_page()
+            if k == 0:
+                pdf.set_font("Arial", "B", 12)
+                pdf.cell(0, 10, "Gráficos dos Trades", ln=True)
+        pdf.set_font("Arial", "", 9)
+        pdf.cell(0, 6, caption, ln=True)
+        pdf.image(path, w=180)
+
+    pdf.output(filename)
+
+
+def write_report(trades_df, out_dir=".", basename="backtest", formats=("parquet", "csv", "html", "pdf"),
+                 pdf_filename=None, pdf_max_rows=PDF_MAX_ROWS, html_max_rows=HTML_MAX_ROWS, charts=()):
+    """
+    Writes the backtest report: the per-group summary and the trades with their equity curves as
+    Parquet/CSV, plus an HTML and a paginated PDF summary rendered from the precomputed tables.
+    `charts` are (caption, PNG path) pairs appended to the PDF.
+    :return: List of written files.
+    """
+    if trades_df.empty:
+        print("⚠️ No trades to report.")
+        return []
+
+    os.makedirs(out_dir, exist_ok=True)
+    trades_df = trades_df.astype({col: "category" for col in GROUP_COLUMNS})
+    summary = summarize_trades(trades_df)
+    by_strategy = summarize_trades(trades_df.assign(symbol=pd.Categorical(["*"] * len(trades_df))))
+    curves = equity_curves(trades_df)
+
+    returns = trades_df["return_%"]
+    overall = [
+        f"Trades: {len(trades_df)} | Ativos: {trades_df['symbol'].nunique()} | Grupos: {len(summary)}",
+        f"Win Rate: {round((returns > 0).mean() * 100, 2)}% | Expectancy: {round(returns.mean(), 2)}%",
+    ]
+    if "mae_%" in trades_df.columns:
+        overall.append(f"MAE médio: {round(trades_df['mae_%'].mean(), 2)}% | "
+                       f"MFE médio: {round(trades_df['mfe_%'].mean(), 2)}%")
+
+    written = []
+    path = os.path.join(out_dir, basename)
+    if "parquet" in formats:
+        summary.to_parquet(f"{path}_summary.parquet", index=False)
+        curves.to_parquet(f"{path}_trades.parquet", index=False)
+        written += [f"{path}_summary.parquet", f"{path}_trades.parquet"]
+    if "csv" in formats:
+        summary.to_csv(f"{path}_summary.csv", index=False)
+        curves.to_csv(f"{path}_trades.csv", index=False)
+        written += [f"{path}_summary.csv", f"{path}_trades.csv"]
+    if "html" in formats:
+        with open(f"{path}_summary.html", "w", encoding="utf-8") as f:
+            f.write("<h1>Resumo do Backtest</h1>" + "".join(f"<p>{line}</p>" for line in overall))
+            f.write("<h2>Por Estratégia</h2>" + by_strategy.drop(columns="symbol").to_html(index=False))
+            top = summary.nlargest(html_max_rows, "total_return")
+            f.write(f"<h2>Por Ativo e Estratégia (top {len(top)} de {len(summary)})</h2>" + top.to_html(index=False))
+        written.append(f"{path}_summary.html")
+    if "pdf" in formats:
+        pdf_filename = pdf_filename or f"{path}_report.pdf"
+        _write_pdf(summary, overall, pdf_filename, max_rows=pdf_max_rows, charts=charts)
+        written.append(pdf_filename)
+
+    print(f"✅ Relatório gerado: {', '.join(written)}")
+    return written
@@ -1,122 +1,145 @@
 # backtester.py
 import pandas as pd
-from fpdf import FPDF
 from concurrent.futures import ProcessPoolExecutor
 from strategy_runner import apply_strategy
-from strategy_utils import read_stocks_symbols_from_csv, is_market_open_now, load_data_yfinance, \
-    read_crypto_symbols_from_csv, get_binance_ohlc
+from strategy_utils import read_stocks_symbols_from_csv, is_market_open_now, read_crypto_symbols_from_csv
+from b3_data import B3_SUFFIX, yahoo_ticker
+from market_data import BinanceSource, YFinanceSource
+from backtest_engine import BacktestState, backtest_frame
+from chunked_backtester import backtest_file
+from backtest_report import write_report
+from chart_service import ChartService, DEFAULT_CHART_DIR, attach_trade_bars, trade_chart
+from compact_frames import TradeLog
+from backtest_cache import BacktestCache, cached_backtest, DEFAULT_MAX_BYTES
+from incremental_backtest import IncrementalStore, incremental_backtest
+from monte_carlo import run_monte_carlo
+from profiling import profiler_from_params, tag
+from contextlib import nullcontext
 import os
 
-def backtest_symbol(df, symbol, timeout=7):
-    trades = []
-    in_position = False
-    entry_price = 0
-    entry_index = None
-    entry_strategy = None
-
-    for i in range(len(df)):
-        row = df.iloc[i]
-        signal = None
-        strategy_used = None
-
-        for strategy in ["signal_shadow", "signal_engulfing", "signal_insidebar", "signal_stochastic"]:
-            if row.get(strategy) == "BUY":
-                signal = "BUY"
-                strategy_used = strategy
-                break
-            elif row.get(strategy) == "SELL":
-                signal = "SELL"
-                strategy_used = strategy
-                break
-
-        if not in_position and signal == "BUY":
-            in_position = True
-            entry_price = row["Close"]
-            entry_index = i
-            entry_strategy = strategy_used
-
-        elif in_position:
-            timeout_reached = i - entry_index >= timeout
-            exit_signal = signal == "SELL"
-            if timeout_reached or exit_signal:
-                exit_price = row["Close"]
-                trades.append({
-                    "symbol": symbol,
-                    "strategy": entry_strategy,
-                    "entry_index": entry_index,
-                    "exit_index": i,
-                    "entry_price": entry_price,
-                    "exit_price": exit_price,
-                    "bars_held": i - entry_index,
-                    "return_%": round((exit_price - entry_price) / entry_price * 100, 2),
-                    "exit_reason": "timeout" if timeout_reached else "signal"
-                })
-                in_position = False
-
-    return trades
-
-def save_pdf_report(trades_df, filename="backtest_report.pdf"):
-    if trades_df.empty:
-        print("⚠️ No trades to report.")
-        return
-
-    pdf = FPDF()
-    pdf.set_auto_page_break(auto=True, margin=15)
-    pdf.add_page()
-    pdf.set_font("Arial", "B", 14)
-    pdf.cell(0, 10, "Resumo por Ativo e Estratégia", ln=True)
-
-    grouped = trades_df.groupby(["symbol", "strategy"]).agg(
-        win_rate=("return_%", lambda x: round((x > 0).mean() * 100, 2)),
-        avg_return=("return_%", "mean"),
-        total_trades=("return_%", "count")
-    ).reset_index()
-
-    pdf.set_font("Arial", "", 12)
-    for _, row in grouped.iterrows():
-        pdf.cell(0, 10,
-                 f"{row['symbol']} ({row['strategy']}): {row['total_trades']} trades | "
-                 f"Win Rate: {row['win_rate']}% | Avg Return: {round(row['avg_return'], 2)}%",
-                 ln=True)
-
-    pdf.output(filename)
-    print(f"✅ Relatório gerado: {filename}")
+def backtest_symbol(df, symbol, timeout=7, params=None):
+    params = dict(params or {})
+    params.setdefault("timeout", timeout)
+    return backtest_frame(df, symbol, BacktestState(), params)
+
+def save_pdf_report(trades_df, filename="backtest_report.pdf", charts=()):
+    """
+    Writes the PDF summary to `filename` and the Parquet/CSV/HTML tables next to it.
+    """
+    write_report(trades_df, out_dir=os.path.dirname(filename) or ".", pdf_filename=filename, charts=charts)
+
+def report_trades(trades_df, params, charts=()):
+    """
+    Writes the backtest report (with the (caption, path) trade charts) and, when
+    params["monte_carlo_simulations"] is set, the Monte Carlo robustness table (backtest_monte_carlo.csv).
+    """
+    save_pdf_report(trades_df, charts=charts)
+    simulations = params.get("monte_carlo_simulations")
+    if simulations and not trades_df.empty:
+        result = run_monte_carlo(trades_df, simulations, skip_rate=params.get("monte_carlo_skip_rate", 0.1))
+        result.to_csv("backtest_monte_carlo.csv", index=False)
+        print(result.to_string(index=False))
 
 def load_and_backtest(args):
-    symbol, broker, params = args
-    symbol_tag = symbol + ".SA" if broker == "B3" else symbol
-    if broker == "CRYPTO":
-        df = get_binance_ohlc(symbol_tag, interval="15m", limit=params["binance_limit"])
-    else:
-        df = load_data_yfinance(symbol=symbol_tag, period=params['period'])
+    symbol, broker, params, *preloaded = args
+    symbol_tag = yahoo_ticker(symbol) if broker == "B3" else symbol
+    profiler = profiler_from_params(params)
+    with profiler.cycle("backtest", symbol=symbol_tag) if profiler else nullcontext():
+        return _load_and_backtest(symbol, broker, symbol_tag, params, *preloaded)
+
+def _load_and_backtest(symbol, broker, symbol_tag, params, df=None):
+    if df is None:  # B3 bars come preloaded in batch by run_backtest_parallel
+        with tag(stage="fetch"):
+            if broker == "CRYPTO":
+                df = BinanceSource().fetch(symbol_tag, "15m", limit=params["binance_limit"])
+            else:
+                df = YFinanceSource(period=params['period']).fetch(symbol_tag, "15m")
 
     if df is None or df.empty:
         return []
 
-    df = apply_strategy(df=df, params=params)
-    return backtest_symbol(df, symbol_tag)
+    if params.get("incremental_dir"):
+        # Only the bars newer than the last run are backtested; the report gets every trade so far
+        store = IncrementalStore(params["incremental_dir"])
+        with tag(stage="incremental_backtest"):
+            incremental_backtest(df, symbol_tag, apply_strategy, params, store)
+        return store.trades(symbol_tag, params)
+
+    if params.get("cache_dir"):
+        cache = BacktestCache(params["cache_dir"], params.get("cache_max_bytes", DEFAULT_MAX_BYTES))
+        with tag(stage="cached_backtest"):
+            trades = cached_backtest(df, symbol_tag, apply_strategy, params, cache, interval="15m")
+    else:
+        with tag(stage="signals"):
+            df = apply_strategy(df=df, params=params)
+        with tag(stage="backtest"):
+            trades = backtest_symbol(df, symbol_tag, params=params)
+
+    # The bars of the last trades travel back with them, for the charts rendered by run_backtest_parallel
+    return attach_trade_bars(df, trades, params.get("trade_charts", 0))
+
+def load_and_backtest_file(args):
+    symbol, path, params = args
+    return backtest_file(path, symbol, apply_strategy, params)
 
 def run_backtest_parallel(params):
     args_list = []
 
     if params["ignore_market_open"] or is_market_open_now():
         stocks = read_stocks_symbols_from_csv()
+        b3_source = YFinanceSource(period=params["period"], suffix=B3_SUFFIX)
+        b3_frames = b3_source.fetch_many(stocks["B3"], "15m") if "B3" in stocks else {}
         for broker, symbols in stocks.items():
             for symbol in symbols:
-                args_list.append((symbol, broker, params))
+                if broker == "B3" and symbol in b3_frames:
+                    args_list.append((symbol, broker, params, b3_frames[symbol]))
+                else:
+                    args_list.append((symbol, broker, params))
 
     cryptos = read_crypto_symbols_from_csv()
     for symbol in cryptos:
         args_list.append((symbol, "CRYPTO", params))
 
-    all_trades = []
+    trade_log = TradeLog()
+    # Trade charts render on their own processes while the remaining symbols are backtested
+    chart_service = ChartService(params.get("chart_dir", DEFAULT_CHART_DIR)) if params.get("trade_charts") else None
+    charts = []
     with ProcessPoolExecutor(max_workers=4) as executor:
         results = executor.map(load_and_backtest, args_list)
         for trades in results:
-            all_trades.extend(trades)
+            if chart_service is not None:
+                charts += [(f"{t['symbol']} {t['strategy']} {t['return_%']:+.2f}%", trade_chart(chart_service, t, "15m"))
+                           for t in trades if "chart_bars" in t]
+            trade_log.extend(trades)
+
+    if params.get("cache_dir"):
+        BacktestCache(params["cache_dir"], params.get("cache_max_bytes", DEFAULT_MAX_BYTES)).evict()
+
+    if chart_service is not None:
+        paths = chart_service.results([future for _, future in charts])
+        chart_service.close()
+        charts = [(caption, path) for (caption, _), path in zip(charts, paths)]
+    report_trades(trade_log.to_frame(), params, charts=charts)
+
+def run_backtest_from_files(params):
+    """
+    Backtests every bar file (<symbol>.csv or <symbol>.parquet) found in params["data_dir"],
+    reading each one in chunks of params["chunk_size"] bars.
+    """
+    data_dir = params["data_dir"]
+    args_list = []
+    for filename in sorted(os.listdir(data_dir)):
+        symbol, ext = os.path.splitext(filename)
+        if ext in (".csv", ".parquet"):
+            args_list.append((symbol, os.path.join(data_dir, filename), params))
+
+    trade_log = TradeLog()
+    with ProcessPoolExecutor(max_workers=4) as executor:
+        results = executor.map(load_and_backtest_file, args_list)
+        for trades in results:
+            trade_log.extend(trades)
 
-    trades_df = pd.DataFrame(all_trades)
-    save_pdf_report(trades_df)
+    report_trades(trade_log.to_frame(), params)
 
 if __name__ == "__main__":
     print("🚀 Running multithreaded backtester...")
@@ -130,5 +153,8 @@ if __name__ == "__main__":
         "print_signals": False,
         "full_scan": True,
         "period": "30d",
-        "binance_limit": 500
+        "binance_limit": 500,
+        "tie_break": "stop",
+        "monte_carlo_simulations": 10000,
+        "cache_dir": "../cache/backtest"
     })
@@ -0,0 +1,199 @@
+"""
+Builds OHLCV bars of several intervals at once from a single stream of trades or 1m bars, so a
+new timeframe costs no extra requests and each bar is published the moment it closes.
+"""
+import threading
+import time
+import traceback
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+import requests
+
+from backfill import BAR_COLUMNS, INTERVAL_MS, RateLimiter, fetch_binance_page
+from strategy_registry import run_strategies
+
+DEFAULT_INTERVALS = ("1m", "5m", "15m", "1h")
+DEFAULT_CAPACITY = 1000
+
+
+class BarSeries:
+    """
+    Closed bars of one symbol and interval in preallocated ring buffers, plus the bar being formed.
+    """
+    __slots__ = ("interval_ms", "capacity", "data", "size", "head", "current", "current_start")
+
+    def __init__(self, interval_ms, capacity=DEFAULT_CAPACITY):
+        self.interval_ms = interval_ms
+        self.capacity = capacity
+        self.data = np.zeros((capacity, len(BAR_COLUMNS)))
+        self.size = 0
+        self.head = 0
+        self.current = np.zeros(len(BAR_COLUMNS))
+        self.current_start = None
+
+    def __len__(self):
+        return self.size
+
+    def update(self, start_ms, open_, high, low, close, volume):
+        """
+        Merges a trade or sub-bar starting at start_ms into the forming bar.
+        :return: The closed bar (array in BAR_COLUMNS order) when the update starts a new bar, else None.
+        """
+        bucket = start_ms - start_ms % self.interval_ms
+        if self.current_start is None and self.size and bucket <= self.data[self.head - 1][0]:
+            return None  # late update of a bar already closed
+        closed = None
+        if self.current_start is not None and bucket > self.current_start:
+            closed = self.close_current()
+        if self.current_start is None:
+            self.current_start = bucket
+            self.current[:] = (bucket, open_, high, low, close, volume)
+        elif bucket == self.current_start:
+            bar = self.current
+            bar[2] = max(bar[2], high)
+            bar[3] = min(bar[3], low)
+            bar[4] = close
+            bar[5] += volume
+        # Updates older than the forming bar (late trades) are ignored
+        return closed
+
+    def close_current(self):
+        closed = self.current.copy()
+        self.data[self.head] = closed
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        self.current_start = None
+        return closed
+
+    def closes_at(self, end_ms):
+        """True when the forming bar ends at end_ms."""
+        return self.current_start is not None and self.current_start + self.interval_ms == end_ms
+
+    def bars(self, n=None):
+        """The last n closed bars (all by default), oldest first, as an (n, 6) array."""
+        n = self.size if n is None else min(n, self.size)
+        indexes = (self.head - n + np.arange(n)) % self.capacity
+        return self.data[indexes]
+
+    def frame(self, n=None):
+        bars = self.bars(n)
+        df = pd.DataFrame(bars[:, 1:], columns=BAR_COLUMNS[1:])
+        df.insert(0, "ts", bars[:, 0].astype(np.int64))
+        return df
+
+
+def bar_dict(closed):
+    bar = dict(zip(BAR_COLUMNS, closed.tolist()))
+    bar["ts"] = int(bar["ts"])
+    return bar
+
+
+class BarBuilder:
+    """
+    Maintains rolling OHLCV bars of every `intervals` for each symbol from trades (on_trade) or
+    closed 1m bars (on_bar) and calls the subscribers of an interval with
+    (symbol, interval, bar dict) whenever one of its bars closes.
+    """
+    def __init__(self, intervals=DEFAULT_INTERVALS, capacity=DEFAULT_CAPACITY):
+        self.intervals = sorted(intervals, key=INTERVAL_MS.get)
+        self.capacity = capacity
+        self.series = defaultdict(self._new_series)
+        self.subscribers = defaultdict(list)
+        self.lock = threading.Lock()
+
+    def _new_series(self):
+        return {interval: BarSeries(INTERVAL_MS[interval], self.capacity) for interval in self.intervals}
+
+    def subscribe(self, interval, callback):
+        if interval not in self.intervals:
+            raise ValueError(f"Interval {interval} is not built (intervals: {self.intervals})")
+        self.subscribers[interval].append(callback)
+
+    def on_trade(self, symbol, ts_ms, price, quantity=0.0):
+        self._update(symbol, ts_ms, price, price, price, price, quantity, end_ms=None)
+
+    def on_bar(self, symbol, ts_ms, open_, high, low, close, volume, interval="1m"):
+        """
+        Merges a closed bar of `interval` starting at ts_ms. Bars of every larger interval ending
+        with it are closed right away instead of waiting for the next update.
+        """
+        self._update(symbol, ts_ms, open_, high, low, close, volume, end_ms=ts_ms + INTERVAL_MS[interval])
+
+    def advance(self, symbol, now_ms):
+        """Closes the bars of a symbol that ended by now_ms without a newer update (quiet markets)."""
+        events = []
+        with self.lock:
+            for interval, series in self.series[symbol].items():
+                if series.current_start is not None and series.current_start + series.interval_ms <= now_ms:
+                    events.append((interval, series.close_current()))
+        self._publish(symbol, events)
+
+    def _update(self, symbol, ts_ms, open_, high, low, close, volume, end_ms):
+        events = []
+        with self.lock:
+            for interval, series in self.series[symbol].items():
+                closed = series.update(ts_ms, open_, high, low, close, volume)
+                if closed is not None:
+                    events.append((interval, closed))
+                if end_ms is not None and series.closes_at(end_ms):
+                    events.append((interval, series.close_current()))
+        self._publish(symbol, events)
+
+    def _publish(self, symbol, events):
+        for interval, closed in events:
+            bar = bar_dict(closed)
+            for callback in self.subscribers[interval]:
+                try:
+                    callback(symbol, interval, bar)
+                except Exception as e:
+                    print(f"⚠️ Erro no assinante de {symbol} {interval}: {e}")
+                    print(traceback.format_exc())
+
+    def frame(self, symbol, interval, n=None):
+        """Closed bars of a symbol and interval as a DataFrame (ts, open, high, low, close, volume)."""
+        with self.lock:
+            return self.series[symbol][interval].frame(n)
+
+    def seed(self, symbol, df, interval="1m"):
+        """Replays history (ts/open/high/low/close/volume rows of `interval`) without publishing events."""
+        subscribers, self.subscribers = self.subscribers, defaultdict(list)
+        try:
+            for row in df[BAR_COLUMNS].itertuples(index=False):
+                self.on_bar(symbol, int(row[0]), *row[1:], interval=interval)
+        finally:
+            self.subscribers = subscribers
+
+
+def strategy_listener(builder, strategies, engine, on_trades):
+    """
+    Subscriber that runs `strategies` over the symbol's bars of the closing interval and passes
+    the trades found to on_trades(symbol, interval, trades).
+    """
+    def listener(symbol, interval, bar):
+        df = builder.frame(symbol, interval)
+        df = engine.compute(df, symbol, interval, strategies)
+        trades = run_strategies(df, strategies)
+        if trades:
+            on_trades(symbol, interval, trades)
+    return listener
+
+
+def poll_binance_1m(builder, symbols, fetch=None):
+    """
+    Feeds the last closed 1m kline of each symbol into the builder: one request per symbol
+    whatever the number of intervals built.
+    """
+    if fetch is None:
+        session, limiter = requests.Session(), RateLimiter(8.0)
+        now_ms = int(time.time() * 1000)
+        start_ms = now_ms - now_ms % 60_000 - 60_000
+
+        def fetch(symbol):
+            return fetch_binance_page(session, symbol, "1m", start_ms, start_ms + 59_999, limiter)
+
+    for symbol in symbols:
+        page = fetch(symbol)
+        for row in page[BAR_COLUMNS].itertuples(index=False):
+            builder.on_bar(symbol, int(row[0]), *row[1:])
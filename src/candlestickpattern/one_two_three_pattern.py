@@ -13,11 +13,11 @@ class OneTwoThreePattern(CandlestickPattern):
         self.trades = trades
         if candles is not None and len(candles) != 3:
             raise ValueError("Exactly three candles are required for the 1-2-3 pattern.")
-        else:
+        elif candles is not None:
             self.dataframe = self.to_dataframe(candles)
 
         if dataframe is not None:
-            self.dataframe = self.to_dataframe(self.candles)
+            self.dataframe = dataframe.reset_index(drop=True)
 
 
     def validate(self):
@@ -47,7 +47,7 @@ class OneTwoThreePattern(CandlestickPattern):
             )
 
 
-        if is_buy_123_pattern:
+        if is_buy_123_pattern():
             self.trades.append({
                 "date": datetime.datetime.now(),
                 "entry": candles[2].high,
@@ -56,13 +56,13 @@ class OneTwoThreePattern(CandlestickPattern):
                 "strategy": "123_buy"
             })
 
-        if is_sell_123_pattern:
+        if is_sell_123_pattern():
             self.trades.append({
                 "date": datetime.datetime.now(),
-                "entry": candles[2].high,
-                "stop_loss": candles[1].low + ((candles[1].low * 0.1) / 100),
+                "entry": candles[2].low,
+                "stop_loss": candles[1].high - ((candles[1].high * 0.1) / 100),
                 "signal": "SELL",
-                "strategy": "123_buy"
+                "strategy": "123_sell"
             })
 
 
@@ -0,0 +1,182 @@
+"""
+Chart rendering off the hot path: candlestick + indicator charts of signals and backtest trades are
+rendered by a process pool, cached as PNG files keyed by (symbol, interval, bar range) and handed
+to their consumer (Telegram, the PDF report) when ready, so a burst of signals never waits on
+matplotlib.
+"""
+import hashlib
+import json
+import os
+import threading
+import traceback
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+
+import indicator_kernels as kernels
+from backfill import BAR_COLUMNS
+
+DEFAULT_CHART_DIR = "../cache/charts"
+CHART_WORKERS = 2
+CHART_BARS = 120
+TRADE_CHART_PADDING = 30
+
+MARKER_STYLES = {"BUY": ("^", "green"), "SELL": ("v", "red"), "EXIT": ("x", "black")}
+LEVEL_COLORS = {"entry": "blue", "stop_loss": "red", "take_profit": "green"}
+
+
+def render_chart(bars, path, title="", markers=(), levels=None):
+    """
+    Renders a candlestick chart of canonical bars with Bollinger bands, volume and an RSI panel to
+    `path` (PNG). Runs in the chart process pool.
+    :param markers: (ts, price, kind) points, kind in MARKER_STYLES.
+    :param levels: {name: price} horizontal lines (entry, stop_loss, take_profit).
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import mplfinance as mpf
+
+    frame = pd.DataFrame({
+        "Open": bars["open"].to_numpy(), "High": bars["high"].to_numpy(), "Low": bars["low"].to_numpy(),
+        "Close": bars["close"].to_numpy(), "Volume": bars["volume"].to_numpy(),
+    }, index=pd.DatetimeIndex(pd.to_datetime(bars["ts"].to_numpy(), unit="ms"), name="Date"))
+    close = kernels.as_array(frame["Close"])
+    volume = bool(np.isfinite(frame["Volume"]).all())
+
+    addplots = []
+    for band in kernels.bollinger(close, 20, 2):
+        if np.isfinite(band).any():
+            addplots.append(mpf.make_addplot(band, color="gray", width=0.7))
+    rsi = kernels.rsi(close, 14)
+    if np.isfinite(rsi).any():
+        addplots.append(mpf.make_addplot(rsi, panel=2 if volume else 1, color="purple", ylabel="RSI", ylim=(0, 100)))
+
+    ts = bars["ts"].to_numpy()
+    for kind, (marker, color) in MARKER_STYLES.items():
+        points = np.full(len(frame), np.nan)
+        for when, price, point_kind in markers:
+            if point_kind == kind:
+                points[min(np.searchsorted(ts, when), len(ts) - 1)] = price
+        if np.isfinite(points).any():
+            addplots.append(mpf.make_addplot(points, type="scatter", marker=marker, color=color, markersize=80))
+
+    levels = {name: price for name, price in (levels or {}).items() if price is not None and np.isfinite(price)}
+    options = {}
+    if levels:
+        options["hlines"] = dict(hlines=list(levels.values()), colors=[LEVEL_COLORS.get(name, "gray") for name in levels],
+                                 linestyle="--", linewidths=0.8)
+
+    tmp = f"{path}.{os.getpid()}.tmp.png"
+    mpf.plot(frame, type="candle", style="charles", addplot=addplots, volume=volume, title=title,
+             figsize=(10, 6), savefig=dict(fname=tmp, dpi=90), **options)
+    os.replace(tmp, path)
+    return path
+
+
+def chart_key(symbol, interval, bars, markers=(), levels=None):
+    """File name of a chart: symbol, interval and bar range, plus a digest of what is drawn over the bars."""
+    ts = bars["ts"].to_numpy()
+    overlay = hashlib.sha256(json.dumps([list(map(str, m)) for m in markers] + sorted((levels or {}).items()),
+                                        default=str).encode("utf-8")).hexdigest()[:8]
+    safe = symbol.replace(os.sep, "_").replace("#", "_")
+    return f"{safe}-{interval}-{int(ts[0])}-{int(ts[-1])}-{overlay}.png"
+
+
+class ChartService:
+    """
+    Renders charts on a process pool (started on first use) and caches them in `cache_dir`.
+    submit() returns at once with a Future of the PNG path: already done for cached charts, shared
+    by concurrent requests for the same chart. attach() delivers the result on a thread of its
+    own, so slow consumers (HTTP uploads) do not hold up the pool.
+    """
+    def __init__(self, cache_dir=DEFAULT_CHART_DIR, workers=CHART_WORKERS):
+        self.cache_dir = cache_dir
+        self.workers = workers
+        self.hits = 0
+        self.renders = 0
+        self._executor = None
+        self._delivery = ThreadPoolExecutor(max_workers=2, thread_name_prefix="chart-delivery")
+        self._pending = {}
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def submit(self, symbol, interval, bars, title="", markers=(), levels=None):
+        bars = bars[BAR_COLUMNS].reset_index(drop=True)
+        path = os.path.join(self.cache_dir, chart_key(symbol, interval, bars, markers, levels))
+        with self._lock:
+            if path in self._pending:
+                return self._pending[path]
+            if os.path.exists(path):
+                self.hits += 1
+                future = Future()
+                future.set_result(path)
+                return future
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            future = self._executor.submit(render_chart, bars, path, title or f"{symbol} {interval}",
+                                           list(markers), levels)
+            self._pending[path] = future
+            self.renders += 1
+        future.add_done_callback(lambda _: self._done(path))
+        return future
+
+    def _done(self, path):
+        with self._lock:
+            self._pending.pop(path, None)
+
+    def attach(self, future, deliver):
+        """Calls deliver(path) once the chart is rendered (errors are reported, not raised)."""
+        def run(done):
+            try:
+                deliver(done.result())
+            except Exception as e:
+                print(f"⚠️ Falha ao gerar/enviar gráfico: {e}")
+                print(traceback.format_exc())
+        future.add_done_callback(lambda done: self._delivery.submit(run, done))
+
+    def results(self, futures, timeout=None):
+        """Paths of the charts rendered within `timeout` seconds, in the order of `futures`."""
+        done, _ = wait(futures, timeout=timeout)
+        return [f.result() if f in done and f.exception() is None else None for f in futures]
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        self._delivery.shutdown(wait=True)
+
+
+def signal_chart(service, symbol, interval, bars, signal, entry=None, stop_loss=None, take_profit=None,
+                 window=CHART_BARS):
+    """Chart of the last `window` bars of a live signal, with its entry/stop/target levels."""
+    bars = bars.iloc[-window:]
+    last = bars.iloc[-1]
+    kind = signal if signal in MARKER_STYLES else "EXIT"
+    return service.submit(symbol, interval, bars, title=f"{symbol} {interval} {signal}",
+                          markers=[(int(last["ts"]), float(last["close"]), kind)],
+                          levels={"entry": entry, "stop_loss": stop_loss, "take_profit": take_profit})
+
+
+def attach_trade_bars(df, trades, last_n, padding=TRADE_CHART_PADDING):
+    """
+    Adds to the last `last_n` trades the bars their chart needs ("chart_bars", with `padding` bars
+    around the trade, and "chart_start", the global index of its first bar). df rows must be the
+    trades' global bar indexes.
+    """
+    for trade in trades[-last_n:] if last_n else []:
+        start = max(0, trade["entry_index"] - padding)
+        trade["chart_start"] = start
+        trade["chart_bars"] = df[BAR_COLUMNS].iloc[start:trade["exit_index"] + padding + 1].reset_index(drop=True)
+    return trades
+
+
+def trade_chart(service, trade, interval):
+    """Chart of a backtest trade (see attach_trade_bars): its bars with the entry and exit points."""
+    bars = trade["chart_bars"]
+    ts = bars["ts"].to_numpy()
+    entry_ts = ts[trade["entry_index"] - trade["chart_start"]]
+    exit_ts = ts[min(trade["exit_index"] - trade["chart_start"], len(ts) - 1)]
+    return service.submit(trade["symbol"], interval, bars,
+                          title=f"{trade['symbol']} {trade['strategy']} {trade['return_%']:+.2f}%",
+                          markers=[(int(entry_ts), trade["entry_price"], "BUY"),
+                                   (int(exit_ts), trade["exit_price"], "EXIT")])
@@ -0,0 +1,52 @@
+import pandas as pd
+
+from backtest_engine import BacktestState, backtest_frame, SIGNAL_COLUMNS
+
+DEFAULT_CHUNK_SIZE = 100_000
+DEFAULT_WARMUP_BARS = 100
+
+
+def read_bar_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Reads an on-disk bar file in fixed-size chunks, so only one chunk is held in memory.
+    Supports CSV and Parquet files (the latter read row group by row group through pyarrow).
+    """
+    if str(path).endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+def backtest_chunks(chunks, symbol, signal_fn, params, warmup_bars=DEFAULT_WARMUP_BARS, columns=SIGNAL_COLUMNS):
+    """
+    Generator that backtests a symbol chunk by chunk and yields its trades as they close.
+
+    The last `warmup_bars` rows of each chunk are prepended to the next one, so the signals of
+    the new rows are computed with the same lookback as in an in-memory run; the open position
+    travels between chunks in a BacktestState. `signal_fn(df, params)` must be causal and must
+    not look back further than `warmup_bars` for the trades to match an in-memory run exactly.
+    """
+    state = BacktestState()
+    carry = None
+    offset = 0
+
+    for chunk in chunks:
+        frame = chunk.reset_index(drop=True) if carry is None else pd.concat([carry, chunk], ignore_index=True)
+        signals = signal_fn(frame, params)
+        yield from backtest_frame(signals, symbol, state, params, offset=offset, columns=columns)
+
+        carry = frame.iloc[-warmup_bars:] if warmup_bars > 0 else frame.iloc[:0]
+        offset += len(frame) - len(carry)
+
+
+def backtest_file(path, symbol, signal_fn, params):
+    """
+    Backtests one symbol straight from its bar file with constant memory use.
+    """
+    chunks = read_bar_chunks(path, chunk_size=params.get("chunk_size", DEFAULT_CHUNK_SIZE))
+    return list(backtest_chunks(chunks, symbol, signal_fn, params,
+                                warmup_bars=params.get("warmup_bars", DEFAULT_WARMUP_BARS)))
@@ -0,0 +1,156 @@
+import numpy as np
+import pandas as pd
+
+from backtest_engine import signal_codes
+
+DATE_COLUMNS = ("Date", "date", "timestamp", "Datetime")
+PRICE_COLUMNS = ("open", "high", "low", "close", "volume")
+
+EXIT_REASONS = ["signal", "timeout", "stop_loss", "take_profit"]
+
+# One closed trade per fixed-size record; symbol and strategy are ids into TradeLog's category lists
+TRADE_DTYPE = np.dtype([
+    ("symbol", np.int32),
+    ("strategy", np.int16),
+    ("exit_reason", np.int8),
+    ("entry_index", np.int64),
+    ("exit_index", np.int64),
+    ("exit_ts", np.int64),
+    ("entry_price", np.float64),
+    ("exit_price", np.float64),
+    ("bars_held", np.int32),
+    ("return_%", np.float64),
+    ("mae_%", np.float64),
+    ("mfe_%", np.float64),
+    ("bars_to_peak", np.int32),
+    ("bars_under_water", np.int32),
+])
+
+
+def to_epoch_ms(values):
+    """Converts date strings, datetimes or epoch numbers to int64 epoch milliseconds."""
+    values = pd.Series(values)
+    if values.dtype.kind in "iu":
+        return values.to_numpy(dtype=np.int64)
+    dates = pd.to_datetime(values)
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_convert("UTC").dt.tz_localize(None)
+    return dates.to_numpy(dtype="datetime64[ms]").astype(np.int64)
+
+
+def bar_times(df):
+    """Epoch-ms time of every bar, from its date column or datetime index."""
+    date_column = next((col for col in DATE_COLUMNS + ("ts",) if col in df.columns), None)
+    return to_epoch_ms(df[date_column] if date_column else df.index)
+
+
+def compact_ohlc(df, float32=False):
+    """
+    Returns a compact copy of an OHLC frame: an int64 epoch-ms "ts" column instead of string/datetime
+    dates, float32 prices when `float32` is set, and int8 codes in the signal_* columns.
+    Column names are kept as they are ("Close" or "close").
+    """
+    columns = {}
+    date_column = next((col for col in DATE_COLUMNS if col in df.columns), None)
+    if date_column is not None:
+        columns["ts"] = to_epoch_ms(df[date_column])
+    elif isinstance(df.index, pd.DatetimeIndex):
+        columns["ts"] = to_epoch_ms(df.index)
+
+    price_dtype = np.float32 if float32 else np.float64
+    for col in df.columns:
+        if col == date_column:
+            continue
+        values = df[col].to_numpy()
+        if str(col).startswith("signal_"):
+            columns[col] = signal_codes(values)
+        elif str(col).lower() in PRICE_COLUMNS or values.dtype.kind == "f":
+            columns[col] = values.astype(price_dtype)
+        else:
+            columns[col] = values
+    return pd.DataFrame(columns)
+
+
+class TradeLog:
+    """
+    Append-only store of closed trades as a growable structured array (TRADE_DTYPE), with symbol,
+    strategy and exit reason interned once instead of repeated as Python strings in every record.
+    """
+    __slots__ = ("records", "size", "symbols", "strategies", "_symbol_ids", "_strategy_ids")
+
+    def __init__(self, capacity=1024):
+        self.records = np.zeros(capacity, dtype=TRADE_DTYPE)
+        self.size = 0
+        self.symbols = []
+        self.strategies = []
+        self._symbol_ids = {}
+        self._strategy_ids = {}
+
+    def __len__(self):
+        return self.size
+
+    @staticmethod
+    def _intern(value, values, ids):
+        if value not in ids:
+            ids[value] = len(values)
+            values.append(value)
+        return ids[value]
+
+    def extend(self, trades):
+        """Appends trade dicts as produced by backtest_engine.backtest_arrays."""
+        needed = self.size + len(trades)
+        if needed > len(self.records):
+            grown = np.zeros(max(needed, 2 * len(self.records)), dtype=TRADE_DTYPE)
+            grown[:self.size] = self.records[:self.size]
+            self.records = grown
+
+        for offset, trade in enumerate(trades):
+            self.records[self.size + offset] = (
+                self._intern(trade["symbol"], self.symbols, self._symbol_ids),
+                self._intern(trade["strategy"], self.strategies, self._strategy_ids),
+                EXIT_REASONS.index(trade["exit_reason"]),
+                # Exit time is -1 for trades backtested without bar dates
+                trade["entry_index"], trade["exit_index"], trade.get("exit_ts", -1),
+                trade["entry_price"], trade["exit_price"],
+                trade["bars_held"], trade["return_%"],
+                # Excursions are NaN / -1 for trades backtested without High/Low
+                trade.get("mae_%", np.nan), trade.get("mfe_%", np.nan),
+                trade.get("bars_to_peak", -1), trade.get("bars_under_water", -1),
+            )
+        self.size = needed
+
+    def to_frame(self):
+        """Trades as a DataFrame with categorical symbol/strategy/exit_reason columns."""
+        records = self.records[:self.size]
+        df = pd.DataFrame({name: records[name] for name in TRADE_DTYPE.names})
+        for col, categories in (("symbol", self.symbols), ("strategy", self.strategies),
+                                ("exit_reason", EXIT_REASONS)):
+            df[col] = pd.Categorical.from_codes(df[col].astype(np.int32), categories=categories)
+        return df
+
+
+def frame_bytes(df):
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def memory_report(frames, float32=False):
+    """
+    Prints and returns the memory used per symbol-bar by a universe of OHLC frames before and
+    after compact_ohlc.
+    :param frames: dict symbol -> OHLC DataFrame.
+    """
+    bars = sum(len(df) for df in frames.values())
+    if bars == 0:
+        return None
+    before = sum(frame_bytes(df) for df in frames.values())
+    after = sum(frame_bytes(compact_ohlc(df, float32=float32)) for df in frames.values())
+    report = {
+        "symbols": len(frames),
+        "bars": bars,
+        "bytes_per_bar_before": round(before / bars, 1),
+        "bytes_per_bar_after": round(after / bars, 1),
+        "ratio": round(before / after, 2),
+    }
+    print(f"📦 {report['symbols']} ativos, {bars} barras: {report['bytes_per_bar_before']} -> "
+          f"{report['bytes_per_bar_after']} bytes/barra ({report['ratio']}x menor)")
+    return report
@@ -0,0 +1,219 @@
+import numpy as np
+import pandas as pd
+
+DEFAULT_WINDOW = 500
+CORRELATION_THRESHOLD = 0.8
+# Bar size of the engine's timeline: finer bars (Polygon's 1m) are resampled to it
+CORRELATION_BAR_MS = 900_000
+# Signals count as open positions for the backtests' default timeout, in bars of the signal's interval
+OPEN_SIGNAL_MAX_BARS = 7
+
+
+def align_closes(bars):
+    """
+    Aligns the close prices of many symbols on one timeline.
+    :param bars: dict symbol -> DataFrame with ts (epoch ms) and close columns.
+    :return: Wide DataFrame (index ts, one column per symbol), forward-filled.
+    """
+    closes = {symbol: df.set_index("ts")["close"] for symbol, df in bars.items() if not df.empty}
+    return pd.DataFrame(closes).sort_index().ffill()
+
+
+def resample_closes(df, bar_ms=CORRELATION_BAR_MS):
+    """Last close of each `bar_ms` span of canonical bars (ts floored to the span), as a ts/close frame."""
+    ts = df["ts"].to_numpy(dtype=np.int64) // bar_ms * bar_ms
+    last = np.append(ts[1:] != ts[:-1], True) if len(ts) else np.zeros(0, dtype=bool)
+    return pd.DataFrame({"ts": ts[last], "close": df["close"].to_numpy()[last]})
+
+
+def closed_closes(bars, intervals_ms, now_ms, bar_ms=CORRELATION_BAR_MS):
+    """
+    Aligned closes (see align_closes) of the `bar_ms` bars closed by now_ms, from windows of
+    mixed intervals: each symbol's bars still forming at its own interval (intervals_ms, dict
+    symbol -> ms, default bar_ms) are dropped before resampling, and spans not over yet after.
+    """
+    resampled = {}
+    for symbol, df in bars.items():
+        closed = df[df["ts"].to_numpy() + intervals_ms.get(symbol, bar_ms) <= now_ms]
+        resampled[symbol] = resample_closes(closed, bar_ms)
+    closes = align_closes(resampled)
+    return closes[closes.index + bar_ms <= now_ms]
+
+
+class RollingCorrelation:
+    """
+    Rolling covariance / correlation of log returns over the last `window` aligned bars of a
+    universe. Each new bar is a rank-1 update of running sums (sum of returns and the N x N sum
+    of cross products) instead of a full recompute; the sums are rebuilt exactly from the ring
+    buffer every `window` updates so floating-point drift stays bounded.
+    A symbol without a new price in a bar (market closed) contributes a zero return.
+    """
+    def __init__(self, symbols, window=DEFAULT_WINDOW):
+        self.symbols = list(symbols)
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.window = window
+        n = len(self.symbols)
+        self.buffer = np.zeros((window, n))
+        self.sums = np.zeros(n)
+        self.cross = np.zeros((n, n))
+        self.count = 0
+        self.position = 0
+        self.updates = 0
+        self.last_close = np.full(n, np.nan)
+        self.last_ts = None
+
+    @classmethod
+    def from_prices(cls, closes, window=DEFAULT_WINDOW):
+        """Seeds an engine with the last `window` returns of a wide close-price frame (see align_closes)."""
+        engine = cls(closes.columns, window)
+        prices = closes.to_numpy(dtype=np.float64)
+        engine.update_returns_many(_log_returns(prices[:-1], prices[1:])[-window:])
+        engine.last_close = prices[-1].copy()
+        engine.last_ts = int(closes.index[-1]) if len(closes) else None
+        return engine
+
+    def update_prices(self, closes):
+        """
+        Adds one bar from the latest close of each symbol (array aligned with `symbols`, or a dict;
+        NaN / missing symbols keep their previous close).
+        """
+        if isinstance(closes, dict):
+            values = np.full(len(self.symbols), np.nan)
+            for symbol, close in closes.items():
+                if symbol in self.index:
+                    values[self.index[symbol]] = close
+            closes = values
+        closes = np.where(np.isnan(closes), self.last_close, closes)
+        returns = _log_returns(self.last_close, closes)
+        self.last_close = closes
+        self.update_returns(returns)
+
+    def update_closes(self, closes):
+        """
+        Adds the bars of a wide close-price frame (see align_closes) newer than the last bar added,
+        one update_prices per bar. :return: The number of bars added.
+        """
+        new = closes if self.last_ts is None else closes[closes.index > self.last_ts]
+        if new.empty:
+            return 0
+        for row in new.reindex(columns=self.symbols).to_numpy(dtype=np.float64):
+            self.update_prices(row)
+        self.last_ts = int(new.index[-1])
+        return len(new)
+
+    def update_returns(self, returns):
+        """Adds one row of returns, dropping the oldest one once the window is full."""
+        returns = np.nan_to_num(np.asarray(returns, dtype=np.float64))
+        if self.count == self.window:
+            old = self.buffer[self.position]
+            self.sums -= old
+            self.cross -= np.outer(old, old)
+        else:
+            self.count += 1
+        self.sums += returns
+        self.cross += np.outer(returns, returns)
+        self.buffer[self.position] = returns
+        self.position = (self.position + 1) % self.window
+
+        self.updates += 1
+        if self.updates % self.window == 0:
+            self.rebuild()
+
+    def update_returns_many(self, rows):
+        """Adds many rows at once (seeding / catch-up) and rebuilds the sums with one matrix product."""
+        for returns in np.asarray(rows, dtype=np.float64)[-self.window:]:
+            self.buffer[self.position] = np.nan_to_num(returns)
+            self.position = (self.position + 1) % self.window
+            self.count = min(self.count + 1, self.window)
+        self.rebuild()
+
+    def rebuild(self):
+        rows = self.buffer if self.count == self.window else self.buffer[:self.count]
+        self.sums = rows.sum(axis=0)
+        self.cross = rows.T @ rows
+
+    def covariance(self):
+        n = self.count
+        if n < 2:
+            return np.full_like(self.cross, np.nan)
+        return (self.cross - np.outer(self.sums, self.sums) / n) / (n - 1)
+
+    def correlation(self):
+        covariance = self.covariance()
+        std = np.sqrt(np.diag(covariance))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return covariance / np.outer(std, std)
+
+    def correlation_row(self, symbol):
+        """Correlations of one symbol with every other symbol, in O(N) without the full matrix."""
+        i = self.index[symbol]
+        n = self.count
+        if n < 2:
+            return np.full(len(self.symbols), np.nan)
+        covariance = (self.cross[i] - self.sums[i] * self.sums / n) / (n - 1)
+        variance = (np.diag(self.cross) - self.sums ** 2 / n) / (n - 1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return covariance / np.sqrt(variance[i] * variance)
+
+    def correlated_with(self, symbol, others, threshold=CORRELATION_THRESHOLD):
+        """(other, correlation) pairs with |correlation| >= threshold, strongest first."""
+        if symbol not in self.index:
+            return []
+        row = self.correlation_row(symbol)
+        pairs = [(other, float(row[self.index[other]])) for other in others
+                 if other != symbol and other in self.index]
+        pairs = [(other, rho) for other, rho in pairs if abs(rho) >= threshold]
+        return sorted(pairs, key=lambda pair: -abs(pair[1]))
+
+
+def _log_returns(previous, current):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.nan_to_num(np.log(current / previous), nan=0.0, posinf=0.0, neginf=0.0)
+
+
+def _direction(signal):
+    return 1 if signal == "BUY" else -1
+
+
+def track_open_signals(open_signals, signals, now_ms, bar_ms=None, max_bars=OPEN_SIGNAL_MAX_BARS):
+    """
+    Updates open_signals (dict asset -> {"signal": BUY/SELL, "ts", "expires": epoch ms}) in place
+    with a cycle's signals: an opposite signal closes the asset's open one, a signal in the same
+    direction renews it and one on an asset without an open signal opens it. A signal expires
+    `max_bars` bars of its asset's interval (bar_ms, dict asset -> ms, default CORRELATION_BAR_MS)
+    after it was sent, as the position would have timed out.
+    """
+    bar_ms = bar_ms or {}
+    for asset in [asset for asset, entry in open_signals.items() if now_ms >= entry["expires"]]:
+        del open_signals[asset]
+    for signal in signals:
+        asset = signal["ativo"]
+        entry = open_signals.get(asset)
+        if entry is not None and entry["signal"] != signal["signal"]:
+            del open_signals[asset]
+        else:
+            open_signals[asset] = {"signal": signal["signal"], "ts": int(now_ms),
+                                   "expires": int(now_ms + max_bars * bar_ms.get(asset, CORRELATION_BAR_MS))}
+    return open_signals
+
+
+def flag_correlated(signals, open_signals, engine, threshold=CORRELATION_THRESHOLD):
+    """
+    Finds new signals that add exposure to an open one: same direction on a positively correlated
+    asset, or opposite directions on a negatively correlated one. Signals earlier in the list
+    count as open for the later ones, so correlated signals firing together are caught too.
+    :param signals: Signal dicts with "ativo" and "signal" (BUY/SELL).
+    :param open_signals: dict asset -> BUY/SELL of the positions already open.
+    :return: List of (signal, [(open asset, correlation), ...]) for the flagged signals.
+    """
+    flagged = []
+    exposure = dict(open_signals)
+    for signal in signals:
+        asset = signal["ativo"]
+        direction = _direction(signal["signal"])
+        pairs = engine.correlated_with(asset, list(exposure), threshold)
+        pairs = [(other, rho) for other, rho in pairs if rho * direction * _direction(exposure[other]) > 0]
+        if pairs:
+            flagged.append((signal, pairs))
+        exposure[asset] = signal["signal"]
+    return flagged
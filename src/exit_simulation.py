@@ -0,0 +1,88 @@
+import numpy as np
+
+NO_HIT = 0
+STOP_LOSS_HIT = 1
+TAKE_PROFIT_HIT = 2
+
+TIE_BREAKS = ("stop", "target", "open")
+
+# Upper bound of (trades x horizon) cells evaluated at once, to keep memory bounded on big sweeps
+MAX_BLOCK_CELLS = 4_000_000
+
+
+def first_passage(high, low, entries, stop_loss, take_profit, horizon, open_prices=None, tie_break="stop"):
+    """
+    Finds, for every long trade, the first bar after its entry whose Low touches the stop-loss
+    or whose High touches the take-profit, searching all trades at once as a 2-D window matrix.
+
+    :param high: High prices of the symbol.
+    :param low: Low prices of the symbol.
+    :param entries: Entry bar index of each trade; the search covers bars (entry, entry + horizon].
+    :param stop_loss: Stop-loss level of each trade (NaN disables it).
+    :param take_profit: Take-profit level of each trade (NaN disables it).
+    :param horizon: Number of bars after the entry to search.
+    :param open_prices: Optional Open prices; used to fill gaps through a level at the open and
+                        by the "open" tie-break.
+    :param tie_break: Which level wins on a bar that touches both: "stop" (pessimistic),
+                      "target" (optimistic) or "open" (the level closer to the bar's open;
+                      behaves as "stop" without open prices).
+    :return: (hit_bar, hit_price, hit_kind) arrays; hit_bar is -1 and hit_kind NO_HIT when neither
+             level is touched within the horizon or the available bars.
+    """
+    if tie_break not in TIE_BREAKS:
+        raise ValueError(f"tie_break must be one of {TIE_BREAKS}")
+
+    entries = np.asarray(entries, dtype=np.int64)
+    stop_loss = np.asarray(stop_loss, dtype=np.float64)
+    take_profit = np.asarray(take_profit, dtype=np.float64)
+    n_trades = len(entries)
+    n_bars = len(high)
+
+    hit_bar = np.full(n_trades, -1, dtype=np.int64)
+    hit_price = np.full(n_trades, np.nan)
+    hit_kind = np.zeros(n_trades, dtype=np.int8)
+    if n_trades == 0 or horizon <= 0 or n_bars == 0:
+        return hit_bar, hit_price, hit_kind
+
+    steps = np.arange(1, horizon + 1)
+    block = max(1, MAX_BLOCK_CELLS // horizon)
+
+    for start in range(0, n_trades, block):
+        stop = min(start + block, n_trades)
+        bars = entries[start:stop, None] + steps
+        in_range = bars < n_bars
+        bars = np.minimum(bars, n_bars - 1)
+
+        sl = stop_loss[start:stop, None]
+        tp = take_profit[start:stop, None]
+        stop_hits = in_range & (low[bars] <= sl)
+        take_hits = in_range & (high[bars] >= tp)
+
+        first_stop = np.where(stop_hits.any(axis=1), stop_hits.argmax(axis=1), horizon)
+        first_take = np.where(take_hits.any(axis=1), take_hits.argmax(axis=1), horizon)
+        first = np.minimum(first_stop, first_take)
+        found = first < horizon
+
+        rows = np.flatnonzero(found)
+        bar = entries[start:stop][rows] + 1 + first[rows]
+        is_stop = first_stop[rows] < first_take[rows]
+        tie = first_stop[rows] == first_take[rows]
+        if tie_break == "stop" or (tie_break == "open" and open_prices is None):
+            is_stop |= tie
+        elif tie_break == "open":
+            bar_open = open_prices[bar]
+            is_stop |= tie & (np.abs(bar_open - stop_loss[start:stop][rows]) <=
+                              np.abs(take_profit[start:stop][rows] - bar_open))
+
+        sl_level = stop_loss[start:stop][rows]
+        tp_level = take_profit[start:stop][rows]
+        if open_prices is not None:
+            # A gap through the level fills at the open, not at the level
+            sl_level = np.minimum(sl_level, open_prices[bar])
+            tp_level = np.maximum(tp_level, open_prices[bar])
+
+        hit_bar[start + rows] = bar
+        hit_price[start + rows] = np.where(is_stop, sl_level, tp_level)
+        hit_kind[start + rows] = np.where(is_stop, STOP_LOSS_HIT, TAKE_PROFIT_HIT)
+
+    return hit_bar, hit_price, hit_kind
@@ -0,0 +1,114 @@
+import hashlib
+import json
+import os
+import time
+
+import pandas as pd
+
+from backfill import INTERVAL_MS
+from backtest_cache import params_key, code_version
+from backtest_engine import BacktestState, backtest_frame, SIGNAL_COLUMNS
+from compact_frames import bar_times
+
+DEFAULT_STATE_DIR = "../cache/incremental"
+DEFAULT_WARMUP_BARS = 100
+DEFAULT_INTERVAL_MS = INTERVAL_MS["15m"]
+
+
+class IncrementalStore:
+    """
+    Per symbol and configuration (strategy code version + params), the end state of its last
+    backtest run: BacktestState, last processed bar time, number of bars seen and the warm-up
+    tail of bars, plus an append-only log of every trade closed so far.
+    """
+    def __init__(self, state_dir=DEFAULT_STATE_DIR):
+        self.state_dir = state_dir
+        os.makedirs(state_dir, exist_ok=True)
+
+    def _base(self, symbol, params):
+        config = hashlib.sha256(f"{code_version()}|{params_key(params)}".encode("utf-8")).hexdigest()[:12]
+        return os.path.join(self.state_dir, f"{symbol.replace(os.sep, '_')}-{config}")
+
+    def load(self, symbol, params):
+        try:
+            with open(self._base(symbol, params) + ".json", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save(self, symbol, params, entry, new_trades, reset=False):
+        base = self._base(symbol, params)
+        with open(base + ".trades.jsonl", "w" if reset else "a", encoding="utf-8") as f:
+            for trade in new_trades:
+                f.write(json.dumps(trade) + "\n")
+        tmp = base + ".json.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp, base + ".json")
+
+    def trades(self, symbol, params):
+        """Every trade closed for the symbol and configuration, oldest first."""
+        try:
+            with open(self._base(symbol, params) + ".trades.jsonl", encoding="utf-8") as f:
+                return [json.loads(line) for line in f if line.strip()]
+        except FileNotFoundError:
+            return []
+
+
+def incremental_backtest(df, symbol, signal_fn, params, store, warmup_bars=DEFAULT_WARMUP_BARS,
+                         columns=SIGNAL_COLUMNS, interval_ms=DEFAULT_INTERVAL_MS, now=None):
+    """
+    Backtests only the bars of df newer than the symbol's last run, resuming from its saved
+    state, so the trades match a full run over the whole history seen so far. The saved warm-up
+    tail (`warmup_bars` bars) is prepended to the new bars so indicators and signals see the same
+    lookback as in a full run; `signal_fn` must not look back further than that.
+    Only closed bars (open time + interval_ms <= now, epoch ms) are processed and saved; the
+    forming bar is left to the run after it closes.
+    A first run, or one whose data no longer matches the saved tail (revised bars), starts over.
+    :return: The trades closed by the new bars.
+    """
+    times = bar_times(df)
+    now = time.time() * 1000 if now is None else now
+    closed = times + interval_ms <= now
+    if not closed.all():
+        df, times = df[closed], times[closed]
+    if df.empty:
+        return []
+
+    entry = store.load(symbol, params)
+    reset = entry is None
+    if not reset:
+        tail = pd.DataFrame(entry["tail"])
+        last_ts = entry["last_ts"]
+        known = times == last_ts
+        if known.any() and not df.loc[known, tail.columns].iloc[-1].equals(tail.iloc[-1]):
+            print(f"⚠️ {symbol}: último candle processado mudou, refazendo o backtest do zero")
+            reset = True
+        elif not known.any() and times[0] > last_ts:
+            print(f"⚠️ {symbol}: lacuna desde o último backtest, refazendo do zero")
+            reset = True
+
+    if reset:
+        state, frame, offset, bars_seen = BacktestState(), df.reset_index(drop=True), 0, 0
+        new_rows = len(df)
+    else:
+        state = BacktestState.from_dict(entry["state"])
+        new = df[times > last_ts]
+        if new.empty:
+            return []
+        frame = pd.concat([tail, new.reset_index(drop=True)[tail.columns]], ignore_index=True)
+        bars_seen = entry["bars_seen"]
+        offset = bars_seen - len(tail)
+        new_rows = len(new)
+
+    signals = signal_fn(frame.copy(), params)
+    trades = backtest_frame(signals, symbol, state, params, offset=offset, columns=columns)
+
+    frame_tail = frame.iloc[-warmup_bars:] if warmup_bars > 0 else frame.iloc[:0]
+    store.save(symbol, params, {
+        "state": state.to_dict(),
+        "last_ts": int(times.max()),
+        "bars_seen": bars_seen + new_rows,
+        "tail": frame_tail.to_dict(orient="list"),
+    }, trades, reset=reset)
+    return trades
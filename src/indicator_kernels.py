@@ -0,0 +1,209 @@
+"""
+NumPy indicator kernels behind the DataFrame functions of indicators.py.
+
+Each kernel takes float64 arrays and writes its result into `out` when given (allocating it
+otherwise), so a caller holding its own buffers computes indicators without allocating. The
+intermediate arrays come from a per-thread scratch pool that is reused from call to call.
+Bars inside an indicator's warm-up (see WARMUP / warmup_mask) are NaN, never zero.
+"""
+import threading
+from functools import lru_cache
+
+import numpy as np
+
+# Bars without a value at the start of each kernel's output, by parameters
+WARMUP = {
+    "sma": lambda period: period - 1,
+    "rolling_std": lambda period: period - 1,
+    "bollinger": lambda period: period - 1,
+    "rsi": lambda length: length - 1,
+    "stochastic_k": lambda k_period: k_period - 1,
+    "stochastic_d": lambda k_period, d_period: k_period + d_period - 2,
+    "ema": lambda span: 0,
+    "macd": lambda: 0,
+}
+
+# q^-block stays below e^EMA_EXP_LIMIT in the blocked EMA recursion
+EMA_EXP_LIMIT = 200.0
+EMA_MAX_BLOCK = 4096
+
+_scratch = threading.local()
+
+
+def scratch(name, n):
+    """A float64 work array of length n owned by the current thread, reused by later calls."""
+    pool = getattr(_scratch, "pool", None)
+    if pool is None:
+        pool = _scratch.pool = {}
+    buffer = pool.get(name)
+    if buffer is None or len(buffer) < n:
+        buffer = pool[name] = np.empty(max(n, 2 * len(buffer) if buffer is not None else n))
+    return buffer[:n]
+
+
+def _output(out, n):
+    if out is None:
+        return np.empty(n)
+    if len(out) != n:
+        raise ValueError(f"out has {len(out)} rows, expected {n}")
+    return out
+
+
+def as_array(values):
+    """float64 view of a column (no copy when it already is float64)."""
+    return np.asarray(values, dtype=np.float64)
+
+
+def warmup_mask(n, bars, out=None):
+    """Boolean mask of the first `bars` (warm-up) rows of an n-row output."""
+    out = np.empty(n, dtype=bool) if out is None else out
+    out[:bars] = True
+    out[bars:] = False
+    return out
+
+
+def _rolling_reduce(ufunc, x, period, out):
+    """out[i] = ufunc over x[i - period + 1:i + 1], one contiguous pass per lag; NaN in the warm-up."""
+    n = len(x)
+    out = _output(out, n)
+    out[:period - 1] = np.nan
+    if n >= period:
+        valid = out[period - 1:]
+        np.copyto(valid, x[period - 1:])
+        for lag in range(1, period):
+            ufunc(valid, x[period - 1 - lag:n - lag], out=valid)
+    return out
+
+
+def rolling_sum(x, period, out=None):
+    return _rolling_reduce(np.add, x, period, out)
+
+
+def sma(x, period, out=None):
+    out = rolling_sum(x, period, out)
+    out /= period
+    return out
+
+
+def rolling_min(x, period, out=None):
+    return _rolling_reduce(np.minimum, x, period, out)
+
+
+def rolling_max(x, period, out=None):
+    return _rolling_reduce(np.maximum, x, period, out)
+
+
+def rolling_std(x, period, out=None):
+    """Sample (ddof=1) standard deviation over `period` bars."""
+    n = len(x)
+    squares = np.multiply(x, x, out=scratch("std_squares", n))
+    out = rolling_sum(squares, period, out)
+    sums = rolling_sum(x, period, scratch("std_sums", n))
+    sums *= sums
+    sums /= period
+    out -= sums
+    np.maximum(out, 0, out=out)  # rounding can leave flat windows slightly negative
+    out /= period - 1
+    np.sqrt(out, out=out)
+    return out
+
+
+def bollinger(x, period=20, multiplier=2, upper=None, middle=None, lower=None):
+    """Bollinger bands of x; returns (upper, middle, lower)."""
+    n = len(x)
+    middle = sma(x, period, middle)
+    width = rolling_std(x, period, scratch("bollinger_width", n))
+    width *= multiplier
+    upper = np.add(middle, width, out=_output(upper, n))
+    lower = np.subtract(middle, width, out=_output(lower, n))
+    return upper, middle, lower
+
+
+def rsi(close, length=14, out=None):
+    """RSI over simple `length`-bar averages of gains and losses."""
+    n = len(close)
+    out = _output(out, n)
+    if n == 0:
+        return out
+    gain = scratch("rsi_gain", n)
+    loss = scratch("rsi_loss", n)
+    gain[0] = 0
+    np.subtract(close[1:], close[:-1], out=gain[1:])
+    np.negative(gain, out=loss)
+    np.fmax(gain, 0, out=gain)
+    np.fmax(loss, 0, out=loss)
+    average_gain = sma(gain, length, scratch("rsi_average_gain", n))
+    average_loss = sma(loss, length, scratch("rsi_average_loss", n))
+    # 100 - 100 / (1 + gain / loss) == 100 * gain / (gain + loss)
+    np.add(average_gain, average_loss, out=average_loss)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        np.divide(average_gain, average_loss, out=out)
+    out *= 100
+    return out
+
+
+def stochastic(high, low, close, k_period=14, d_period=3, k_out=None, d_out=None):
+    """Stochastic oscillator; returns (%K, %D)."""
+    n = len(close)
+    lowest = rolling_min(low, k_period, scratch("stochastic_lowest", n))
+    highest = rolling_max(high, k_period, scratch("stochastic_highest", n))
+    k_out = np.subtract(close, lowest, out=_output(k_out, n))
+    highest -= lowest
+    with np.errstate(divide="ignore", invalid="ignore"):
+        k_out /= highest
+    k_out *= 100
+    d_out = sma(k_out, d_period, d_out)
+    return k_out, d_out
+
+
+@lru_cache(maxsize=64)
+def _ema_decay(span):
+    """(q^j, q^-j) for j < block, q = 1 - alpha; read-only, shared by all threads."""
+    q = 1 - 2 / (span + 1)
+    block = max(1, min(EMA_MAX_BLOCK, int(EMA_EXP_LIMIT / -np.log(q))))
+    powers = q ** np.arange(block, dtype=np.float64)
+    inverse = 1 / powers
+    powers.flags.writeable = False
+    inverse.flags.writeable = False
+    return powers, inverse
+
+
+def ema(x, span, out=None):
+    """
+    Exponential moving average with alpha = 2 / (span + 1), seeded with x[0] (pandas
+    ewm(adjust=False)). The recursion runs in closed form over blocks of bars short enough that
+    q^-block does not overflow; x must not contain NaN.
+    """
+    n = len(x)
+    out = _output(out, n)
+    if n == 0:
+        return out
+    if span <= 1:
+        np.copyto(out, x)
+        return out
+    alpha = 2 / (span + 1)
+    q = 1 - alpha
+    powers, inverse = _ema_decay(span)
+    block = len(powers)
+    previous = x[0]
+    for start in range(0, n, block):
+        m = min(block, n - start)
+        segment = out[start:start + m]
+        # y[j] = q^j * (alpha * sum_{s<=j} q^-s * x[s] + q * y[-1])
+        np.multiply(x[start:start + m], inverse[:m], out=segment)
+        np.cumsum(segment, out=segment)
+        segment *= alpha
+        segment += q * previous
+        segment *= powers[:m]
+        previous = segment[-1]
+    return out
+
+
+def macd(close, fast_period=12, slow_period=26, signal_period=9, macd_out=None, signal_out=None, hist_out=None):
+    """MACD line, signal line and histogram."""
+    n = len(close)
+    macd_out = ema(close, fast_period, _output(macd_out, n))
+    macd_out -= ema(close, slow_period, scratch("macd_slow", n))
+    signal_out = ema(macd_out, signal_period, signal_out)
+    hist_out = np.subtract(macd_out, signal_out, out=_output(hist_out, n))
+    return macd_out, signal_out, hist_out
@@ -1,8 +1,9 @@
 import traceback
 
-import numpy as np
 import pandas as pd
 
+import indicator_kernels as kernels
+
 CLOSE_COLUMN = "close"
 HIGH_COLUMN = "high"
 LOW_COLUMN = "low"
@@ -46,15 +47,10 @@ def calculate_bollinger_bands(df, price_column='Close', period=20, multiplier=2)
     :param price_column: Name of the column with closing prices.
     :param period: Number of periods for moving average and standard deviation.
     :param multiplier: Standard deviation multiplier for the bands.
-    :return: DataFrame with 'Upper Band', 'Middle Band', and 'Lower Band' columns.
+    :return: DataFrame with 'Upper Band', 'Middle Band', and 'Lower Band' columns (NaN for the first period - 1 rows).
     """
-    df = df.copy()
-    df['Middle Band'] = df[price_column].rolling(window=period).mean()
-    df['Standard Deviation'] = df[price_column].rolling(window=period).std()
-    df['Upper Band'] = df['Middle Band'] + (multiplier * df['Standard Deviation'])
-    df['Lower Band'] = df['Middle Band'] - (multiplier * df['Standard Deviation'])
-    df.fillna(0, inplace=True)  # Fill NaN values with 0
-    return df[['Upper Band', 'Middle Band', 'Lower Band']]
+    upper, middle, lower = kernels.bollinger(kernels.as_array(df[price_column]), period, multiplier)
+    return pd.DataFrame({'Upper Band': upper, 'Middle Band': middle, 'Lower Band': lower}, index=df.index, copy=False)
 
 
 def calculate_stochastic(df, k_period=14, d_period=3):
@@ -62,19 +58,10 @@ def calculate_stochastic(df, k_period=14, d_period=3):
         if df is None:
             return None
 
-        high = df[CLOSE_COLUMN]
-        low = df[LOW_COLUMN]
-        close = df[HIGH_COLUMN]
-
-        lowest_low = low.rolling(window=k_period).min()
-        highest_high = high.rolling(window=k_period).max()
-
-        percent_k = 100 * ((close - lowest_low) / (highest_high - lowest_low))
-        percent_d = percent_k.rolling(window=d_period).mean()
-
+        percent_k, percent_d = kernels.stochastic(kernels.as_array(df[HIGH_COLUMN]), kernels.as_array(df[LOW_COLUMN]),
+                                                  kernels.as_array(df[CLOSE_COLUMN]), k_period, d_period)
         df["stoch_k"] = percent_k
         df["stoch_d"] = percent_d
-        df.fillna(0, inplace=True)  # Fill NaN values with 0
         return df
 
     except Exception as e:
@@ -88,21 +75,7 @@ def calculate_rsi(df, length=14):
         if df is None:
             return None
 
-        prices = df[CLOSE_COLUMN]
-        delta = prices.diff()
-
-        gain = np.where(delta > 0, delta, 0)
-        loss = np.where(delta < 0, -delta, 0)
-
-        avg_gain = pd.Series(gain).rolling(window=length).mean()
-        avg_loss = pd.Series(loss).rolling(window=length).mean()
-
-        rs = avg_gain / avg_loss
-        rsi = 100 - (100 / (1 + rs))
-
-        df["rsi"] = pd.Series(rsi, index=prices.index)
-        df.fillna(0, inplace=True)  # Fill NaN values with 0
-
+        df["rsi"] = kernels.rsi(kernels.as_array(df[CLOSE_COLUMN]), length)
         return df
     except Exception as e:
         print(f"Error calculating RSI: {e}")
@@ -112,7 +85,7 @@ def calculate_rsi(df, length=14):
 
 def calculate_ema(series, span):
     try:
-        return series.ewm(span=span, adjust=False).mean()
+        return pd.Series(kernels.ema(kernels.as_array(series), span), index=series.index, name=series.name)
     except Exception as e:
         print(f"Error calculating EMA: {e}")
         print(traceback.format_exc())
@@ -124,13 +97,8 @@ def calculate_macd(df, fast_period=12, slow_period=26, signal_period=9):
         if df is None:
             return None
 
-        prices = df[CLOSE_COLUMN]
-        ema_fast = calculate_ema(prices, span=fast_period)
-        ema_slow = calculate_ema(prices, span=slow_period)
-        macd_line = ema_fast - ema_slow
-        signal_line = calculate_ema(macd_line, span=signal_period)
-        histogram = macd_line - signal_line
-
+        macd_line, signal_line, histogram = kernels.macd(kernels.as_array(df[CLOSE_COLUMN]), fast_period, slow_period,
+                                                         signal_period)
         df["macd"] = macd_line
         df["macd_signal"] = signal_line
         df["macd_hist"] = histogram
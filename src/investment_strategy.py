@@ -1,21 +1,24 @@
 import pandas as pd
 
-from candlestickpattern.one_two_three_pattern import OneTwoThreePattern
+import strategy_catalog  # registers the built-in strategies
 from strategy_profile_enum import StrategyProfileEnum
+from strategy_registry import strategies_for_profile, run_strategies
 
 
 class InvestmentStrategy:
     def __init__(self, profile:StrategyProfileEnum, dataframe:pd.DataFrame, trades:list):
-        if profile == StrategyProfileEnum.POSITION:
-            self.pattern_detector = OneTwoThreePattern(dataframe, trades)
+        self.dataframe = dataframe
+        self.trades = trades
+        self.strategies = strategies_for_profile(profile)
 
     def apply(self):
-
-        self.pattern_detector.validate()
+        self.trades.extend(run_strategies(self.dataframe, self.strategies))
+        return self.trades
 
 
 def detect_bollinger_cci_strategy(df, trades):
     active_setup = None
+    cci_sma = df["cci_sma"] if "cci_sma" in df.columns else df["cci_fast"].rolling(5).mean()
 
     for i in range(2, len(df) - 1): # monitors candles day by day
         today = df.iloc[i]
@@ -37,8 +40,8 @@ def detect_bollinger_cci_strategy(df, trades):
                 # Calculate CCI and its SMA(5)
                 cci_now = today["cci_fast"]
                 cci_yesterday = yesterday["cci_fast"]
-                cci_sma_now = df["cci_fast"].rolling(5).mean().iloc[i]
-                cci_sma_yesterday = df["cci_fast"].rolling(5).mean().iloc[i-1]
+                cci_sma_now = cci_sma.iloc[i]
+                cci_sma_yesterday = cci_sma.iloc[i-1]
 
                 if active_setup["type"] == "BUY":
                     if cci_yesterday < cci_sma_yesterday and cci_now > cci_sma_now:
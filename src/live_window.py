@@ -0,0 +1,174 @@
+"""
+Live candle windows of the monitored universe in one preallocated block.
+
+Each symbol owns a fixed row of `capacity + slack` bars per canonical column (backfill.BAR_COLUMNS),
+optionally memory-mapped to a file. New bars are written in place after the symbol's last bar;
+when a row runs out of slack, its last `capacity` bars are moved back to the start, once every
+`slack` bars. The bars of a symbol are therefore always contiguous and in order, so frame()
+returns zero-copy views instead of building a new DataFrame every cycle, and the memory of the
+store stays constant once the universe is loaded.
+"""
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from backfill import BAR_COLUMNS
+
+DEFAULT_CAPACITY = 1000
+DEFAULT_ROWS = 64
+
+
+class LiveWindowStore:
+    """
+    The last `capacity` bars of each symbol. Views returned by frame() stay valid until the
+    symbol's next write and must not be modified (copy them, or add columns to a shallow copy).
+    """
+    def __init__(self, capacity=DEFAULT_CAPACITY, slack=None, rows=DEFAULT_ROWS, path=None):
+        self.capacity = capacity
+        self.slack = slack or max(1, capacity // 4)
+        self.width = capacity + self.slack
+        self.path = path
+        self.rows = {}
+        self.start = np.zeros(0, dtype=np.int64)
+        self.end = np.zeros(0, dtype=np.int64)
+        self.block = None
+        self.compactions = 0
+        self._lock = threading.Lock()
+        self._grow(rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, symbol):
+        return symbol in self.rows
+
+    def _allocate(self, n_rows):
+        shape = (n_rows, len(BAR_COLUMNS), self.width)
+        if self.path is None:
+            return np.zeros(shape)
+        # Rows are laid out one after the other, so growing the file keeps the existing rows in place
+        mode = "r+" if self.block is not None else "w+"
+        if mode == "r+":
+            self.block.flush()
+            os.truncate(self.path, int(np.prod(shape)) * 8)
+        return np.memmap(self.path, dtype=np.float64, mode=mode, shape=shape)
+
+    def _grow(self, n_rows):
+        block = self._allocate(n_rows)
+        if self.block is not None and self.path is None:
+            block[:len(self.block)] = self.block
+        self.block = block
+        self.start = np.concatenate([self.start, np.zeros(n_rows - len(self.start), dtype=np.int64)])
+        self.end = np.concatenate([self.end, np.zeros(n_rows - len(self.end), dtype=np.int64)])
+
+    def _row(self, symbol):
+        row = self.rows.get(symbol)
+        if row is None:
+            row = self.rows[symbol] = len(self.rows)
+            if row >= len(self.block):
+                self._grow(2 * len(self.block))
+        return row
+
+    def reserve(self, symbols):
+        """Allocates the rows of `symbols` at once (a single grow for a new universe)."""
+        with self._lock:
+            missing = [symbol for symbol in dict.fromkeys(symbols) if symbol not in self.rows]
+            needed = len(self.rows) + len(missing)
+            if needed > len(self.block):
+                self._grow(max(needed, 2 * len(self.block)))
+            for symbol in missing:
+                self._row(symbol)
+
+    def size(self, symbol):
+        row = self.rows.get(symbol)
+        return 0 if row is None else int(self.end[row] - self.start[row])
+
+    def last_ts(self, symbol):
+        """Open time (epoch ms) of the symbol's last bar, or None."""
+        with self._lock:
+            row = self.rows.get(symbol)
+            if row is None or self.end[row] == self.start[row]:
+                return None
+            return int(self.block[row, 0, self.end[row] - 1:self.end[row]].view(np.int64)[0])
+
+    def write(self, symbol, bars):
+        """
+        Writes canonical bars (oldest first) of a symbol: bars older than its last bar are ignored,
+        a bar with the same open time replaces it (the forming bar) and newer bars are appended.
+        :return: The number of bars appended.
+        """
+        ts = bars["ts"].to_numpy()
+        with self._lock:
+            row = self._row(symbol)
+            start, end = int(self.start[row]), int(self.end[row])
+            first, replaced = 0, 0
+            if end > start:
+                last = self.block[row, 0, end - 1:end].view(np.int64)[0]
+                first = int(np.searchsorted(ts, last))
+                if first < len(ts) and ts[first] == last:
+                    end, replaced = end - 1, 1  # rewrite the last bar
+            k = len(ts) - first
+            if k <= 0:
+                return 0
+            if k > self.capacity:
+                first, k, replaced = len(ts) - self.capacity, self.capacity, 0
+            if end + k > self.width:
+                keep = min(end - start, self.capacity - k)
+                self.block[row, :, :keep] = self.block[row, :, end - keep:end]
+                start, end = 0, keep
+                self.compactions += 1
+            values = self.block[row]
+            values[0, end:end + k].view(np.int64)[:] = ts[first:]
+            for col, name in enumerate(BAR_COLUMNS[1:], start=1):
+                values[col, end:end + k] = bars[name].to_numpy()[first:]
+            end += k
+            self.start[row] = max(start, end - self.capacity)
+            self.end[row] = end
+        return k - replaced
+
+    def frame(self, symbol, n=None):
+        """The last n bars of a symbol (all by default) as a canonical DataFrame of views."""
+        with self._lock:
+            row = self.rows.get(symbol)
+            if row is None:
+                return pd.DataFrame({col: np.empty(0, dtype=np.int64 if col == "ts" else np.float64)
+                                     for col in BAR_COLUMNS})
+            end = int(self.end[row])
+            start = int(self.start[row]) if n is None else max(int(self.start[row]), end - n)
+            values = np.asarray(self.block[row, :, start:end])
+        return pd.DataFrame({"ts": values[0].view(np.int64),
+                             **{col: values[i] for i, col in enumerate(BAR_COLUMNS[1:], start=1)}}, copy=False)
+
+    def flush(self):
+        if self.path is not None:
+            self.block.flush()
+
+    def snapshot(self, path):
+        """
+        Writes the windows to `path` as one .npy array (symbols x columns x bars, each symbol's bars
+        from the start of its row) and returns (symbols, sizes), the index restore() needs.
+        """
+        with self._lock:
+            symbols = list(self.rows)
+            sizes = [int(self.end[self.rows[s]] - self.start[self.rows[s]]) for s in symbols]
+            out = np.lib.format.open_memmap(path, mode="w+", dtype=np.float64,
+                                            shape=(len(symbols), len(BAR_COLUMNS), max(sizes, default=0)))
+            for i, (symbol, size) in enumerate(zip(symbols, sizes)):
+                row = self.rows[symbol]
+                out[i, :, :size] = self.block[row, :, self.end[row] - size:self.end[row]]
+            out.flush()
+            del out
+        return symbols, sizes
+
+    def restore(self, path, symbols, sizes):
+        """Loads the windows of a snapshot() (memory-mapped, each row copied once into the store)."""
+        saved = np.load(path, mmap_mode="r")
+        self.reserve(symbols)
+        with self._lock:
+            for i, (symbol, size) in enumerate(zip(symbols, sizes)):
+                size = min(size, self.capacity)
+                row = self.rows[symbol]
+                self.block[row, :, :size] = saved[i, :, sizes[i] - size:sizes[i]]
+                self.start[row], self.end[row] = 0, size
@@ -0,0 +1,219 @@
+"""
+Market data sources behind one interface and one bar schema.
+
+Every source returns bars in the canonical columnar schema of backfill.BAR_COLUMNS: int64 epoch-ms
+"ts" (bar open time, UTC) and float64 open/high/low/close/volume columns, oldest first, on a
+RangeIndex. Venue shapes are converted once, at the edge, by normalize_bars; everything
+downstream (indicators, strategies, backtests) reads the canonical columns as they are.
+"""
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import requests
+
+from b3_data import B3_PERIOD, download_batch, load_yfinance
+from backfill import BAR_COLUMNS, BINANCE_PAGE_BARS, INTERVAL_MS, RateLimiter, fetch_binance_page, \
+    fetch_polygon_page, page_windows, polygon_page_bars
+from compact_frames import DATE_COLUMNS, to_epoch_ms
+
+DEFAULT_LIMIT = 500
+SOURCE_WORKERS = 8
+
+
+def empty_bars():
+    return pd.DataFrame({col: np.empty(0, dtype=np.int64 if col == "ts" else np.float64) for col in BAR_COLUMNS})
+
+
+def is_canonical(df):
+    return list(df.columns) == BAR_COLUMNS and df["ts"].dtype == np.int64 and \
+        all(df[col].dtype == np.float64 for col in BAR_COLUMNS[1:])
+
+
+def normalize_bars(df):
+    """
+    Canonical bars of a frame in any shape the fetchers produce: "Date"/"Open"... (Binance),
+    lowercase columns on a "timestamp" index (Polygon), "Close"... on a DatetimeIndex (yfinance),
+    with or without MultiIndex columns. Canonical frames are returned as they are; a missing
+    volume column is NaN.
+    """
+    if df is None or df.empty:
+        return empty_bars()
+    if is_canonical(df):
+        return df
+    if isinstance(df.columns, pd.MultiIndex):
+        df = df.set_axis(df.columns.get_level_values(0), axis=1)
+    columns = {str(col).lower(): col for col in df.columns}
+
+    date_column = next((columns[col.lower()] for col in ("ts",) + DATE_COLUMNS if col.lower() in columns), None)
+    if date_column is not None:
+        ts = to_epoch_ms(df[date_column])
+    elif isinstance(df.index, pd.DatetimeIndex):
+        ts = to_epoch_ms(df.index)
+    else:
+        raise ValueError(f"Frame sem coluna de data: {list(df.columns)}")
+
+    bars = pd.DataFrame({"ts": ts, **{
+        col: df[columns[col]].to_numpy(dtype=np.float64) if col in columns else np.full(len(df), np.nan)
+        for col in BAR_COLUMNS[1:]
+    }})
+    if not bars["ts"].is_monotonic_increasing or bars["ts"].duplicated().any():
+        bars = bars.drop_duplicates("ts", keep="last").sort_values("ts", ignore_index=True)
+    return bars
+
+
+def to_ms(since):
+    """Epoch ms of `since` (epoch ms, datetime or ISO string; naive times are UTC), or None."""
+    if since is None or isinstance(since, (int, np.integer)):
+        return since
+    return int(to_epoch_ms([since])[0])
+
+
+def clip_bars(bars, since=None, limit=None):
+    """Bars at or after `since` (epoch ms), the last `limit` of them."""
+    if since is not None:
+        bars = bars[bars["ts"].to_numpy() >= since]
+    if limit is not None:
+        bars = bars.iloc[-limit:]
+    return bars.reset_index(drop=True)
+
+
+class MarketDataSource:
+    """
+    A source of canonical bars. Backends implement fetch(); fetch_many() runs it for a batch of
+    symbols on `workers` threads, unless the backend downloads batches natively.
+    """
+    workers = SOURCE_WORKERS
+
+    def fetch(self, symbol, interval, since=None, limit=None):
+        """Bars of one symbol (since: epoch ms, datetime or ISO string; limit: last n bars)."""
+        raise NotImplementedError
+
+    def fetch_many(self, symbols, interval, since=None, limit=None):
+        """dict symbol -> bars for every symbol with data; failures are reported and skipped."""
+        def fetch(symbol):
+            try:
+                return symbol, self.fetch(symbol, interval, since, limit)
+            except Exception as e:
+                print(f"⚠️ Erro ao buscar {symbol} ({type(self).__name__}): {e}")
+                print(traceback.format_exc())
+                return symbol, None
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return {symbol: bars for symbol, bars in executor.map(fetch, symbols)
+                    if bars is not None and not bars.empty}
+
+
+class _PagedSource(MarketDataSource):
+    """REST backends fetched by page windows (see backfill.page_windows) under a shared rate limit."""
+    page_bars = BINANCE_PAGE_BARS
+
+    def __init__(self, session=None, rate=8.0, workers=SOURCE_WORKERS):
+        self.session = session or requests.Session()
+        self.limiter = RateLimiter(rate)
+        self.workers = workers
+
+    def _page(self, symbol, interval, start_ms, end_ms):
+        raise NotImplementedError
+
+    def _page_bars(self, interval):
+        return self.page_bars
+
+    def fetch(self, symbol, interval, since=None, limit=None):
+        until_ms = int(time.time() * 1000)
+        since_ms = to_ms(since)
+        if since_ms is None:
+            since_ms = until_ms - INTERVAL_MS[interval] * (limit or DEFAULT_LIMIT)
+        windows = page_windows(since_ms, until_ms, interval, self._page_bars(interval))[::-1]
+        pages = [self._page(symbol, interval, start, end) for start, end, _ in windows]
+        pages = [page for page in pages if not page.empty]
+        if not pages:
+            return empty_bars()
+        return clip_bars(normalize_bars(pd.concat(pages, ignore_index=True)), since_ms, limit)
+
+
+class BinanceSource(_PagedSource):
+    page_bars = BINANCE_PAGE_BARS
+
+    def _page(self, symbol, interval, start_ms, end_ms):
+        return fetch_binance_page(self.session, symbol, interval, start_ms, end_ms, self.limiter)
+
+
+class PolygonSource(_PagedSource):
+
+    def __init__(self, api_key=None, session=None, rate=5.0, workers=SOURCE_WORKERS):
+        super().__init__(session, rate, workers)
+        self.api_key = api_key
+
+    def _page_bars(self, interval):
+        return polygon_page_bars(interval)
+
+    def _page(self, symbol, interval, start_ms, end_ms):
+        if self.api_key is None:
+            from strategy_utils import get_config
+
+            self.api_key = get_config()["polygon"]["api_key"]
+        return fetch_polygon_page(self.session, symbol, interval, start_ms, end_ms, self.limiter, self.api_key)
+
+
+class YFinanceSource(MarketDataSource):
+    """
+    yfinance bars, downloaded natively in multi-ticker batches (see b3_data.load_yfinance).
+    `suffix` is appended to the symbols asked for (".SA" for B3); results keep the caller's names.
+    """
+    def __init__(self, period=B3_PERIOD, suffix="", download=download_batch):
+        self.period = period
+        self.suffix = suffix
+        self.download = download
+
+    def _ticker(self, symbol):
+        return symbol if symbol.endswith(self.suffix) else symbol + self.suffix
+
+    def fetch(self, symbol, interval, since=None, limit=None):
+        return self.fetch_many([symbol], interval, since, limit).get(symbol, empty_bars())
+
+    def fetch_many(self, symbols, interval, since=None, limit=None):
+        tickers = {self._ticker(symbol): symbol for symbol in symbols}
+        frames = load_yfinance(list(tickers), self.period, interval, download=self.download)
+        since_ms = to_ms(since)
+        return {tickers[ticker]: clip_bars(normalize_bars(df), since_ms, limit) for ticker, df in frames.items()}
+
+
+class FileSource(MarketDataSource):
+    """
+    Recorded bars for offline runs and benchmarks: <data_dir>/<interval>/<symbol>.parquet|.csv, or
+    <data_dir>/<symbol>.parquet|.csv (e.g. backfill --merge output). Files are read and normalized
+    once, then served from memory.
+    """
+    def __init__(self, data_dir):
+        self.data_dir = data_dir
+        self._bars = {}
+        self._lock = threading.Lock()
+
+    def _path(self, symbol, interval):
+        for folder in (os.path.join(self.data_dir, interval), self.data_dir):
+            for ext in (".parquet", ".csv"):
+                path = os.path.join(folder, symbol + ext)
+                if os.path.exists(path):
+                    return path
+        return None
+
+    def _load(self, symbol, interval):
+        key = (symbol, interval)
+        with self._lock:
+            bars = self._bars.get(key)
+        if bars is None:
+            path = self._path(symbol, interval)
+            if path is None:
+                return empty_bars()
+            bars = normalize_bars(pd.read_parquet(path) if path.endswith(".parquet") else pd.read_csv(path))
+            with self._lock:
+                self._bars[key] = bars
+        return bars
+
+    def fetch(self, symbol, interval, since=None, limit=None):
+        return clip_bars(self._load(symbol, interval), to_ms(since), limit)
@@ -0,0 +1,66 @@
+"""
+Warm-start checkpoint of the signal monitor.
+
+A checkpoint directory holds the live windows of every symbol (live_window.LiveWindowStore, as a
+memory-mappable .npy), the signal state table (signal_state.json) and the open signals of the
+session (correlation.track_open_signals). The monitor writes it after every cycle and on
+shutdown; on startup it restores the windows and state, so the first cycle fetches only the bars
+since the checkpoint and does not alert again on signals already sent. Indicators are not saved:
+the kernels recompute them from the restored windows in the first cycle.
+"""
+import glob
+import json
+import os
+import time
+
+from signal_state import DEFAULT_STATE_FILE
+
+CHECKPOINT_FILE = "checkpoint.json"
+CHECKPOINT_VERSION = 3
+
+
+def state_path(directory):
+    """Path of the signal state table inside a checkpoint directory."""
+    return os.path.join(directory, DEFAULT_STATE_FILE)
+
+
+def save_checkpoint(directory, windows, state=None, open_signals=None):
+    """
+    Writes the checkpoint. The bars go to a new file named after the time of the save, and
+    checkpoint.json is replaced last, so a crash mid-write leaves the previous checkpoint intact.
+    """
+    os.makedirs(directory, exist_ok=True)
+    saved_at = int(time.time() * 1000)
+    bars_file = f"live_windows-{time.time_ns()}.npy"
+    symbols, sizes = windows.snapshot(os.path.join(directory, bars_file))
+    if state is not None:
+        state.save()
+
+    meta = {"version": CHECKPOINT_VERSION, "saved_at": saved_at, "bars_file": bars_file,
+            "symbols": symbols, "sizes": sizes, "open_signals": open_signals or {}}
+    tmp = os.path.join(directory, CHECKPOINT_FILE + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(tmp, os.path.join(directory, CHECKPOINT_FILE))
+
+    for old in glob.glob(os.path.join(directory, "live_windows-*.npy")):
+        if os.path.basename(old) != bars_file:
+            os.remove(old)
+    return meta
+
+
+def load_checkpoint(directory, windows):
+    """
+    Restores the live windows of the directory's checkpoint into `windows`.
+    :return: The checkpoint metadata (saved_at, symbols, open_signals, ...), or None without one.
+    """
+    path = os.path.join(directory, CHECKPOINT_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("version") != CHECKPOINT_VERSION:
+        print(f"⚠️ Checkpoint de versão {meta.get('version')} ignorado: {directory}")
+        return None
+    windows.restore(os.path.join(directory, meta["bars_file"]), meta["symbols"], meta["sizes"])
+    return meta
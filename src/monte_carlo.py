@@ -0,0 +1,139 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+SIMULATION_KINDS = ("bootstrap", "shuffle", "skip")
+
+# Upper bound of (simulations x trades) cells held at once by each process
+MAX_BLOCK_CELLS = 4_000_000
+# Runs smaller than this stay in the calling process
+PARALLEL_MIN_CELLS = 50_000_000
+
+
+def trade_log_returns(trades_df, fraction=1.0):
+    """
+    Log growth of the equity on each trade, in exit order, when `fraction` of the equity is
+    committed to every trade (1.0 compounds the full return, as the backtest report does).
+    Trades of many symbols are ordered by their exit time (exit_ts); bar indexes only order the
+    trades of one symbol.
+    """
+    df = trades_df
+    if "exit_ts" in df.columns and (df["exit_ts"] >= 0).all():
+        df = df.sort_values("exit_ts", kind="stable")
+    elif "exit_index" in df.columns and ("symbol" not in df.columns or df["symbol"].nunique() <= 1):
+        df = df.sort_values("exit_index", kind="stable")
+    elif "exit_index" in df.columns:
+        print("⚠️ Trades sem exit_ts: a simulação segue a ordem do arquivo")
+    growth = 1 + fraction * df["return_%"].to_numpy(dtype=np.float64) / 100
+    return np.log(np.clip(growth, 1e-12, None))
+
+
+def _simulate_block(kind, log_returns, n_sims, rng, skip_rate):
+    n = len(log_returns)
+    if kind == "bootstrap":
+        paths = log_returns[rng.integers(0, n, size=(n_sims, n))]
+    elif kind == "shuffle":
+        paths = rng.permuted(np.broadcast_to(log_returns, (n_sims, n)), axis=1)
+    elif kind == "skip":
+        paths = np.where(rng.random((n_sims, n), dtype=np.float32) < skip_rate, np.float32(0), log_returns)
+    else:
+        raise ValueError(f"Unknown simulation kind '{kind}' (kinds: {SIMULATION_KINDS})")
+
+    # Every path is turned in place into its log equity curve and then its drawdown curve
+    equity = np.cumsum(paths, axis=1, out=paths if paths.flags.writeable else None)
+    final = equity[:, -1].astype(np.float64)
+    lowest = np.minimum(equity.min(axis=1), 0).astype(np.float64)
+    peak = np.maximum.accumulate(equity, axis=1)
+    np.maximum(peak, 0, out=peak)
+    np.subtract(peak, equity, out=peak)
+    return final, peak.max(axis=1).astype(np.float64), lowest
+
+
+def _simulate(kind, log_returns, n_sims, seed, skip_rate):
+    """
+    Runs n_sims simulations of one kind in blocks of at most MAX_BLOCK_CELLS cells.
+    :return: (final log equity, max drawdown in log units, lowest log equity) per simulation.
+    """
+    rng = np.random.default_rng(seed)
+    log_returns = np.asarray(log_returns, dtype=np.float32)
+    block = max(1, MAX_BLOCK_CELLS // max(len(log_returns), 1))
+    results = [_simulate_block(kind, log_returns, min(block, n_sims - start), rng, skip_rate)
+               for start in range(0, n_sims, block)]
+    return tuple(np.concatenate(parts) for parts in zip(*results))
+
+
+def simulate(kind, log_returns, simulations, seed=None, skip_rate=0.1, workers=None):
+    """
+    Runs `simulations` paths of one kind, split across processes for large runs:
+    "bootstrap" resamples the trades with replacement, "shuffle" permutes their order and "skip"
+    drops each trade with probability `skip_rate` (missed fills), keeping the order.
+    """
+    cells = simulations * len(log_returns)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or cells < PARALLEL_MIN_CELLS:
+        return _simulate(kind, log_returns, simulations, seed, skip_rate)
+
+    seeds = np.random.SeedSequence(seed).spawn(workers)
+    sizes = [len(part) for part in np.array_split(np.arange(simulations), workers)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        parts = list(executor.map(_simulate, [kind] * workers, [log_returns] * workers, sizes, seeds,
+                                  [skip_rate] * workers))
+    return tuple(np.concatenate(values) for values in zip(*parts))
+
+
+def run_monte_carlo(trades_df, simulations=10_000, kinds=SIMULATION_KINDS, skip_rate=0.1, fraction=1.0,
+                    ruin_loss=0.5, confidence=0.9, seed=None, workers=None):
+    """
+    Monte Carlo robustness of a backtest: confidence intervals of the total return and max
+    drawdown, and the probabilities of loss and ruin (equity at some point below
+    1 - ruin_loss of the starting capital), for every simulation kind.
+    :param trades_df: Trades with a return_% column, as produced by the backtester.
+    :return: DataFrame with one row per kind; percent columns.
+    """
+    log_returns = trade_log_returns(trades_df, fraction)
+    low_q, high_q = (1 - confidence) / 2 * 100, (1 + confidence) / 2 * 100
+    ruin_level = np.log1p(-ruin_loss)
+    rows = []
+    for i, kind in enumerate(kinds):
+        final, drawdown, lowest = simulate(kind, log_returns, simulations, None if seed is None else seed + i,
+                                           skip_rate, workers)
+        total_return = np.expm1(final) * 100
+        max_drawdown = -np.expm1(-drawdown) * 100
+        rows.append({
+            "kind": kind,
+            "simulations": simulations,
+            "trades": len(log_returns),
+            "return_low": np.percentile(total_return, low_q),
+            "return_median": np.median(total_return),
+            "return_high": np.percentile(total_return, high_q),
+            "drawdown_low": np.percentile(max_drawdown, low_q),
+            "drawdown_median": np.median(max_drawdown),
+            "drawdown_high": np.percentile(max_drawdown, high_q),
+            "loss_probability": np.mean(final < 0) * 100,
+            "ruin_probability": np.mean(lowest <= ruin_level) * 100,
+        })
+    return pd.DataFrame(rows).round(2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo dos trades de um backtest")
+    parser.add_argument("trades", help="backtest_trades.parquet ou .csv gerado pelo relatório")
+    parser.add_argument("--simulations", type=int, default=10_000)
+    parser.add_argument("--skip-rate", type=float, default=0.1, help="probabilidade de perder cada entrada")
+    parser.add_argument("--fraction", type=float, default=1.0, help="fração do capital por trade")
+    parser.add_argument("--ruin-loss", type=float, default=0.5, help="perda do capital inicial considerada ruína")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    trades_df = pd.read_parquet(args.trades) if args.trades.endswith(".parquet") else pd.read_csv(args.trades)
+    result = run_monte_carlo(trades_df, args.simulations, skip_rate=args.skip_rate, fraction=args.fraction,
+                             ruin_loss=args.ruin_loss, seed=args.seed, workers=args.workers)
+    print(result.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
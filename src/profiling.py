@@ -0,0 +1,151 @@
+"""
+Opt-in sampling profiler for monitor cycles and backtests.
+
+A Profiler watches each cycle: when one runs past its time budget (or when profiling was
+requested by flag or signal) a background thread starts sampling the stacks of every thread
+until the cycle ends. The samples are written in folded-stack format ("frame;frame;frame count"
+per line), which flamegraph.pl, speedscope and inferno read directly. Each stack is rooted at the
+tags of its cycle and of the thread's current stage and symbol, e.g.
+"cycle=12;stage=indicators;symbol=BTC-USDT;check_signals (signal_monitor.py:67);...".
+"""
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+DEFAULT_INTERVAL = 0.005
+DEFAULT_PROFILE_DIR = "../profiles"
+MAX_STACK_DEPTH = 128
+
+# thread id -> tags of the work the thread is doing (set by tag())
+_thread_tags = {}
+
+
+@contextmanager
+def tag(**tags):
+    """Tags the samples taken from the current thread while the block runs (stage, symbol, ...)."""
+    thread_id = threading.get_ident()
+    previous = _thread_tags.get(thread_id)
+    _thread_tags[thread_id] = {**(previous or {}), **tags}
+    try:
+        yield
+    finally:
+        if previous is None:
+            _thread_tags.pop(thread_id, None)
+        else:
+            _thread_tags[thread_id] = previous
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Background thread sampling the Python stacks of all other threads every `interval` seconds."""
+    def __init__(self, interval=DEFAULT_INTERVAL, root_tags=None):
+        self.interval = interval
+        self.root_tags = dict(root_tags or {})
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own_id:
+                    self.samples[self._fold(thread_id, frame)] += 1
+
+    def _fold(self, thread_id, frame):
+        names = []
+        while frame is not None and len(names) < MAX_STACK_DEPTH:
+            names.append(_frame_name(frame))
+            frame = frame.f_back
+        tags = {**self.root_tags, **_thread_tags.get(thread_id, {})}
+        return ";".join([f"{key}={value}" for key, value in tags.items()] + names[::-1])
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+
+class Profiler:
+    """
+    Watches cycles (see cycle()) and profiles the ones that exceed `budget_seconds`, the ones
+    after request() (e.g. from SIGUSR1) or all of them when `always` is set.
+    """
+    def __init__(self, budget_seconds=None, out_dir=DEFAULT_PROFILE_DIR, interval=DEFAULT_INTERVAL, always=False):
+        self.budget_seconds = budget_seconds
+        self.out_dir = out_dir
+        self.interval = interval
+        self.always = always
+        self.requested = threading.Event()
+        self.dumps = []
+
+    def request(self):
+        """Profiles the next cycle from its start."""
+        self.requested.set()
+
+    def install_signal(self, signum=getattr(signal, "SIGUSR1", None)):
+        if signum is not None:
+            signal.signal(signum, lambda *_: self.request())
+
+    @contextmanager
+    def cycle(self, name, **tags):
+        """
+        Runs a cycle (a monitor scan, a symbol's backtest, ...) under the profiler's watch.
+        The dump, if any, is written to out_dir/<name>-<tags>-<time>.folded.
+        """
+        sampler = StackSampler(self.interval, tags)
+        started = time.perf_counter()
+        timer = None
+        if self.always or self.requested.is_set():
+            self.requested.clear()
+            sampler.start()
+        elif self.budget_seconds is not None:
+            timer = threading.Timer(self.budget_seconds, sampler.start)
+            timer.daemon = True
+            timer.start()
+        try:
+            with tag(**tags):
+                yield sampler
+        finally:
+            if timer is not None:
+                timer.cancel()
+                timer.join()
+            sampler.stop()
+            if sampler.samples:
+                self._dump(name, tags, sampler, time.perf_counter() - started)
+
+    def _dump(self, name, tags, sampler, elapsed):
+        os.makedirs(self.out_dir, exist_ok=True)
+        label = "-".join(f"{value}" for value in tags.values())
+        filename = f"{name}-{label}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.folded".replace("--", "-")
+        path = sampler.write(os.path.join(self.out_dir, filename.replace(os.sep, "_")))
+        self.dumps.append(path)
+        print(f"🔥 {name} {tags} levou {elapsed:.1f}s: {sum(sampler.samples.values())} amostras em {path}")
+
+
+def profiler_from_params(params):
+    """Profiler configured by params["profile_budget"] (seconds) / params["profile"], or None."""
+    if not params.get("profile_budget") and not params.get("profile"):
+        return None
+    return Profiler(params.get("profile_budget"), params.get("profile_dir", DEFAULT_PROFILE_DIR),
+                    always=bool(params.get("profile")))
@@ -0,0 +1,200 @@
+import argparse
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from backfill import INTERVAL_MS
+from signal_state import SignalStateTable
+
+DEFAULT_WINDOW = 1000
+REPLAY_WORKERS = 30
+
+
+def load_recorded_bars(data_dir):
+    """Reads every <symbol>.parquet / <symbol>.csv bar file (ts, open, high, low, close, volume) of a folder."""
+    bars = {}
+    for filename in sorted(os.listdir(data_dir)):
+        symbol, ext = os.path.splitext(filename)
+        path = os.path.join(data_dir, filename)
+        if ext == ".parquet":
+            bars[symbol] = pd.read_parquet(path)
+        elif ext == ".csv":
+            bars[symbol] = pd.read_csv(path)
+    return bars
+
+
+def scale_universe(bars, factor):
+    """Clones every symbol `factor` times (SYMBOL#k) to load-test the monitor on a larger universe."""
+    if factor <= 1:
+        return dict(bars)
+    return {f"{symbol}#{k}" if k else symbol: df for symbol, df in bars.items() for k in range(factor)}
+
+
+def interval_of(ts):
+    step = int(np.median(np.diff(ts))) if len(ts) > 1 else INTERVAL_MS["15m"]
+    return next((name for name, ms in INTERVAL_MS.items() if ms == step), f"{step // 60_000}m")
+
+
+def to_venue_frame(window, broker):
+    """Shapes recorded bars like the live adapter of the broker returns them."""
+    dates = pd.to_datetime(window["ts"].to_numpy(), unit="ms")
+    if broker == "BINANCE":
+        return pd.DataFrame({
+            "Date": dates.strftime("%Y-%m-%d %H:%M"),
+            "Open": window["open"].to_numpy(), "High": window["high"].to_numpy(),
+            "Low": window["low"].to_numpy(), "Close": window["close"].to_numpy(),
+        })
+    df = window[["open", "high", "low", "close", "volume"]].reset_index(drop=True)
+    df.index = pd.Index(dates, name="timestamp")
+    return df
+
+
+class ReplayFeed:
+    """
+    Fetch adapter serving recorded bars: fetch() returns the last `window` bars closed at or before
+    the replay clock, exactly as the live adapters would have returned them at that time.
+    """
+    def __init__(self, bars, window=DEFAULT_WINDOW):
+        self.frames = {symbol: df.sort_values("ts").reset_index(drop=True) for symbol, df in bars.items()}
+        self.ts = {symbol: df["ts"].to_numpy(dtype=np.int64) for symbol, df in self.frames.items()}
+        self.intervals = {symbol: interval_of(ts) for symbol, ts in self.ts.items()}
+        self.window = window
+        self.clock = None
+
+    def timeline(self, start=None, end=None):
+        timeline = np.unique(np.concatenate(list(self.ts.values())))
+        if start is not None:
+            timeline = timeline[timeline >= start]
+        if end is not None:
+            timeline = timeline[timeline <= end]
+        return timeline
+
+    def fetch(self, ticker, broker):
+        ts = self.ts.get(ticker)
+        if ts is None or self.clock is None:
+            return None, None
+        end = int(np.searchsorted(ts, self.clock, side="right"))
+        window = self.frames[ticker].iloc[max(0, end - self.window):end]
+        return to_venue_frame(window, broker), self.intervals[ticker]
+
+
+class RecordingSink:
+    """Alert sink that keeps the messages instead of sending them to Telegram."""
+    def __init__(self, forward=None):
+        self.messages = []
+        self.forward = forward
+        self.lock = threading.Lock()
+
+    def __call__(self, text):
+        with self.lock:
+            self.messages.append(text)
+        if self.forward is not None:
+            self.forward(text)
+
+
+def _live_path():
+    from signal_monitor import check_signals, export_signals, create_export_file
+
+    return check_signals, export_signals, create_export_file
+
+
+def run_replay(bars, brokers=None, speed=0, start=None, end=None, export_file="replay_signals.csv",
+               window=DEFAULT_WINDOW, max_workers=REPLAY_WORKERS, sink=None, check_fn=None):
+    """
+    Replays recorded bars through the live signal path, bar close by bar close.
+
+    :param bars: dict symbol -> DataFrame with ts (epoch ms), open, high, low, close, volume.
+    :param brokers: dict symbol -> broker (default "BINANCE") used to shape the frames.
+    :param speed: Speed-up over real time (1 = real time); 0 replays as fast as possible.
+    :param check_fn: Replaces signal_monitor.check_signals (same signature).
+    Each replay evaluates its bars on a fresh signal state table, never the live monitor's.
+    :return: dict with the replay statistics; alerts are kept in `sink`.
+    """
+    brokers = brokers or {}
+    sink = sink if sink is not None else RecordingSink()
+    if check_fn is None:
+        check_fn, export_fn, create_export_file = _live_path()
+        create_export_file(export_file)
+    else:
+        export_fn = None
+
+    feed = ReplayFeed(bars, window=window)
+    timeline = feed.timeline(start, end)
+    cursors = {symbol: int(np.searchsorted(ts, timeline[0])) if len(timeline) else 0
+               for symbol, ts in feed.ts.items()}
+
+    state = SignalStateTable()
+
+    def timed_check(symbol):
+        began = time.perf_counter()
+        result = check_fn(symbol, brokers.get(symbol, "BINANCE"), fetcher=feed.fetch, alert=sink, state=state)
+        return result, time.perf_counter() - began
+
+    latencies = []
+    signals = []
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for ts in timeline:
+            if speed:
+                delay = wall_start + (ts - timeline[0]) / 1000 / speed - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+
+            due = []
+            for symbol, cursor in cursors.items():
+                symbol_ts = feed.ts[symbol]
+                if cursor < len(symbol_ts) and symbol_ts[cursor] == ts:
+                    due.append(symbol)
+                    cursors[symbol] = cursor + 1
+
+            feed.clock = ts
+            results = []
+            for result, latency in executor.map(timed_check, due):
+                latencies.append(latency)
+                if result:
+                    results.extend(result)
+            if results:
+                signals.extend(results)
+                if export_fn is not None:
+                    export_fn(results, export_file)
+
+    elapsed = time.perf_counter() - wall_start
+    latencies_ms = np.array(latencies) * 1000
+    stats = {
+        "symbols": len(bars),
+        "steps": len(timeline),
+        "bars": len(latencies),
+        "signals": len(signals),
+        "alerts": len(sink.messages),
+        "seconds": round(elapsed, 3),
+        "bars_per_second": round(len(latencies) / elapsed, 1) if elapsed > 0 else None,
+        "latency_p50_ms": round(float(np.percentile(latencies_ms, 50)), 3) if len(latencies_ms) else None,
+        "latency_p95_ms": round(float(np.percentile(latencies_ms, 95)), 3) if len(latencies_ms) else None,
+        "latency_max_ms": round(float(latencies_ms.max()), 3) if len(latencies_ms) else None,
+    }
+    print(f"🔁 Replay: {stats['bars']} barras de {stats['symbols']} ativos em {stats['seconds']}s "
+          f"({stats['bars_per_second']} barras/s) | latência p50 {stats['latency_p50_ms']} ms, "
+          f"p95 {stats['latency_p95_ms']} ms | {stats['signals']} sinais")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay de candles gravados pelo caminho do monitor")
+    parser.add_argument("--data-dir", default="../data", help="pasta com <symbol>.parquet/.csv")
+    parser.add_argument("--broker", default="BINANCE", help="formato do adaptador (BINANCE, IB, ...)")
+    parser.add_argument("--speed", type=float, default=0, help="1 = tempo real, 0 = o mais rápido possível")
+    parser.add_argument("--scale", type=int, default=1, help="multiplica o universo (teste de carga)")
+    parser.add_argument("--export", default="replay_signals.csv")
+    args = parser.parse_args()
+
+    bars = scale_universe(load_recorded_bars(args.data_dir), args.scale)
+    run_replay(bars, brokers={symbol: args.broker for symbol in bars}, speed=args.speed,
+               export_file=args.export, sink=RecordingSink())
+
+
+if __name__ == "__main__":
+    main()
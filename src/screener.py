@@ -0,0 +1,385 @@
+"""
+Universe screener: boolean expressions over the latest rows of an indicator panel, e.g.
+
+    rsi < 30 and stoch_k crosses_above stoch_d and close > ema_200
+
+Expressions are parsed once into a tree whose nodes evaluate as numpy operations over all
+symbols at once, so a screen over thousands of symbols costs a few array operations.
+"""
+import argparse
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+import strategy_catalog  # noqa: F401 (registers the built-in indicators)
+from strategy_registry import INDICATORS, IndicatorEngine
+
+BASE_FIELDS = ("open", "high", "low", "close", "volume")
+PANEL_ROWS = 2
+
+COMPARISONS = ("<", "<=", ">", ">=", "==", "!=", "crosses_above", "crosses_below")
+KEYWORDS = ("and", "or", "not") + COMPARISONS[-2:]
+
+TOKEN_RE = re.compile(r"\s*(?:(\d+(?:\.\d*)?|\.\d+)|([A-Za-z_][A-Za-z0-9_]*)|(<=|>=|==|!=|<|>|[()+\-*/]))")
+
+
+def _column_key(column):
+    return column.lower().replace(" ", "_")
+
+
+def resolve_field(field):
+    """
+    Maps a screener field to (indicator requirement or None, frame column):
+    OHLCV columns, indicator columns (rsi, stoch_k, upper_band, ...) or a single-parameter
+    indicator with its parameter appended (ema_200, rsi_21, sma_20).
+    """
+    if field in BASE_FIELDS:
+        return None, field
+    for name, indicator in INDICATORS.items():
+        for column in indicator.columns:
+            if _column_key(column) == field:
+                return (name, {}), column
+
+    match = re.fullmatch(r"([a-z_]+?)_(\d+(?:\.\d+)?)", field)
+    if match and match.group(1) in INDICATORS:
+        indicator = INDICATORS[match.group(1)]
+        if len(indicator.params) == 1 and len(indicator.columns) == 1:
+            (param, default), = indicator.params.items()
+            value = type(default)(float(match.group(2)))
+            params = {param: value}
+            return (indicator.name, params), indicator.column_names(params)[0]
+    raise KeyError(f"Unknown screener field '{field}'")
+
+
+class IndicatorPanel:
+    """
+    The last `rows` values of each field for every symbol of a universe:
+    fields[name] is a (n_symbols, rows) array whose last column is the latest bar.
+    """
+    def __init__(self, symbols, fields):
+        self.symbols = np.asarray(symbols, dtype=object)
+        self.fields = fields
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def get(self, field, lag=0):
+        if field not in self.fields:
+            raise KeyError(f"Field '{field}' is not in the panel")
+        values = self.fields[field]
+        if lag >= values.shape[1]:
+            raise ValueError(f"Panel keeps {values.shape[1]} rows, '{field}' needs {lag + 1}")
+        return values[:, -1 - lag]
+
+    def save(self, path):
+        np.savez(path, __symbols__=self.symbols.astype(str), **self.fields)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            fields = {name: data[name] for name in data.files if name != "__symbols__"}
+            return cls(data["__symbols__"].astype(object), fields)
+
+
+def build_panel(frames, fields, rows=PANEL_ROWS, interval="", engine=None):
+    """
+    Computes `fields` for every OHLC frame (lowercase columns) and keeps their last `rows` values.
+    :param frames: dict symbol -> DataFrame.
+    """
+    engine = engine or IndicatorEngine()
+    resolved = {field: resolve_field(field) for field in fields}
+    requirements = [requirement for requirement, _ in resolved.values() if requirement is not None]
+
+    symbols = list(frames)
+    panel = {field: np.full((len(symbols), rows), np.nan) for field in fields}
+    for i, symbol in enumerate(symbols):
+        df = frames[symbol]
+        if df is None or df.empty:
+            continue
+        df = engine.compute(df.copy(), symbol, interval, extra=requirements)
+        tail = df.iloc[-rows:]
+        for field, (_, column) in resolved.items():
+            panel[field][i, rows - len(tail):] = tail[column].to_numpy(dtype=np.float64)
+    return IndicatorPanel(symbols, panel)
+
+
+class Number:
+    def __init__(self, value):
+        self.value = float(value)
+
+    def evaluate(self, panel, lag=0):
+        return np.full(len(panel), self.value)
+
+    def fields(self):
+        return set()
+
+    def max_lag(self):
+        return 0
+
+
+class Field:
+    def __init__(self, name):
+        self.name = name
+
+    def evaluate(self, panel, lag=0):
+        return panel.get(self.name, lag)
+
+    def fields(self):
+        return {self.name}
+
+    def max_lag(self):
+        return 0
+
+
+class Arithmetic:
+    OPERATIONS = {"+": np.add, "-": np.subtract, "*": np.multiply, "/": np.divide}
+
+    def __init__(self, op, left, right):
+        self.op, self.left, self.right = op, left, right
+
+    def evaluate(self, panel, lag=0):
+        return self.OPERATIONS[self.op](self.left.evaluate(panel, lag), self.right.evaluate(panel, lag))
+
+    def fields(self):
+        return self.left.fields() | self.right.fields()
+
+    def max_lag(self):
+        return max(self.left.max_lag(), self.right.max_lag())
+
+
+class Comparison:
+    OPERATIONS = {"<": np.less, "<=": np.less_equal, ">": np.greater, ">=": np.greater_equal,
+                  "==": np.equal, "!=": np.not_equal}
+
+    def __init__(self, op, left, right):
+        self.op, self.left, self.right = op, left, right
+
+    def evaluate(self, panel, lag=0):
+        left, right = self.left.evaluate(panel, lag), self.right.evaluate(panel, lag)
+        if self.op == "crosses_above":
+            return (left > right) & (self.left.evaluate(panel, lag + 1) <= self.right.evaluate(panel, lag + 1))
+        if self.op == "crosses_below":
+            return (left < right) & (self.left.evaluate(panel, lag + 1) >= self.right.evaluate(panel, lag + 1))
+        return self.OPERATIONS[self.op](left, right)
+
+    def score(self, panel):
+        """Relative distance past the threshold: how strongly each symbol satisfies the comparison."""
+        if self.op in ("==", "!="):
+            return np.zeros(len(panel))
+        left, right = self.left.evaluate(panel), self.right.evaluate(panel)
+        margin = (left - right) / np.maximum(np.abs(right), 1e-9)
+        return margin if self.op in (">", ">=", "crosses_above") else -margin
+
+    def fields(self):
+        return self.left.fields() | self.right.fields()
+
+    def max_lag(self):
+        lag = 1 if self.op.startswith("crosses") else 0
+        return lag + max(self.left.max_lag(), self.right.max_lag())
+
+
+class Logical:
+    def __init__(self, op, operands):
+        self.op, self.operands = op, operands
+
+    def evaluate(self, panel, lag=0):
+        results = [operand.evaluate(panel, lag) for operand in self.operands]
+        if self.op == "not":
+            return ~results[0]
+        return np.logical_and.reduce(results) if self.op == "and" else np.logical_or.reduce(results)
+
+    def score(self, panel):
+        scores = [_score(operand, panel) for operand in self.operands]
+        if self.op == "not":
+            return -scores[0]
+        return np.sum(scores, axis=0) if self.op == "and" else np.max(scores, axis=0)
+
+    def fields(self):
+        return set().union(*(operand.fields() for operand in self.operands))
+
+    def max_lag(self):
+        return max(operand.max_lag() for operand in self.operands)
+
+
+def _require_condition(node, expression):
+    """Raises SyntaxError unless the tree is a comparison or a logical combination of comparisons."""
+    if isinstance(node, Logical):
+        for operand in node.operands:
+            _require_condition(operand, expression)
+    elif not isinstance(node, Comparison):
+        # A bare field or arithmetic value would match any non-zero or NaN (warm-up) value
+        raise SyntaxError(f"'{expression}' is not a condition (use a comparison, e.g. rsi < 30)")
+
+
+def _score(node, panel):
+    return node.score(panel) if hasattr(node, "score") else np.zeros(len(panel))
+
+
+def tokenize(text):
+    tokens = []
+    position = 0
+    text = text.strip()
+    while position < len(text):
+        match = TOKEN_RE.match(text, position)
+        if not match or match.end() == position:
+            raise SyntaxError(f"Unexpected character at {position}: '{text[position:position + 10]}'")
+        number, name, symbol = match.groups()
+        tokens.append(("number", number) if number else ("name", name) if name else ("op", symbol))
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+    """
+    Recursive descent over:
+        or  := and ("or" and)*          and := not ("and" not)*        not := "not" not | cmp
+        cmp := sum (COMPARISON sum)?    sum := term (("+"|"-") term)*  term := unary (("*"|"/") unary)*
+        unary := "-" unary | NUMBER | FIELD | "(" or ")"
+    """
+    def __init__(self, text):
+        self.tokens = tokenize(text)
+        self.position = 0
+
+    def peek(self):
+        return self.tokens[self.position][1] if self.position < len(self.tokens) else None
+
+    def take(self, expected=None):
+        if self.position >= len(self.tokens):
+            raise SyntaxError("Unexpected end of expression")
+        kind, value = self.tokens[self.position]
+        if expected is not None and value != expected:
+            raise SyntaxError(f"Expected '{expected}', found '{value}'")
+        self.position += 1
+        return kind, value
+
+    def parse(self):
+        node = self.parse_or()
+        if self.position != len(self.tokens):
+            raise SyntaxError(f"Unexpected '{self.peek()}'")
+        return node
+
+    def parse_or(self):
+        operands = [self.parse_and()]
+        while self.peek() == "or":
+            self.take()
+            operands.append(self.parse_and())
+        return operands[0] if len(operands) == 1 else Logical("or", operands)
+
+    def parse_and(self):
+        operands = [self.parse_not()]
+        while self.peek() == "and":
+            self.take()
+            operands.append(self.parse_not())
+        return operands[0] if len(operands) == 1 else Logical("and", operands)
+
+    def parse_not(self):
+        if self.peek() == "not":
+            self.take()
+            return Logical("not", [self.parse_not()])
+        return self.parse_comparison()
+
+    def parse_comparison(self):
+        left = self.parse_sum()
+        if self.peek() in COMPARISONS:
+            _, op = self.take()
+            return Comparison(op, left, self.parse_sum())
+        return left
+
+    def parse_sum(self):
+        node = self.parse_term()
+        while self.peek() in ("+", "-"):
+            _, op = self.take()
+            node = Arithmetic(op, node, self.parse_term())
+        return node
+
+    def parse_term(self):
+        node = self.parse_unary()
+        while self.peek() in ("*", "/"):
+            _, op = self.take()
+            node = Arithmetic(op, node, self.parse_unary())
+        return node
+
+    def parse_unary(self):
+        kind, value = self.take()
+        if value == "-":
+            return Arithmetic("-", Number(0), self.parse_unary())
+        if value == "(":
+            node = self.parse_or()
+            self.take(")")
+            return node
+        if kind == "number":
+            return Number(value)
+        if kind == "name" and value not in KEYWORDS:
+            return Field(value)
+        raise SyntaxError(f"Unexpected '{value}'")
+
+
+@lru_cache(maxsize=256)
+def compile_expression(text):
+    """Parses a screener expression into an evaluable tree (cached per expression text)."""
+    return _Parser(text).parse()
+
+
+def screen(panel, expression, rank_by=None, top=None):
+    """
+    Evaluates `expression` (comparisons joined by and/or/not) over the panel and returns the
+    matching symbols ranked by score, with the latest values of the fields the expression reads.
+    The score is the sum of the relative margins of the comparisons, unless `rank_by`
+    (an arithmetic expression, e.g. "-rsi") is given.
+    """
+    tree = compile_expression(expression)
+    _require_condition(tree, expression)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mask = np.asarray(tree.evaluate(panel), dtype=bool)
+        scores = compile_expression(rank_by).evaluate(panel) if rank_by else _score(tree, panel)
+    scores = np.where(np.isfinite(scores), scores, 0.0)
+
+    matched = np.flatnonzero(mask)
+    order = matched[np.argsort(-scores[matched], kind="stable")]
+    if top is not None:
+        order = order[:top]
+    result = pd.DataFrame({"symbol": panel.symbols[order], "score": scores[order]})
+    for field in sorted(tree.fields()):
+        result[field] = panel.get(field)[order]
+    return result
+
+
+def panel_for(frames, *expressions, interval="", engine=None):
+    """Builds a panel with exactly the fields (and rows) the expressions need."""
+    trees = [compile_expression(expression) for expression in expressions if expression]
+    fields = sorted(set().union(*(tree.fields() for tree in trees)))
+    rows = 1 + max(tree.max_lag() for tree in trees)
+    return build_panel(frames, fields, rows=max(rows, PANEL_ROWS), interval=interval, engine=engine)
+
+
+def main():
+    import time
+    from replay import load_recorded_bars
+
+    parser = argparse.ArgumentParser(description="Screener do universo por expressão")
+    parser.add_argument("expression", help='ex: "rsi < 30 and stoch_k crosses_above stoch_d and close > ema_200"')
+    parser.add_argument("--data-dir", default="../data", help="pasta com <symbol>.parquet/.csv")
+    parser.add_argument("--panel", help="painel salvo (.npz) em vez de recalcular os indicadores")
+    parser.add_argument("--save-panel", help="salva o painel calculado (.npz) para as próximas buscas")
+    parser.add_argument("--rank-by", help='ex: "-rsi"')
+    parser.add_argument("--top", type=int, default=50)
+    args = parser.parse_args()
+
+    if args.panel:
+        panel = IndicatorPanel.load(args.panel)
+    else:
+        panel = panel_for(load_recorded_bars(args.data_dir), args.expression, args.rank_by)
+        if args.save_panel:
+            panel.save(args.save_panel)
+
+    started = time.perf_counter()
+    result = screen(panel, args.expression, rank_by=args.rank_by, top=args.top)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(result.to_string(index=False))
+    print(f"🔎 {len(result)} de {len(panel)} ativos em {elapsed_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+import multiprocessing as mp
+import os
+import queue
+import time
+import traceback
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+THREADS_PER_WORKER = 8
+MAX_RESTARTS_PER_CYCLE = 3
+POLL_SECONDS = 1.0
+
+
+def shard_of(symbol, n_shards):
+    """Stable shard of a symbol, so each worker keeps the same symbols (and warm caches) every cycle."""
+    return zlib.crc32(symbol.encode("utf-8")) % n_shards
+
+
+def _default_check(ticker, broker):
+    from signal_monitor import check_signals
+
+    return check_signals(ticker, broker)
+
+
+def _worker_loop(shard_id, tasks, results, check_fn, threads):
+    """
+    Worker process: waits for (cycle, assets) tasks, runs fetch + indicators + strategies for its
+    shard on a small thread pool and reports every asset back, so a restart resumes where it died.
+    """
+    check_fn = check_fn or _default_check
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            cycle, assets = task
+            futures = {executor.submit(check_fn, ticker, broker): (ticker, broker) for ticker, broker in assets}
+            for future in as_completed(futures):
+                ticker, broker = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"⚠️ Erro ao analisar {ticker} no shard {shard_id}: {e}")
+                    result = None
+                results.put(("asset", cycle, shard_id, (ticker, broker), result))
+            results.put(("done", cycle, shard_id, None, None))
+
+
+class ShardedMonitor:
+    """
+    Coordinator of the sharded monitor mode: splits the universe across N persistent worker
+    processes and gathers their signals through a local queue. Workers that die are restarted
+    with the assets they had not reported yet, without stopping the cycle.
+    """
+    def __init__(self, n_workers=None, threads_per_worker=THREADS_PER_WORKER, check_fn=None,
+                 max_restarts=MAX_RESTARTS_PER_CYCLE):
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.threads_per_worker = threads_per_worker
+        self.check_fn = check_fn
+        self.max_restarts = max_restarts
+        self.context = mp.get_context()
+        self.results = self.context.Queue()
+        self.workers = {}
+        self.cycle = 0
+
+    def _start_worker(self, shard_id):
+        tasks = self.context.Queue()
+        process = self.context.Process(
+            target=_worker_loop,
+            args=(shard_id, tasks, self.results, self.check_fn, self.threads_per_worker),
+            daemon=True,
+        )
+        process.start()
+        self.workers[shard_id] = (process, tasks)
+
+    def start(self):
+        for shard_id in range(self.n_workers):
+            self._start_worker(shard_id)
+        return self
+
+    def stop(self):
+        for process, tasks in self.workers.values():
+            if process.is_alive():
+                tasks.put(None)
+        for process, _ in self.workers.values():
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self.workers = {}
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def run_cycle(self, assets):
+        """
+        Runs one scan over `assets` [(ticker, broker), ...] and returns the signals of every asset
+        (check_fn returns a list of signals per asset, like signal_monitor.check_signals).
+        """
+        self.cycle += 1
+        pending = {shard_id: {} for shard_id in range(self.n_workers)}
+        for ticker, broker in assets:
+            pending[shard_of(ticker, self.n_workers)][(ticker, broker)] = True
+
+        running = set()
+        for shard_id, shard_assets in pending.items():
+            if shard_assets:
+                self.workers[shard_id][1].put((self.cycle, list(shard_assets)))
+                running.add(shard_id)
+
+        restarts = {shard_id: 0 for shard_id in running}
+        all_results = []
+        last_check = time.monotonic()
+        while running:
+            if time.monotonic() - last_check >= POLL_SECONDS:
+                self._restart_dead_workers(running, pending, restarts)
+                last_check = time.monotonic()
+            try:
+                kind, cycle, shard_id, asset, result = self.results.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                continue
+
+            if cycle != self.cycle:
+                continue
+            if kind == "asset":
+                pending[shard_id].pop(asset, None)
+                if result:
+                    all_results.extend(result)
+            elif kind == "done":
+                if pending[shard_id]:
+                    self.workers[shard_id][1].put((self.cycle, list(pending[shard_id])))
+                else:
+                    running.discard(shard_id)
+
+        return all_results
+
+    def _restart_dead_workers(self, running, pending, restarts):
+        for shard_id in list(running):
+            process, _ = self.workers[shard_id]
+            if process.is_alive():
+                continue
+
+            remaining = list(pending[shard_id])
+            print(f"⚠️ Worker do shard {shard_id} terminou (exit code {process.exitcode}), "
+                  f"{len(remaining)} ativos pendentes")
+            if restarts[shard_id] >= self.max_restarts:
+                print(f"⚠️ Shard {shard_id} abandonado neste ciclo após {restarts[shard_id]} reinícios")
+                running.discard(shard_id)
+                self._start_worker(shard_id)
+                continue
+
+            restarts[shard_id] += 1
+            try:
+                self._start_worker(shard_id)
+                self.workers[shard_id][1].put((self.cycle, remaining))
+            except Exception as e:
+                print(f"⚠️ Falha ao reiniciar o shard {shard_id}: {e}")
+                print(traceback.format_exc())
+                running.discard(shard_id)
@@ -0,0 +1,70 @@
+"""
+Vectorized backtest signals. Each generator reads the lowercase OHLC (and indicator) columns of a
+frame as arrays and returns one int8 code per bar: 1 (BUY), -1 (SELL) or 0.
+All of them are causal: the code of a bar only depends on that bar and the ones before it.
+"""
+import numpy as np
+
+SHADOW_BODY_RATIO = 2.0
+STOCHASTIC_OVERSOLD = 20
+STOCHASTIC_OVERBOUGHT = 80
+
+
+def _codes(buy, sell):
+    return buy.astype(np.int8) - sell.astype(np.int8)
+
+
+def _previous(values, fill=np.nan):
+    previous = np.empty_like(values)
+    previous[:1] = fill
+    previous[1:] = values[:-1]
+    return previous
+
+
+def _ohlc(df):
+    return tuple(df[col].to_numpy(dtype=np.float64) for col in ("open", "high", "low", "close"))
+
+
+def shadow_reversal(df):
+    """
+    Hammer / shooting star after a down / up close: a shadow at least SHADOW_BODY_RATIO times the
+    body on one side and no longer than the body on the other.
+    """
+    open_, high, low, close = _ohlc(df)
+    body = np.abs(close - open_)
+    upper = high - np.maximum(open_, close)
+    lower = np.minimum(open_, close) - low
+    previous_close = _previous(close)
+    buy = (lower >= SHADOW_BODY_RATIO * body) & (upper <= body) & (close < previous_close)
+    sell = (upper >= SHADOW_BODY_RATIO * body) & (lower <= body) & (close > previous_close)
+    return _codes(buy & (body > 0), sell & (body > 0))
+
+
+def engulfing(df):
+    """A candle whose body engulfs the opposite-colored body of the previous one."""
+    open_, _, _, close = _ohlc(df)
+    previous_open, previous_close = _previous(open_), _previous(close)
+    buy = (previous_close < previous_open) & (close > open_) & (open_ <= previous_close) & (close >= previous_open)
+    sell = (previous_close > previous_open) & (close < open_) & (open_ >= previous_close) & (close <= previous_open)
+    return _codes(buy, sell)
+
+
+def inside_bar(df):
+    """Close breaking out of the mother bar of an inside bar (the bar before the previous one)."""
+    _, high, low, close = _ohlc(df)
+    previous_high, previous_low = _previous(high), _previous(low)
+    mother_high, mother_low = _previous(previous_high), _previous(previous_low)
+    inside = (previous_high < mother_high) & (previous_low > mother_low)
+    return _codes(inside & (close > mother_high), inside & (close < mother_low))
+
+
+def stochastic_cross(df, warmup=0):
+    """%K crossing above %D in the oversold zone (BUY) or below it in the overbought zone (SELL)."""
+    k = df["stoch_k"].to_numpy(dtype=np.float64)
+    d = df["stoch_d"].to_numpy(dtype=np.float64)
+    previous_k, previous_d = _previous(k), _previous(d)
+    buy = (k > d) & (previous_k <= previous_d) & (k < STOCHASTIC_OVERSOLD)
+    sell = (k < d) & (previous_k >= previous_d) & (k > STOCHASTIC_OVERBOUGHT)
+    codes = _codes(buy, sell)
+    codes[:warmup] = 0
+    return codes
@@ -1,22 +1,77 @@
+import argparse
 import configparser
 import os
+import signal as os_signal
+import sys
 import time
 import traceback
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
 from datetime import datetime
 
 import pandas as pd
 import pytz
 from pandas import to_datetime
-from streamlit import empty
 
-from indicators import calculate_rsi, calculate_stochastic, calculate_macd
+from b3_data import B3_INTERVAL, B3_SUFFIX
+from backfill import INTERVAL_MS
+from chart_service import DEFAULT_CHART_DIR, ChartService, signal_chart
+from correlation import RollingCorrelation, align_closes, closed_closes, flag_correlated, resample_closes, \
+    track_open_signals
 from investment_strategy import InvestmentStrategy
+from live_window import LiveWindowStore
+from market_data import BinanceSource, PolygonSource, YFinanceSource, normalize_bars
+from monitor_checkpoint import load_checkpoint, save_checkpoint, state_path
+from profiling import Profiler, tag
+from sharded_monitor import ShardedMonitor
+from signal_state import DEFAULT_STATE_FILE, SignalStateTable
+from spread_scanner import SpreadScanner
+from strategy_catalog import ALERT_INDICATORS
 from strategy_profile_enum import StrategyProfileEnum
-from strategy_utils import read_crypto_symbols_from_csv, read_stocks_symbols_from_csv, get_binance_ohlc, \
-    get_ohlc_polygon, send_telegram_alert
+from strategy_registry import IndicatorEngine, strategies_for_profile
+from strategy_utils import read_crypto_symbols_from_csv, read_stocks_symbols_from_csv, send_telegram_alert, \
+    send_telegram_photo
 
 MAX_WORKERS=30
+STRATEGY_PROFILE = StrategyProfileEnum.DAYTRADE
+
+# Shared by all worker threads: each indicator is computed once per symbol and new bar
+indicator_engine = IndicatorEngine()
+
+# Optional cross-asset correlation of the universe (see --correlation-data) and the signals
+# sent recently ({asset: {"signal", "ts", "expires"}}, see correlation.track_open_signals), used to warn
+# about correlated exposure
+correlation_engine = None
+open_signals = {}
+
+# Last bar evaluated and last signal per strategy of each symbol (see --state-file); sharded
+# workers keep their own in-memory table for the symbols of their shard
+signal_state = SignalStateTable()
+
+# Renders the chart of each alert on its own processes and sends it after the text (see --charts)
+chart_service = None
+
+# Worker threads live across cycles, so their indicator scratch buffers (indicator_kernels) are reused
+_executor = None
+
+# Bars of the last closed bars requested from each live source, by interval
+LIVE_BARS = {"15m": 1000, "1m": 120}
+_data_sources = {}
+
+# Live window of every symbol (see --live-windows): each cycle fetches only the bars since the
+# symbol's last one and writes them in place; the indicators read views of the store
+live_windows = LiveWindowStore(capacity=max(LIVE_BARS.values()))
+# Interval of each symbol's live window ("15m" crypto, "1m" Polygon, ...)
+live_intervals = {}
+
+# Optional cross-venue spread scanner of the crypto pairs (see --spreads), run over the live windows
+spread_scanner = None
+
+# Directory of the warm-start checkpoint (see --checkpoint-dir), written after every cycle and on exit
+checkpoint_dir = None
+
+# B3 bars of the current cycle (symbol -> canonical bars), downloaded in batches by prefetch_b3
+b3_frames = {}
 
 def format_signal(asset, signal, strategy, entry, sl, tp, row):
     now = datetime.now()
@@ -40,55 +95,111 @@ def format_signal(asset, signal, strategy, entry, sl, tp, row):
             f"🕒 Horário: {now.strftime('%Y-%m-%d %H:%M:%S')}{debug_info}"
         )
 
-def check_signals(ticker, broker):
-    try:
-        df_ohlc = None
-        if broker == "BINANCE":
-            df_ohlc = get_binance_ohlc(ticker, interval="15m")
-        elif broker == "B3":
-            return None
+def data_sources():
+    """Live source and interval of each broker (market_data), created on first use."""
+    if not _data_sources:
+        _data_sources.update({
+            "BINANCE": (BinanceSource(), "15m"),
+            "B3": (YFinanceSource(suffix=B3_SUFFIX), B3_INTERVAL),
+            "POLYGON": (PolygonSource(), "1m"),
+        })
+    return _data_sources
+
+
+def fetch_ohlc(ticker, broker):
+    """
+    Live fetch adapter: returns (canonical bars, interval) for a ticker, or (None, None).
+    The bars are a view of the ticker's live window, valid until its next fetch.
+    """
+    source, interval = data_sources().get(broker) or data_sources()["POLYGON"]
+    if broker == "B3":
+        bars = b3_frames.get(ticker)
+        if bars is None:  # sharded workers, or a ticker missing from the batch
+            bars = source.fetch(ticker, interval)
+    else:
+        since = live_windows.last_ts(ticker)
+        window_start = int(time.time() * 1000) - INTERVAL_MS[interval] * LIVE_BARS[interval]
+        if since is None or since < window_start:
+            bars = source.fetch(ticker, interval, limit=LIVE_BARS[interval])
         else:
-            df_ohlc = get_ohlc_polygon(ticker, multiplier="1")
+            # Re-fetches the last stored bar too, which was still forming
+            bars = source.fetch(ticker, interval, since=since)
+    live_windows.write(ticker, bars)
+    live_intervals[ticker] = interval
+    bars = live_windows.frame(ticker, LIVE_BARS.get(interval))
+    return (None, None) if bars.empty else (bars, interval)
+
+
+def check_signals(ticker, broker, fetcher=fetch_ohlc, alert=send_telegram_alert, state=None):
+    """
+    Live signal path of one ticker: fetch adapter -> indicators -> strategies -> alert sink.
+    The replay mode passes its own `fetcher`, `alert` and `state`.
+    Symbols whose last bar was already evaluated are skipped, and a strategy is only alerted
+    (and exported) when its signal differs from the one of the symbol's previous bar.
+    :return: List with one result per strategy alerted on the bar, or None.
+    """
+    state = signal_state if state is None else state
+    try:
+        with tag(symbol=ticker, stage="fetch"):
+            df_ohlc, interval = fetcher(ticker, broker)
 
         if df_ohlc is None or df_ohlc.empty:
             return None
 
-        if isinstance(df_ohlc.columns, pd.MultiIndex):
-            df_ohlc.columns = [col[0] if isinstance(col, tuple) else col for col in df_ohlc.columns]
+        # Canonical bars pass through, other shapes (replay feeds) are converted here; the shallow
+        # copy takes the indicator columns without touching the source's frame
+        df_ohlc = normalize_bars(df_ohlc).copy(deep=False)
+
+        bar_ts = int(df_ohlc["ts"].iloc[-1])
+        if not state.is_new_bar(ticker, bar_ts):
+            return None
 
         if len(df_ohlc) < 26:
             print(f"Dados insuficientes para calcular indicadores (mínimo: 26 linhas): {len(df_ohlc)}")
+            state.mark_bar(ticker, bar_ts)
             return None
         else:
-            df_ohlc = calculate_rsi(df_ohlc)
-            df_ohlc = calculate_macd(df_ohlc)
-            df_ohlc = calculate_stochastic(df_ohlc)
+            strategies = strategies_for_profile(STRATEGY_PROFILE)
+            with tag(symbol=ticker, stage="indicators"):
+                df_ohlc = indicator_engine.compute(df_ohlc, ticker, interval, strategies, extra=ALERT_INDICATORS)
 
         if df_ohlc is None:
             return None
         else:
 
             latest = df_ohlc.iloc[-1]
-            investimentStrategy = InvestmentStrategy(StrategyProfileEnum.DAYTRADE, latest, [])
-            trades = investimentStrategy.apply()
+            investimentStrategy = InvestmentStrategy(STRATEGY_PROFILE, df_ohlc, [])
+            with tag(symbol=ticker, stage="strategies"):
+                trades = investimentStrategy.apply()
 
-            if trades is empty:
+            # The bar only counts as evaluated once its strategies ran; a failure is retried next cycle
+            changed = state.transitions(ticker, {trade["strategy"]: trade["signal"] for trade in trades or []})
+            state.mark_bar(ticker, bar_ts)
+            trades = [trade for trade in trades or [] if trade["strategy"] in changed]
+            if not trades:
                 return None
             else:
+                results = []
                 for trade in trades:
                     signal = trade["signal"]
                     strategy = trade["strategy"]
                     entry = trade["entry"]
                     sl = trade["stop_loss"]
-                    tp = trade["take_profit"]
+                    tp = trade.get("take_profit")
 
                     msg = format_signal(ticker, signal, strategy, entry, sl, tp, latest)
                     print(msg)
                     print("-" * 10)
 
-                    send_telegram_alert(msg)
+                    alert(msg)
+                    if chart_service is not None:
+                        # The callback runs after the loop, so the caption is bound to this trade now
+                        caption = f"{ticker} {signal} ({strategy})"
+                        chart_service.attach(
+                            signal_chart(chart_service, ticker, interval, df_ohlc, signal, entry, sl, tp),
+                            lambda path, caption=caption: send_telegram_photo(path, caption))
 
-                    return {
+                    results.append({
                         "ativo": ticker,
                         "signal": signal,
                         "strategy": strategy,
@@ -100,8 +211,9 @@ def check_signals(ticker, broker):
                         "stoch_d": latest["stoch_d"],
                         "macd": latest["macd"],
                         "macd_signal": latest["macd_signal"],
-                        "timestamp": to_datetime(latest.name).strftime("%Y-%m-%d %H:%M:%S")
-                    }
+                        "timestamp": to_datetime(latest["ts"], unit="ms").strftime("%Y-%m-%d %H:%M:%S")
+                    })
+                return results
 
     except Exception as e:
         print(f"⚠️ Erro ao analisar {ticker}: {e}")
@@ -109,16 +221,7 @@ def check_signals(ticker, broker):
         return None
 
 
-def search_for_signals(export_file="last_signals.csv", ignore_market_hours=False):
-
-    print("✅ Executando análise durante o pregão...")
-
-    if not os.path.exists(export_file):
-        pd.DataFrame(columns=[
-            "ativo", "signal", "strategy", "entry", "stop_loss", "take_profit",
-            "rsi", "stoch_k", "stoch_d", "macd", "macd_signal", "timestamp"
-        ]).to_csv(export_file, index=False)
-
+def load_assets():
     assets = []
     stocks = read_stocks_symbols_from_csv("../quantfury_tickers.csv")
     for broker, symbols in stocks.items():
@@ -128,16 +231,122 @@ def search_for_signals(export_file="last_signals.csv", ignore_market_hours=False
     cryptos = read_crypto_symbols_from_csv("../quantfury_crypto_tickers.csv")
     for s in cryptos:
         assets.append((s, "BINANCE"))
+    return assets
+
+
+def prefetch_b3(assets, source=None):
+    """Downloads the cycle's B3 bars for every B3 asset at once, in batched multi-ticker requests."""
+    symbols = [symbol for symbol, broker in assets if broker == "B3"]
+    b3_frames.clear()
+    if symbols:
+        source, interval = (source, B3_INTERVAL) if source is not None else data_sources()["B3"]
+        with tag(stage="fetch_b3"):
+            b3_frames.update(source.fetch_many(symbols, interval))
+
+
+def create_export_file(export_file):
+    if not os.path.exists(export_file):
+        pd.DataFrame(columns=[
+            "ativo", "signal", "strategy", "entry", "stop_loss", "take_profit",
+            "rsi", "stoch_k", "stoch_d", "macd", "macd_signal", "timestamp"
+        ]).to_csv(export_file, index=False)
+
+
+def search_for_signals(export_file="last_signals.csv", ignore_market_hours=False, sharded_monitor=None):
+    """
+    Runs one scan of the universe, on a thread pool or, when given, on a ShardedMonitor's processes.
+    """
+    global _executor
+
+    print("✅ Executando análise durante o pregão...")
+
+    create_export_file(export_file)
+
+    assets = load_assets()
 
     all_results = []
 
-    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        futures = [executor.submit(check_signals, s, b) for s, b in assets]
+    if sharded_monitor is not None:
+        all_results = sharded_monitor.run_cycle(assets)
+    else:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+        prefetch_b3(assets)
+        live_windows.reserve(ticker for ticker, _ in assets)
+        futures = [_executor.submit(check_signals, s, b) for s, b in assets]
         for future in as_completed(futures):
             result = future.result()
             if result:
-                all_results.append(result)
+                all_results.extend(result)
+
+    if correlation_engine is not None:
+        if sharded_monitor is None:
+            update_correlation()
+        warn_correlated_signals(all_results)
+
+    if spread_scanner is not None and sharded_monitor is None:
+        warn_spreads()
+
+    export_signals(all_results, export_file)
+    if checkpoint_dir:
+        save_checkpoint(checkpoint_dir, live_windows, signal_state, open_signals)
+    else:
+        signal_state.save()
+    live_windows.flush()
 
+
+def update_correlation():
+    """
+    Adds the 15m bars closed since the last cycle, resampled from the live windows (1m or 15m),
+    to the correlation engine.
+    """
+    bars = {symbol: live_windows.frame(symbol) for symbol in correlation_engine.symbols if symbol in live_windows}
+    if not bars:
+        return
+    intervals_ms = {symbol: INTERVAL_MS[live_intervals[symbol]] for symbol in bars if symbol in live_intervals}
+    with tag(stage="correlation"):
+        correlation_engine.update_closes(closed_closes(bars, intervals_ms, time.time() * 1000))
+
+
+def warn_correlated_signals(all_results):
+    now_ms = time.time() * 1000
+    track_open_signals(open_signals, [], now_ms)
+    exposure = {asset: entry["signal"] for asset, entry in open_signals.items()}
+    for signal, pairs in flag_correlated(all_results, exposure, correlation_engine):
+        correlated = ", ".join(f"{asset} (ρ={rho:.2f})" for asset, rho in pairs)
+        msg = f"⚠️ Exposição correlacionada: {signal['signal']} {signal['ativo']} com {correlated}"
+        print(msg)
+        send_telegram_alert(msg)
+    intervals_ms = {asset: INTERVAL_MS[interval] for asset, interval in live_intervals.items()}
+    track_open_signals(open_signals, all_results, now_ms, intervals_ms)
+
+
+def warn_spreads():
+    """Alerts the spreads that became extreme this cycle, from the bars already in the live windows."""
+    bars = {symbol: live_windows.frame(symbol) for symbol in spread_scanner.symbols if symbol in live_windows}
+    with tag(stage="spreads"):
+        spreads = spread_scanner.scan(bars)
+    for row in spreads.itertuples(index=False):
+        level = ("ALTO" if row.zscore > 0 else "BAIXO") if row.extreme else "NORMAL"
+        if not signal_state.transitions(f"{row.symbol}~{row.reference}", {"spread": level}) or level == "NORMAL":
+            continue
+        msg = (f"↔️ Spread {level}: {row.symbol} vs {row.reference} {row.spread_bps:+.1f} bps "
+               f"(z={row.zscore:+.2f}, câmbio {row.fx})")
+        print(msg)
+        send_telegram_alert(msg)
+
+
+def load_correlation_engine(data_dir):
+    """Seeds the correlation engine with the recorded bars of a folder (<symbol>.parquet/.csv)."""
+    from replay import load_recorded_bars
+
+    bars = load_recorded_bars(data_dir)
+    closes = align_closes({symbol: resample_closes(df) for symbol, df in bars.items()})
+    print(f"🔗 Correlação de {closes.shape[1]} ativos carregada de {data_dir}")
+    return RollingCorrelation.from_prices(closes)
+
+
+def export_signals(all_results, export_file):
     if all_results:
         pd.DataFrame(all_results).to_csv(export_file, mode='a', header=False, index=False)
         print(f"📁 {len(all_results)} sinais exportados para {export_file}")
@@ -145,15 +354,80 @@ def search_for_signals(export_file="last_signals.csv", ignore_market_hours=False
         print("⚠️ Nenhum sinal gerado nesta rodada.")
 
 
-def main_loop():
-    while True:
-        print(f"⏱️ Executando análise às {datetime.now().strftime('%H:%M:%S')}...")
+def main_loop(workers=0, profiler=None):
+    """
+    Scans the universe every 15 minutes. With a Profiler, cycles over its time budget (or
+    requested with SIGUSR1) are sampled and dumped as folded stacks.
+    """
+    sharded_monitor = ShardedMonitor(n_workers=workers).start() if workers else None
+    cycle = 0
+    try:
+        while True:
+            cycle += 1
+            print(f"⏱️ Executando análise às {datetime.now().strftime('%H:%M:%S')}...")
+
+            with profiler.cycle("monitor", cycle=cycle) if profiler else nullcontext():
+                search_for_signals(ignore_market_hours=True, sharded_monitor=sharded_monitor)
+
+            INTERVALO_MINUTOS = 15
+            print(f"⏳ Aguardando {INTERVALO_MINUTOS} minuto(s) para a próxima execução...")
+            time.sleep(INTERVALO_MINUTOS * 60)
+    finally:
+        if sharded_monitor is not None:
+            sharded_monitor.stop()
+        if checkpoint_dir:
+            save_checkpoint(checkpoint_dir, live_windows, signal_state, open_signals)
+            print(f"💾 Checkpoint salvo em {checkpoint_dir}")
 
-        search_for_signals(ignore_market_hours=True)
 
-        INTERVALO_MINUTOS = 15
-        print(f"⏳ Aguardando {INTERVALO_MINUTOS} minuto(s) para a próxima execução...")
-        time.sleep(INTERVALO_MINUTOS * 60)
+def restore_checkpoint(directory):
+    """Loads the live windows, signal state and open signals of a checkpoint before the first cycle."""
+    global signal_state
+    signal_state = SignalStateTable(state_path(directory))
+    meta = load_checkpoint(directory, live_windows)
+    if meta is None:
+        print(f"⚠️ Nenhum checkpoint em {directory}, começando do zero")
+        return
+    open_signals.update(meta["open_signals"])
+    age = (time.time() * 1000 - meta["saved_at"]) / 60_000
+    print(f"♻️ Checkpoint restaurado: {len(meta['symbols'])} ativos, de {age:.0f} minuto(s) atrás")
 
 if __name__ == "__main__":
-    main_loop()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Monitor de sinais")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="processos do modo sharded (0 = um processo com threads)")
+    parser.add_argument("--correlation-data", help="pasta de candles para alertar sinais correlacionados")
+    parser.add_argument("--profile-budget", type=float,
+                        help="amostra as pilhas dos ciclos que passarem deste tempo (segundos)")
+    parser.add_argument("--profile", action="store_true", help="amostra todos os ciclos")
+    parser.add_argument("--profile-dir", default="../profiles")
+    parser.add_argument("--charts", action="store_true", help="envia o gráfico de cada sinal no Telegram")
+    parser.add_argument("--chart-dir", default=DEFAULT_CHART_DIR)
+    parser.add_argument("--state-file", default=DEFAULT_STATE_FILE,
+                        help="estado por ativo (último candle e último sinal por estratégia)")
+    parser.add_argument("--live-windows",
+                        help="arquivo mapeado em memória com as janelas de candles (só no modo com threads)")
+    parser.add_argument("--checkpoint-dir",
+                        help="salva e restaura candles, estado e sinais entre execuções (só no modo com threads)")
+    parser.add_argument("--spreads", action="store_true",
+                        help="alerta spreads extremos entre pares do mesmo ativo (só no modo com threads)")
+    args = parser.parse_args()
+    signal_state = SignalStateTable(args.state_file)
+    if args.live_windows and not args.workers:
+        live_windows = LiveWindowStore(capacity=max(LIVE_BARS.values()), path=args.live_windows)
+    if args.checkpoint_dir and not args.workers:
+        checkpoint_dir = args.checkpoint_dir
+        restore_checkpoint(checkpoint_dir)
+        # A deploy's SIGTERM goes through main_loop's finally, which writes the last checkpoint
+        os_signal.signal(os_signal.SIGTERM, lambda *_: sys.exit(0))
+    if args.charts:
+        chart_service = ChartService(args.chart_dir)
+    if args.spreads:
+        spread_scanner = SpreadScanner(read_crypto_symbols_from_csv("../quantfury_crypto_tickers.csv"))
+    if args.correlation_data:
+        correlation_engine = load_correlation_engine(args.correlation_data)
+
+    # Always installed, so SIGUSR1 profiles the next cycle of any running monitor instead of killing it
+    profiler = Profiler(args.profile_budget, args.profile_dir, always=args.profile)
+    profiler.install_signal()
+    main_loop(workers=args.workers, profiler=profiler)
\ No newline at end of file
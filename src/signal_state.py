@@ -0,0 +1,65 @@
+import json
+import os
+import threading
+
+DEFAULT_STATE_FILE = "signal_state.json"
+
+
+class SignalStateTable:
+    """
+    Per symbol, the time (epoch ms) of the last bar evaluated by the monitor and the last signal
+    of each strategy, so a cycle can skip symbols without a new bar and alert only on signal
+    transitions. Shared by the monitor's threads; persisted as JSON to `path` by save() (kept in
+    memory only when path is None).
+    """
+    def __init__(self, path=None):
+        self.path = path
+        self.symbols = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.symbols = json.load(f)
+
+    def _entry(self, symbol):
+        return self.symbols.setdefault(symbol, {"last_bar": None, "signals": {}})
+
+    def is_new_bar(self, symbol, bar_ts):
+        """False if bar_ts (or a newer bar) was already evaluated for the symbol."""
+        with self._lock:
+            last_bar = self.symbols.get(symbol, {}).get("last_bar")
+            return last_bar is None or bar_ts > last_bar
+
+    def mark_bar(self, symbol, bar_ts):
+        """Records bar_ts as the symbol's last evaluated bar (called once its evaluation succeeded)."""
+        with self._lock:
+            entry = self._entry(symbol)
+            if entry["last_bar"] is None or bar_ts > entry["last_bar"]:
+                entry["last_bar"] = int(bar_ts)
+                self._dirty = True
+
+    def transitions(self, symbol, signals):
+        """
+        Replaces the symbol's signals ({strategy: signal}) and returns the ones that differ from
+        the previous bar's. Strategies missing from `signals` are cleared, so a setup that goes
+        away and comes back is a new transition.
+        """
+        with self._lock:
+            entry = self._entry(symbol)
+            previous = entry["signals"]
+            changed = {strategy: signal for strategy, signal in signals.items() if previous.get(strategy) != signal}
+            if signals != previous:
+                entry["signals"] = dict(signals)
+                self._dirty = True
+            return changed
+
+    def save(self):
+        """Writes the table to `path` (atomically) if it changed since the last save."""
+        with self._lock:
+            if not self.path or not self._dirty:
+                return
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.symbols, f)
+            os.replace(tmp, self.path)
+            self._dirty = False
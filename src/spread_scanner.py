@@ -0,0 +1,133 @@
+"""
+Cross-venue spread and basis scanner: the same base asset quoted in several currencies (BTC-USDT,
+BTC-USD, BTC-BRL, ...) is converted to one reference quote and compared bar by bar, and spreads
+far from their recent mean (in z-scores) are flagged. It reads the bars the monitor already
+fetched, so it adds no requests to the cycle.
+"""
+import numpy as np
+import pandas as pd
+
+REFERENCE_QUOTE = "USDT"
+ANCHOR_BASE = "BTC"
+# Quotes treated as 1:1 with the reference when no FX pair is available (their spread is the basis)
+PEGS = {"USD": 1.0, "USDC": 1.0, "FDUSD": 1.0}
+SPREAD_WINDOW = 96
+SPREAD_Z_THRESHOLD = 3.0
+ASOF_TOLERANCE_BARS = 1
+BAR_MS = 900_000
+
+
+def split_pair(symbol):
+    """("BTC", "USDT") for "BTC-USDT", or None for symbols that are not BASE-QUOTE pairs."""
+    parts = symbol.split("-")
+    return (parts[0], parts[1]) if len(parts) == 2 and all(parts) else None
+
+
+def group_pairs(symbols, reference=REFERENCE_QUOTE):
+    """{base: {quote: symbol}} for the bases quoted in the reference currency and at least one other."""
+    groups = {}
+    for symbol in symbols:
+        pair = split_pair(symbol)
+        if pair is not None:
+            groups.setdefault(pair[0], {})[pair[1]] = symbol
+    return {base: quotes for base, quotes in groups.items() if reference in quotes and len(quotes) > 1}
+
+
+def asof_align(target_ts, ts, values, tolerance_ms):
+    """
+    As-of join of one series on a timeline: for each target time, the last value at or before it,
+    NaN when there is none within `tolerance_ms`.
+    """
+    ts = np.asarray(ts, dtype=np.int64)
+    if len(ts) == 0:
+        return np.full(len(target_ts), np.nan)
+    positions = np.searchsorted(ts, target_ts, side="right") - 1
+    clipped = np.maximum(positions, 0)
+    found = (positions >= 0) & (target_ts - ts[clipped] <= tolerance_ms)
+    return np.where(found, np.asarray(values, dtype=np.float64)[clipped], np.nan)
+
+
+class SpreadScanner:
+    """
+    Spreads of every quote of a base against its reference pair, in basis points of the reference
+    price: log(price / fx / reference price) * 1e4, where fx converts the quote to the reference
+    currency. fx comes from a cross pair among the bars (USDT-BRL, or BRL-USDT inverted), a peg
+    (PEGS) or, failing both, is implied by the anchor base (BTC-BRL / BTC-USDT), so the other
+    bases are measured against BTC's own premium in that currency.
+    """
+    def __init__(self, symbols, reference=REFERENCE_QUOTE, anchor=ANCHOR_BASE, window=SPREAD_WINDOW,
+                 threshold=SPREAD_Z_THRESHOLD, tolerance_ms=ASOF_TOLERANCE_BARS * BAR_MS):
+        self.symbols = list(symbols)
+        self.reference = reference
+        self.anchor = anchor
+        self.window = window
+        self.threshold = threshold
+        self.tolerance_ms = tolerance_ms
+        self.groups = group_pairs(self.symbols, reference)
+
+    def _close(self, bars, symbol, target_ts):
+        df = bars.get(symbol)
+        if df is None or df.empty:
+            return None
+        return asof_align(target_ts, df["ts"].to_numpy(), df["close"].to_numpy(), self.tolerance_ms)
+
+    def _fx(self, bars, base, quote, target_ts):
+        """(quote units per reference unit on the timeline, source), or (None, None)."""
+        direct = self._close(bars, f"{self.reference}-{quote}", target_ts)
+        if direct is not None:
+            return direct, "cross"
+        inverse = self._close(bars, f"{quote}-{self.reference}", target_ts)
+        if inverse is not None:
+            return 1 / inverse, "cross"
+        if quote in PEGS:
+            return np.full(len(target_ts), PEGS[quote]), "peg"
+        anchor = self.groups.get(self.anchor, {})
+        if base != self.anchor and quote in anchor:
+            anchor_quote = self._close(bars, anchor[quote], target_ts)
+            anchor_reference = self._close(bars, anchor[self.reference], target_ts)
+            if anchor_quote is not None and anchor_reference is not None:
+                return anchor_quote / anchor_reference, "implied"
+        return None, None
+
+    def spreads(self, bars):
+        """
+        {(symbol, reference symbol): (ts, spread in bps, fx source)} for every pair with bars.
+        :param bars: dict symbol -> canonical bars (e.g. the monitor's live windows).
+        """
+        result = {}
+        for base, quotes in self.groups.items():
+            reference = bars.get(quotes[self.reference])
+            if reference is None or reference.empty:
+                continue
+            target_ts = reference["ts"].to_numpy()
+            reference_close = reference["close"].to_numpy(dtype=np.float64)
+            for quote, symbol in quotes.items():
+                if quote == self.reference:
+                    continue
+                close = self._close(bars, symbol, target_ts)
+                fx, source = self._fx(bars, base, quote, target_ts)
+                if close is None or fx is None:
+                    continue
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    spread = np.log(close / fx / reference_close) * 1e4
+                result[(symbol, quotes[self.reference])] = (target_ts, spread, source)
+        return result
+
+    def scan(self, bars):
+        """
+        Last spread of each pair with its z-score over the last `window` bars, strongest first;
+        "extreme" marks |z| >= threshold.
+        """
+        rows = []
+        for (symbol, reference), (ts, spread, source) in self.spreads(bars).items():
+            recent = spread[-self.window:]
+            recent = recent[np.isfinite(recent)]
+            if len(recent) < 3 or not np.isfinite(spread[-1]):
+                continue
+            std = recent.std(ddof=1)
+            zscore = (spread[-1] - recent.mean()) / std if std > 0 else 0.0
+            rows.append({"symbol": symbol, "reference": reference, "ts": int(ts[-1]),
+                         "spread_bps": round(float(spread[-1]), 2), "zscore": round(float(zscore), 2),
+                         "fx": source, "extreme": bool(abs(zscore) >= self.threshold)})
+        rows.sort(key=lambda row: -abs(row["zscore"]))
+        return pd.DataFrame(rows, columns=["symbol", "reference", "ts", "spread_bps", "zscore", "fx", "extreme"])
@@ -0,0 +1,78 @@
+"""
+Built-in indicators and strategies. Importing this module registers them in strategy_registry.
+"""
+from candlestickpattern.one_two_three_pattern import OneTwoThreePattern
+from indicators import calculate_rsi, calculate_macd, calculate_stochastic, calculate_bollinger_bands, calculate_cci, \
+    calculate_ema
+import indicator_kernels
+import signal_generators
+from strategy_profile_enum import StrategyProfileEnum
+from strategy_registry import register_indicator, register_strategy, register_signal, signal_columns, INDICATORS
+
+
+def _bollinger_bands(df, period, multiplier):
+    bands = calculate_bollinger_bands(df, price_column="close", period=period, multiplier=multiplier)
+    df[list(bands.columns)] = bands
+    return df
+
+
+def _ema(df, span):
+    df["ema"] = calculate_ema(df["close"], span=span)
+    return df
+
+
+def _sma(df, period):
+    df["sma"] = indicator_kernels.sma(indicator_kernels.as_array(df["close"]), period)
+    return df
+
+
+def _cci(df, period):
+    df["cci_fast"] = calculate_cci(df["high"].tolist(), df["low"].tolist(), df["close"].tolist(), period=period)
+    return df
+
+
+def _cci_sma(df, period):
+    df["cci_sma"] = df["cci_fast"].rolling(period).mean()
+    return df
+
+
+register_indicator("rsi", calculate_rsi, ["rsi"], length=14)
+register_indicator("macd", calculate_macd, ["macd", "macd_signal", "macd_hist"],
+                   fast_period=12, slow_period=26, signal_period=9)
+register_indicator("stochastic", calculate_stochastic, ["stoch_k", "stoch_d"], k_period=14, d_period=3)
+register_indicator("bollinger", _bollinger_bands, ["Upper Band", "Middle Band", "Lower Band"], period=20, multiplier=2)
+register_indicator("ema", _ema, ["ema"], span=200)
+register_indicator("sma", _sma, ["sma"], period=50)
+register_indicator("cci", _cci, ["cci_fast"], period=72)
+register_indicator("cci_sma", _cci_sma, ["cci_sma"], depends_on=["cci"], period=5)
+
+# Indicators shown in the alert message of every signal
+ALERT_INDICATORS = ["rsi", "macd", "stochastic"]
+
+
+# Kept out of DAYTRADE, the live monitor's profile, which never sent 123-pattern alerts
+@register_strategy("123_pattern", profiles=[StrategyProfileEnum.POSITION])
+def one_two_three_pattern(df, trades):
+    if len(df) >= 3:
+        OneTwoThreePattern(df.tail(3), trades).validate()
+
+
+@register_strategy("bollinger_cci", indicators=["bollinger", "cci_sma"], profiles=[StrategyProfileEnum.SWING])
+def bollinger_cci(df, trades):
+    from investment_strategy import detect_bollinger_cci_strategy
+
+    detect_bollinger_cci_strategy(df, trades)
+
+
+def _stochastic_cross(df):
+    params = INDICATORS["stochastic"].params
+    return signal_generators.stochastic_cross(df, warmup=params["k_period"] + params["d_period"])
+
+
+# Backtest signals, in the priority order the backtester resolves them
+register_signal("shadow_reversal", "signal_shadow", fn=signal_generators.shadow_reversal)
+register_signal("engulfing", "signal_engulfing", fn=signal_generators.engulfing)
+register_signal("inside_bar", "signal_insidebar", fn=signal_generators.inside_bar)
+register_signal("stochastic_cross", "signal_stochastic", indicators=["stochastic"], fn=_stochastic_cross)
+
+SIGNAL_COLUMNS = signal_columns()
@@ -2,7 +2,7 @@ from enum import Enum
 
 
 class StrategyProfileEnum(Enum):
-    POSITION: 1
-    SWING: 2
-    DAYTRADE: 3
-    SCALPING: 4
+    POSITION = 1
+    SWING = 2
+    DAYTRADE = 3
+    SCALPING = 4
@@ -0,0 +1,187 @@
+import threading
+from collections import OrderedDict
+
+INDICATORS = {}
+STRATEGIES = {}
+
+DEFAULT_CACHE_ENTRIES = 8192
+
+
+class Indicator:
+    """
+    An indicator the engine can compute: `fn(df, **params)` adds `columns` to df and returns it.
+    `depends_on` lists indicators whose columns must exist before fn runs.
+    """
+    def __init__(self, name, fn, columns, params=None, depends_on=()):
+        self.name = name
+        self.fn = fn
+        self.columns = list(columns)
+        self.params = dict(params or {})
+        self.depends_on = list(depends_on)
+
+    def column_names(self, params):
+        """Default parameters keep the plain column names; other variants get the values appended."""
+        merged = {**self.params, **params}
+        if merged == self.params:
+            return list(self.columns)
+        suffix = "_".join(str(merged[key]) for key in sorted(merged))
+        return [f"{col}_{suffix}" for col in self.columns]
+
+
+class Strategy:
+    """
+    A trading strategy: `fn(df, trades)` appends trade dicts for the latest setup found in df.
+    `indicators` is a list of indicator names or (name, params) tuples the strategy reads.
+    Strategies with a `signal_column` also produce a signal column for the backtester, computed by
+    `signal_fn(df)` as int8 codes (1 BUY, -1 SELL, 0).
+    """
+    def __init__(self, name, fn, indicators=(), profiles=(), signal_column=None, signal_fn=None):
+        self.name = name
+        self.fn = fn
+        self.indicators = [(ind, {}) if isinstance(ind, str) else (ind[0], dict(ind[1])) for ind in indicators]
+        self.profiles = list(profiles)
+        self.signal_column = signal_column
+        self.signal_fn = signal_fn
+
+
+def register_indicator(name, fn, columns, depends_on=(), **params):
+    INDICATORS[name] = Indicator(name, fn, columns, params, depends_on)
+    return INDICATORS[name]
+
+
+def register_strategy(name, indicators=(), profiles=(), signal_column=None):
+    """
+    Decorator registering a strategy function under `name`.
+    """
+    def decorator(fn):
+        STRATEGIES[name] = Strategy(name, fn, indicators, profiles, signal_column)
+        return fn
+    return decorator
+
+
+def register_signal(name, signal_column, indicators=(), fn=None):
+    """
+    Registers a backtest signal whose column is produced by `fn` in the signal generation stage
+    (see strategy_runner).
+    """
+    STRATEGIES[name] = Strategy(name, None, indicators, signal_column=signal_column, signal_fn=fn)
+    return STRATEGIES[name]
+
+
+def strategies_for_profile(profile):
+    return [strategy for strategy in STRATEGIES.values() if profile in strategy.profiles]
+
+
+def signal_columns():
+    """Backtest signal columns of the registered strategies, in registration (priority) order."""
+    return [strategy.signal_column for strategy in STRATEGIES.values() if strategy.signal_column]
+
+
+def signal_strategies():
+    """Strategies producing a backtest signal column, in registration (priority) order."""
+    return [strategy for strategy in STRATEGIES.values() if strategy.signal_column]
+
+
+def resolve_indicators(requirements):
+    """
+    Expands (name, params) requirements with their dependencies and returns them in
+    topological order, each distinct (name, params) pair once.
+    """
+    ordered = []
+    seen = set()
+    visiting = set()
+
+    def visit(name, params):
+        if name not in INDICATORS:
+            raise KeyError(f"Unknown indicator '{name}'")
+        # Parameters equal to the defaults do not make a distinct indicator
+        defaults = INDICATORS[name].params
+        params = {k: v for k, v in params.items() if k not in defaults or defaults[k] != v}
+        key = (name, tuple(sorted(params.items())))
+        if key in seen:
+            return
+        if key in visiting:
+            raise ValueError(f"Circular indicator dependency at '{name}'")
+        visiting.add(key)
+        for dependency in INDICATORS[name].depends_on:
+            visit(dependency, {})
+        visiting.discard(key)
+        seen.add(key)
+        ordered.append((name, params))
+
+    for name, params in requirements:
+        visit(name, params)
+    return ordered
+
+
+def last_bar_key(df):
+    """Identifies the last bar of a frame: its timestamp (Date/date column or index) and length."""
+    for col in ("Date", "date", "timestamp", "ts"):
+        if col in df.columns:
+            return str(df[col].iloc[-1]), len(df)
+    return str(df.index[-1]), len(df)
+
+
+class IndicatorEngine:
+    """
+    Computes the indicators required by a set of strategies, each distinct indicator once per
+    (symbol, interval, params, last bar), memoized in a bounded LRU cache shared by all callers.
+    """
+    def __init__(self, max_entries=DEFAULT_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, key):
+        with self.lock:
+            values = self.cache.get(key)
+            if values is not None:
+                self.cache.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+            return values
+
+    def _put(self, key, values):
+        with self.lock:
+            self.cache[key] = values
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.max_entries:
+                self.cache.popitem(last=False)
+
+    def compute(self, df, symbol, interval, strategies=(), extra=()):
+        """
+        Adds to df the columns of every indicator needed by `strategies` plus `extra`
+        (name or (name, params) requirements) and returns df.
+        """
+        requirements = [req for strategy in strategies for req in strategy.indicators]
+        requirements += [(req, {}) if isinstance(req, str) else req for req in extra]
+        bar_key = last_bar_key(df)
+
+        for name, params in resolve_indicators(requirements):
+            indicator = INDICATORS[name]
+            names = indicator.column_names(params)
+            key = (symbol, interval, name, tuple(sorted(params.items())), bar_key)
+            values = self._get(key)
+            if values is None:
+                # Non-default variants run on a copy so they do not overwrite the default columns
+                target = df if names == indicator.columns else df.copy()
+                result = indicator.fn(target, **{**indicator.params, **params})
+                if result is None:
+                    raise RuntimeError(f"Indicator '{name}' failed for {symbol}")
+                values = [result[col].to_numpy() for col in indicator.columns]
+                self._put(key, values)
+            for col, column_values in zip(names, values):
+                df[col] = column_values
+        return df
+
+
+def run_strategies(df, strategies):
+    """Runs each strategy over an indicator frame and returns all the trades they emit."""
+    trades = []
+    for strategy in strategies:
+        if strategy.fn is not None:
+            strategy.fn(df, trades)
+    return trades
@@ -0,0 +1,61 @@
+"""
+Signal generation stage of the backtester: computes every registered backtest signal over a bar
+frame as vectorized int8 codes, stored together in one signal matrix.
+"""
+import numpy as np
+import pandas as pd
+
+import strategy_catalog  # noqa: F401 (registers the built-in signals)
+from strategy_registry import IndicatorEngine, signal_strategies
+
+OHLC_COLUMNS = ("open", "high", "low", "close")
+
+# Backtests read each bar once: indicators are computed without memoization
+_indicator_engine = IndicatorEngine(max_entries=0)
+
+
+def ohlc_frame(df):
+    """Lowercase open/high/low/close copy of a frame with "Close" or "close" style columns."""
+    columns = {}
+    for col in OHLC_COLUMNS:
+        source = col if col in df.columns else col.capitalize()
+        columns[col] = df[source].to_numpy(dtype=np.float64)
+    return pd.DataFrame(columns)
+
+
+def enabled_signals(params=None):
+    """
+    Signal strategies switched on in params, by strategy name ("engulfing") or signal column
+    ("signal_stochastic"); all of them when params names none.
+    """
+    strategies = signal_strategies()
+    params = params or {}
+    named = [s for s in strategies if s.name in params or s.signal_column in params]
+    if not named:
+        return strategies
+    return [s for s in named if params.get(s.name, params.get(s.signal_column))]
+
+
+def signal_matrix(df, strategies=None):
+    """
+    Computes the signals of `strategies` (default: every registered signal) over an OHLC frame.
+    :return: (matrix, columns): an (n_bars, n_strategies) int8 matrix of 1/-1/0 codes and the
+             signal column of each matrix column, in priority order.
+    """
+    strategies = signal_strategies() if strategies is None else strategies
+    bars = _indicator_engine.compute(ohlc_frame(df), "", "", strategies)
+    matrix = np.zeros((len(bars), len(strategies)), dtype=np.int8)
+    for k, strategy in enumerate(strategies):
+        matrix[:, k] = strategy.signal_fn(bars)
+    return matrix, [strategy.signal_column for strategy in strategies]
+
+
+def apply_strategy(df, params=None):
+    """
+    Adds the int8 signal columns of the strategies enabled in params to df and returns it.
+    """
+    matrix, columns = signal_matrix(df, enabled_signals(params))
+    for k, col in enumerate(columns):
+        df[col] = matrix[:, k]
+    return df
+
@@ -9,6 +9,8 @@ import pytz
 import requests
 from polygon import RESTClient
 
+from b3_data import download_batch, split_wide
+
 logging.getLogger("yfinance").setLevel(logging.CRITICAL)
 
 config = configparser.ConfigParser()
@@ -44,6 +46,20 @@ def get_binance_ohlc(symbol, interval='1h', limit=1000):
     return df
 
 
+def load_data_yfinance(symbol, period="30d", interval="15m"):
+    """
+    OHLCV frame (Open/High/Low/Close/Volume) of one yfinance ticker (B3 tickers take the .SA suffix),
+    or None. The whole B3 universe is loaded in batches by b3_data.load_b3_universe.
+    """
+    return split_wide(download_batch([symbol], period=period, interval=interval), [symbol]).get(symbol)
+
+
+def is_market_open_now():
+    """True during the B3 trading session (weekdays, 10:00-18:00 in São Paulo)."""
+    now = datetime.now(pytz.timezone("America/Sao_Paulo"))
+    return now.weekday() < 5 and time(10, 0) <= now.time() <= time(18, 0)
+
+
 def read_crypto_symbols_from_csv(filepath="../quantfury_crypto_tickers.csv"):
     """
     Reads a CSV file and returns a dictionary of symbols grouped by broker.
@@ -150,6 +166,21 @@ def send_telegram_alert(text):
         print(f"Erro ao enviar para o Telegram: {e}")
 
 
+def send_telegram_photo(path, caption=""):
+    config = configparser.ConfigParser()
+    config.read("../config.ini")
+
+    token = config.get("telegram", "token")
+    chat_id = config.get("telegram", "chat_id")
+
+    url = f"https://api.telegram.org/bot{token}/sendPhoto"
+    try:
+        with open(path, "rb") as photo:
+            requests.post(url, data={"chat_id": chat_id, "caption": caption}, files={"photo": photo}, timeout=30)
+    except Exception as e:
+        print(f"Erro ao enviar gráfico para o Telegram: {e}")
+
+
 def get_config(config_file="../config.ini"):
     config = configparser.ConfigParser()
     config.read(config_file)
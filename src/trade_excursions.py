@@ -0,0 +1,196 @@
+"""
+Excursion statistics of long trades: maximum adverse and favorable excursion (MAE/MFE), bars
+from entry to the best price and bars spent below the entry price.
+
+The range extremes come from sparse tables over the symbol's High/Low built once per frame, so
+each trade is answered in O(1) whatever its length, and every trade of a frame at once.
+"""
+import numpy as np
+
+from exit_simulation import MAX_BLOCK_CELLS
+
+EXCURSION_COLUMNS = ("mae_%", "mfe_%", "bars_to_peak", "bars_under_water")
+LEVEL_EXITS = ("stop_loss", "take_profit")
+
+
+class RangeExtremes:
+    """
+    Sparse tables of the bar holding the highest High and the lowest Low of every range of
+    2^k bars (O(n log n) to build). Any [start, end] range is the union of two overlapping
+    2^k ranges, so its extreme is one comparison away; ties go to the earliest bar.
+    """
+    def __init__(self, high, low):
+        self.high = np.asarray(high, dtype=np.float64)
+        self.low = np.asarray(low, dtype=np.float64)
+        self.argmax = self._build(self.high, np.greater_equal)
+        self.argmin = self._build(self.low, np.less_equal)
+
+    @staticmethod
+    def _build(values, better):
+        n = len(values)
+        table = np.empty((max(1, n.bit_length()), n), dtype=np.int64)
+        table[0] = np.arange(n)
+        for k in range(1, len(table)):
+            half = 1 << (k - 1)
+            left, right = table[k - 1, :n - half], table[k - 1, half:]
+            table[k, :n - half] = np.where(better(values[left], values[right]), left, right)
+            table[k, n - half:] = table[k - 1, n - half:]  # ranges past the last bar are never queried
+        return table
+
+    @staticmethod
+    def _query(table, values, better, start, end):
+        start = np.asarray(start, dtype=np.int64)
+        end = np.asarray(end, dtype=np.int64)
+        k = np.frexp(end - start + 1)[1] - 1  # floor(log2(length))
+        left = table[k, start]
+        right = table[k, end - (1 << k) + 1]
+        return np.where(better(values[left], values[right]), left, right)
+
+    def max_index(self, start, end):
+        """Bar of the highest High in each [start, end] range (inclusive, start <= end)."""
+        return self._query(self.argmax, self.high, np.greater_equal, start, end)
+
+    def min_index(self, start, end):
+        """Bar of the lowest Low in each [start, end] range (inclusive, start <= end)."""
+        return self._query(self.argmin, self.low, np.less_equal, start, end)
+
+
+def _extremes(extremes, close, entry_index, exit_index, entry_price, exit_price, level_exit):
+    """Raw (peak, peak_bar, trough, bars under water) of the bars after entry_index up to exit_index."""
+    first = entry_index + 1
+    last = exit_index - level_exit
+    has_bars = last >= first
+    n = len(extremes.high)
+    start = np.clip(first, 0, n - 1)
+    end = np.clip(np.where(has_bars, last, first), 0, n - 1)
+
+    peak_bar = extremes.max_index(start, end)
+    trough_bar = extremes.min_index(start, end)
+    peak = np.where(has_bars, extremes.high[peak_bar], -np.inf)
+    trough = np.where(has_bars, extremes.low[trough_bar], np.inf)
+    # The exit fill is the last price seen by level exits
+    fill_peak = level_exit & (exit_price > peak)
+    peak = np.where(fill_peak, exit_price, peak)
+    peak_bar = np.where(fill_peak, exit_index, peak_bar)
+    trough = np.where(level_exit & (exit_price < trough), exit_price, trough)
+    under_water = bars_under_water(close, entry_index, exit_index, entry_price, exit_price, level_exit)
+    return peak, peak_bar, trough, under_water
+
+
+def _percent(entry_index, entry_price, peak, peak_bar, trough, under_water):
+    return {
+        "mae_%": np.round(np.minimum(trough - entry_price, 0) / entry_price * 100, 2),
+        "mfe_%": np.round(np.maximum(peak - entry_price, 0) / entry_price * 100, 2),
+        "bars_to_peak": peak_bar - entry_index,
+        "bars_under_water": under_water,
+    }
+
+
+def excursions(extremes, close, entry_index, exit_index, entry_price, exit_price, level_exit=None):
+    """
+    Excursions of long trades held from the close of their entry bar to their exit.
+
+    A trade sees the full range of the bars after its entry up to its exit bar. A trade closed
+    inside its exit bar (stop-loss/take-profit, `level_exit`) sees only its exit price there,
+    since the rest of that bar may have come after the fill.
+    :return: dict of arrays: "mae_%" (<= 0) and "mfe_%" (>= 0) from the entry price,
+             "bars_to_peak" (entry to the highest price seen) and "bars_under_water" (held
+             bars closing below the entry price).
+    """
+    entry_index = np.asarray(entry_index, dtype=np.int64)
+    exit_index = np.asarray(exit_index, dtype=np.int64)
+    entry_price = np.asarray(entry_price, dtype=np.float64)
+    exit_price = np.asarray(exit_price, dtype=np.float64)
+    level_exit = np.zeros(len(entry_index), dtype=bool) if level_exit is None else np.asarray(level_exit, dtype=bool)
+    raw = _extremes(extremes, close, entry_index, exit_index, entry_price, exit_price, level_exit)
+    return _percent(entry_index, entry_price, *raw)
+
+
+def bars_under_water(close, entry_index, exit_index, entry_price, exit_price, level_exit):
+    """Held bars (after the entry, up to the exit) closing below the entry price, trades in blocks."""
+    counts = np.zeros(len(entry_index), dtype=np.int64)
+    if len(entry_index) == 0:
+        return counts
+    horizon = int((exit_index - entry_index).max())
+    if horizon <= 0:
+        return counts
+    steps = np.arange(1, horizon + 1)
+    block = max(1, MAX_BLOCK_CELLS // horizon)
+    for start in range(0, len(entry_index), block):
+        stop = min(start + block, len(entry_index))
+        bars = entry_index[start:stop, None] + steps
+        held = bars <= exit_index[start:stop, None]
+        prices = close[np.clip(bars, 0, len(close) - 1)]
+        # Level exits leave their exit bar at the fill price
+        at_exit = (bars == exit_index[start:stop, None]) & level_exit[start:stop, None]
+        prices = np.where(at_exit, exit_price[start:stop, None], prices)
+        counts[start:stop] = (held & (prices < entry_price[start:stop, None])).sum(axis=1)
+    return counts
+
+
+def _merge(partial, peak, peak_bar, trough, under_water):
+    """Combines the excursion of a position's earlier bars (a dict, or None) with the one of its later bars."""
+    if partial is None:
+        return peak, peak_bar, trough, under_water
+    if partial["peak"] >= peak:
+        peak, peak_bar = partial["peak"], partial["peak_bar"]
+    return peak, peak_bar, min(partial["trough"], trough), partial["under_water"] + under_water
+
+
+def _resume(extremes, close, trade_entry, covered, offset, exit_index, entry_price, exit_price, level_exit, partial):
+    """
+    Raw excursion of a position from the first bar of the frame it has not seen yet (global
+    indexes), merged with the part seen in earlier frames.
+    """
+    # A virtual entry right before the first uncovered bar makes the new bars the ones "held"
+    start = max(trade_entry + 1, covered + 1, offset) - offset
+    raw = _extremes(extremes, close, np.array([start - 1]), np.array([exit_index - offset]),
+                    np.array([entry_price]), np.array([exit_price]), np.array([level_exit]))
+    peak, peak_bar, trough, under_water = (value[0].item() for value in raw)
+    return _merge(partial, peak, peak_bar + offset, trough, under_water)
+
+
+def add_excursions(trades, high, low, close, offset=0, state=None, carried=None):
+    """
+    Adds the EXCURSION_COLUMNS to the trades (dicts with global bar indexes) of a frame whose first
+    row is bar `offset`. With a BacktestState, a position still open at the end of the frame
+    keeps the excursion of its bars so far in state.excursion; `carried` is that excursion
+    for the position the frame started with, so trades spanning frames match a single run.
+    """
+    open_position = state is not None and state.in_position
+    if not trades and not open_position:
+        return trades
+    extremes = RangeExtremes(high, low)
+    close = np.asarray(close, dtype=np.float64)
+
+    inside = [trade for trade in trades if trade["entry_index"] >= offset]
+    if inside:
+        stats = excursions(
+            extremes, close,
+            [trade["entry_index"] - offset for trade in inside], [trade["exit_index"] - offset for trade in inside],
+            [trade["entry_price"] for trade in inside], [trade["exit_price"] for trade in inside],
+            [trade.get("exit_reason") in LEVEL_EXITS for trade in inside],
+        )
+        for i, trade in enumerate(inside):
+            for col in EXCURSION_COLUMNS:
+                trade[col] = stats[col][i].item()
+
+    if trades and trades[0]["entry_index"] < offset and carried is not None:
+        trade = trades[0]
+        raw = _resume(extremes, close, trade["entry_index"], carried["through"], offset, trade["exit_index"],
+                      trade["entry_price"], trade["exit_price"], trade.get("exit_reason") in LEVEL_EXITS, carried)
+        stats = _percent(trade["entry_index"], trade["entry_price"], *(np.float64(value) for value in raw))
+        for col in EXCURSION_COLUMNS:
+            trade[col] = stats[col].item() if col.endswith("%") else int(stats[col])
+
+    if open_position:
+        partial = carried if state.entry_index < offset else None
+        covered = partial["through"] if partial is not None else -1
+        last = offset + len(close) - 1
+        peak, peak_bar, trough, under_water = _resume(extremes, close, state.entry_index, covered, offset, last,
+                                                      state.entry_price, np.nan, False, partial)
+        state.excursion = {"peak": float(peak), "peak_bar": int(peak_bar), "trough": float(trough),
+                           "under_water": int(under_water), "through": last}
+    elif state is not None:
+        state.excursion = None
+    return trades
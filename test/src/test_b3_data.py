@@ -0,0 +1,110 @@
+import os
+import tempfile
+import threading
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from b3_data import OHLCV_FIELDS, fixture_download, load_b3_universe, record_fixture, split_wide
+
+
+def make_wide(tickers, n=30):
+    """A frame shaped like yf.download(tickers, group_by="column"): (Price, Ticker) columns."""
+    index = pd.date_range("2024-05-06 10:00", periods=n, freq="15min", tz="America/Sao_Paulo")
+    columns = pd.MultiIndex.from_product([["Close", "High", "Low", "Open", "Volume"], tickers],
+                                         names=["Price", "Ticker"])
+    wide = pd.DataFrame(index=index, columns=columns, dtype=np.float64)
+    for k, ticker in enumerate(tickers):
+        close = 10.0 * (k + 1) + np.arange(n)
+        wide[("Close", ticker)] = close
+        wide[("High", ticker)] = close + 1
+        wide[("Low", ticker)] = close - 1
+        wide[("Open", ticker)] = close - 0.5
+        wide[("Volume", ticker)] = 1000.0 * (k + 1)
+    return wide
+
+
+class FakeDownload:
+    def __init__(self, missing=()):
+        self.calls = []
+        self.missing = set(missing)
+        self.lock = threading.Lock()
+
+    def __call__(self, tickers, period=None, interval=None):
+        with self.lock:
+            self.calls.append(list(tickers))
+        wide = make_wide(tickers)
+        for ticker in self.missing & set(tickers):
+            wide.loc[:, (slice(None), ticker)] = np.nan
+        return wide
+
+
+class TestSplitWide(unittest.TestCase):
+
+    def test_splits_every_ticker(self):
+        frames = split_wide(make_wide(["PETR4.SA", "VALE3.SA"]), ["PETR4.SA", "VALE3.SA"])
+        self.assertEqual(set(frames), {"PETR4.SA", "VALE3.SA"})
+        vale = frames["VALE3.SA"]
+        self.assertEqual(list(vale.columns), OHLCV_FIELDS)
+        self.assertEqual(len(vale), 30)
+        self.assertEqual(vale["Close"].iloc[0], 20.0)
+        self.assertEqual(vale["High"].iloc[-1], 50.0)
+        self.assertEqual(vale["Volume"].iloc[0], 2000.0)
+
+    def test_drops_rows_without_bars(self):
+        wide = make_wide(["PETR4.SA", "ITUB4.SA"])
+        wide.iloc[:5, wide.columns.get_level_values(1) == "ITUB4.SA"] = np.nan
+        frames = split_wide(wide, ["PETR4.SA", "ITUB4.SA"])
+        self.assertEqual(len(frames["PETR4.SA"]), 30)
+        self.assertEqual(len(frames["ITUB4.SA"]), 25)
+        self.assertEqual(frames["ITUB4.SA"].index[0], wide.index[5])
+
+    def test_skips_tickers_without_data(self):
+        frames = split_wide(make_wide(["PETR4.SA"]), ["PETR4.SA", "XXXX3.SA"])
+        self.assertEqual(list(frames), ["PETR4.SA"])
+
+    def test_ticker_grouped_layout(self):
+        wide = make_wide(["PETR4.SA", "VALE3.SA"]).swaplevel(axis=1)
+        frames = split_wide(wide, ["PETR4.SA", "VALE3.SA"])
+        self.assertEqual(frames["VALE3.SA"]["Close"].iloc[0], 20.0)
+
+    def test_empty_download(self):
+        self.assertEqual(split_wide(pd.DataFrame(), ["PETR4.SA"]), {})
+
+
+class TestLoadB3Universe(unittest.TestCase):
+
+    def test_batches_the_universe(self):
+        symbols = [f"ATIV{k}" for k in range(85)]
+        download = FakeDownload(missing={"ATIV3.SA"})
+        frames = load_b3_universe(symbols, batch_size=40, download=download)
+
+        self.assertEqual(sorted(len(batch) for batch in download.calls), [5, 40, 40])
+        self.assertEqual(len(frames), 84)
+        self.assertNotIn("ATIV3.SA", frames)
+        self.assertEqual(frames["ATIV84.SA"]["Close"].iloc[0], 10.0 * 5)  # 5th of its batch
+
+    def test_failed_batch_is_skipped(self):
+        def download(tickers, period=None, interval=None):
+            if "ATIV0.SA" in tickers:
+                raise ConnectionError("timeout")
+            return make_wide(tickers)
+
+        frames = load_b3_universe([f"ATIV{k}" for k in range(4)], batch_size=2, download=download)
+        self.assertEqual(sorted(frames), ["ATIV2.SA", "ATIV3.SA"])
+
+    def test_fixture_round_trip(self):
+        recorded = make_wide(["PETR4.SA", "VALE3.SA", "WEGE3.SA"])
+        with tempfile.TemporaryDirectory() as tmp:
+            path = record_fixture(["PETR4", "VALE3", "WEGE3"], os.path.join(tmp, "b3.parquet"),
+                                  download=lambda tickers, period=None, interval=None: recorded.copy())
+            frames = load_b3_universe(["PETR4", "WEGE3"], download=fixture_download(path))
+
+        self.assertEqual(sorted(frames), ["PETR4.SA", "WEGE3.SA"])
+        pd.testing.assert_series_equal(frames["WEGE3.SA"]["Close"], recorded[("Close", "WEGE3.SA")],
+                                       check_names=False, check_freq=False)
+
+
+if __name__ == "__main__":
+    unittest.main()
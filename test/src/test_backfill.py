@@ -0,0 +1,131 @@
+import os
+import tempfile
+import threading
+import unittest
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from backfill import backfill, page_windows, merge_parts, symbol_dir, polygon_page_bars, INTERVAL_MS
+
+
+class FakeResponse:
+    def __init__(self, data, status_code=200):
+        self.data = data
+        self.status_code = status_code
+        self.headers = {"Retry-After": "0"}
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+
+class FakeBinance:
+    """Serves 15m klines for any startTime/endTime window, failing the first request with a 429."""
+    def __init__(self, fail_starts=()):
+        self.requests = []
+        self.fail_starts = set(fail_starts)
+        self.lock = threading.Lock()
+
+    def get(self, url, params=None, timeout=None):
+        with self.lock:
+            self.requests.append(params["startTime"])
+            if len(self.requests) == 1:
+                return FakeResponse([], status_code=429)
+        if params["startTime"] in self.fail_starts:
+            raise ConnectionError("connection reset")
+        step = INTERVAL_MS[params["interval"]]
+        return FakeResponse([[ts, "1.0", "2.0", "0.5", str(ts % 97), "10.0", ts + step - 1]
+                             for ts in range(params["startTime"], params["endTime"] + 1, step)][:params["limit"]])
+
+
+class FakePolygon:
+    """
+    Serves 15m aggregates, each response capped at `cap` bars with a next_url to the rest, and
+    at `limit` base minutes as Polygon does.
+    """
+    def __init__(self, cap=1000):
+        self.cap = cap
+        self.urls = []
+        self.lock = threading.Lock()
+
+    def get(self, url, params=None, timeout=None):
+        with self.lock:
+            self.urls.append(url)
+        path, _, query = url.partition("?")
+        multiplier, _, start, end = path.split("/")[-4:]
+        step = int(multiplier) * 60_000
+        limit = params.get("limit", int(query.partition("limit=")[2] or 0))
+        bars = list(range(int(start), int(end) + 1, step))[:min(self.cap, limit // int(multiplier))]
+        data = {"results": [{"t": ts, "o": 1.0, "h": 2.0, "l": 0.5, "c": ts % 97, "v": 10.0} for ts in bars]}
+        if bars and bars[-1] + step <= int(end):
+            data["next_url"] = f"{path.rsplit('/', 2)[0]}/{bars[-1] + step}/{end}?cursor=x&limit={limit}"
+        return FakeResponse(data)
+
+
+class TestBackfill(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.since = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        self.until = datetime(2024, 2, 15, tzinfo=timezone.utc)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_page_windows_cover_range_newest_first(self):
+        since_ms, until_ms = int(self.since.timestamp() * 1000), int(self.until.timestamp() * 1000)
+        windows = page_windows(since_ms, until_ms, "15m", 1000)
+        self.assertEqual(windows[-1][0], since_ms)
+        self.assertEqual(windows[0][1], until_ms - 1)
+        self.assertFalse(windows[0][2])
+        self.assertTrue(all(complete for _, _, complete in windows[1:]))
+        self.assertEqual(sum(end - start + 1 for start, end, _ in windows), until_ms - since_ms)
+
+    def test_interrupted_run_resumes_missing_pages(self):
+        since_ms = int(self.since.timestamp() * 1000)
+        failing = FakeBinance(fail_starts=[since_ms])
+        written = backfill(["BTC-USDT", "ETH-USDT"], since=self.since, until=self.until,
+                           out_dir=self.tmpdir.name, rate=1000, session=failing)
+        expected_bars = 45 * 96
+        self.assertEqual(written["BTC-USDT"], expected_bars - 1000)
+
+        resumed = FakeBinance()
+        written = backfill(["BTC-USDT", "ETH-USDT"], since=self.since, until=self.until,
+                           out_dir=self.tmpdir.name, rate=1000, session=resumed)
+        # Only the failed oldest pages and the still-growing newest pages are requested again
+        self.assertEqual(len(resumed.requests), 1 + 4)
+        self.assertEqual(written["BTC-USDT"], 1000 + expected_bars % 1000)
+
+        path = symbol_dir(self.tmpdir.name, "binance", "BTC-USDT", "15m")
+        merged = pd.read_parquet(merge_parts(path, os.path.join(self.tmpdir.name, "BTC-USDT.parquet")))
+        self.assertEqual(len(merged), expected_bars)
+        self.assertTrue(merged["ts"].is_monotonic_increasing)
+        self.assertEqual(list(merged.columns), ["ts", "open", "high", "low", "close", "volume"])
+
+    def test_polygon_windows_follow_next_url(self):
+        fake = FakePolygon()
+        written = backfill(["AAPL"], venue="polygon", since=self.since, until=self.until,
+                           out_dir=self.tmpdir.name, rate=1000, session=fake, api_key="key")
+        expected_bars = 45 * 96
+        self.assertEqual(written["AAPL"], expected_bars)
+        # Windows of 50,000 base minutes (3333 bars of 15m), each followed to its last page
+        self.assertEqual(polygon_page_bars("15m"), 3333)
+        self.assertEqual(len(fake.urls), 4 + 1)
+
+        resumed = FakePolygon()
+        written = backfill(["AAPL"], venue="polygon", since=self.since, until=self.until,
+                           out_dir=self.tmpdir.name, rate=1000, session=resumed, api_key="key")
+        self.assertEqual(written["AAPL"], expected_bars - 3333)
+        self.assertEqual(len(resumed.urls), 1)
+
+        path = symbol_dir(self.tmpdir.name, "polygon", "AAPL", "15m")
+        merged = pd.read_parquet(merge_parts(path, os.path.join(self.tmpdir.name, "AAPL.parquet")))
+        self.assertEqual(len(merged), expected_bars)
+        self.assertTrue(merged["ts"].is_monotonic_increasing)
+
+
+if __name__ == "__main__":
+    unittest.main()
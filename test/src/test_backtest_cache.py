@@ -0,0 +1,98 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from backtest_cache import BacktestCache, cached_backtest, frame_fingerprint
+from backtest_engine import BacktestState, backtest_frame
+from strategy_runner import apply_strategy
+
+
+class CountingSignals:
+    def __init__(self):
+        self.bars = 0
+
+    def __call__(self, df, params):
+        self.bars += len(df)
+        return apply_strategy(df, params)
+
+
+class TestBacktestCache(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(21)
+        n = 5000
+        close = 100 + np.cumsum(rng.normal(0, 1, n))
+        open_ = close + rng.normal(0, 0.6, n)
+        self.df = pd.DataFrame({
+            "Date": pd.date_range("2024-01-01", periods=n, freq="15min").strftime("%Y-%m-%d %H:%M"),
+            "Open": open_, "High": np.maximum(open_, close) + rng.uniform(0, 1.5, n),
+            "Low": np.minimum(open_, close) - rng.uniform(0, 1.5, n), "Close": close,
+        })
+        self.params = {"timeout": 7, "stop_loss_pct": 2, "cache_dir": "ignored"}
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = BacktestCache(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_matches_in_memory_backtest(self):
+        expected = backtest_frame(apply_strategy(self.df.copy(), self.params), "BTC", BacktestState(), self.params)
+        trades = cached_backtest(self.df, "BTC", apply_strategy, self.params, self.cache)
+        self.assertGreater(len(expected), 10)
+        self.assertEqual(trades, expected)
+        self.assertEqual(cached_backtest(self.df, "BTC", apply_strategy, self.params, self.cache), expected)
+        self.assertEqual(self.cache.hits, 6)  # 5000 bars over 6 blocks of absolute time
+        self.assertEqual(self.cache.misses, 6)
+
+    def test_only_new_bars_are_recomputed(self):
+        signals = CountingSignals()
+        cached_backtest(self.df.iloc[:4500], "BTC", signals, self.params, self.cache)
+        first_run = signals.bars
+
+        signals.bars = 0
+        trades = cached_backtest(self.df, "BTC", signals, self.params, self.cache)
+        # Only the block cut at bar 4500 and the one after it (1000 bars + 100 warm-up each)
+        self.assertLessEqual(signals.bars, 2 * 1100)
+        self.assertLess(signals.bars, first_run / 2)
+        expected = backtest_frame(apply_strategy(self.df.copy(), self.params), "BTC", BacktestState(), self.params)
+        self.assertEqual(trades, expected)
+
+    def test_rolling_window_reuses_blocks(self):
+        cached_backtest(self.df.iloc[:2880], "BTC", apply_strategy, self.params, self.cache, interval="15m",
+                        block_bars=500)
+        hits, misses = self.cache.hits, self.cache.misses
+
+        window = self.df.iloc[96:2976]
+        trades = cached_backtest(window, "BTC", apply_strategy, self.params, self.cache, interval="15m",
+                                 block_bars=500)
+        # Only the cut first block and the one holding the new bars are recomputed
+        self.assertGreaterEqual(self.cache.hits - hits, 4)
+        self.assertLessEqual(self.cache.misses - misses, 2)
+        expected = backtest_frame(apply_strategy(window.reset_index(drop=True), self.params), "BTC",
+                                  BacktestState(), self.params)
+        self.assertEqual(trades, expected)
+
+    def test_params_and_neutral_params_in_key(self):
+        cached_backtest(self.df, "BTC", apply_strategy, self.params, self.cache)
+        cached_backtest(self.df, "BTC", apply_strategy, {**self.params, "cache_dir": "other"}, self.cache)
+        self.assertEqual(self.cache.hits, 6)
+        cached_backtest(self.df, "BTC", apply_strategy, {**self.params, "timeout": 9}, self.cache)
+        self.assertEqual(self.cache.hits, 6)
+        self.assertNotEqual(frame_fingerprint(self.df), frame_fingerprint(self.df.iloc[:-1]))
+
+    def test_lru_eviction(self):
+        cached_backtest(self.df, "BTC", apply_strategy, self.params, self.cache)
+        files = [os.path.join(root, name) for root, _, names in os.walk(self.tmp.name) for name in names]
+        size = sum(os.path.getsize(path) for path in files)
+        os.utime(files[0], (1, 1))
+
+        cache = BacktestCache(self.tmp.name, max_bytes=size - 1)
+        self.assertEqual(cache.evict(), 1)
+        self.assertFalse(os.path.exists(files[0]))
+
+
+if __name__ == "__main__":
+    unittest.main()
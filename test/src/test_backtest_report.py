@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from backtest_report import summarize_trades, equity_curves, write_report
+
+
+class TestBacktestReport(unittest.TestCase):
+
+    def setUp(self):
+        self.trades_df = pd.DataFrame({
+            "symbol": ["AAA", "AAA", "AAA", "AAA", "BBB"],
+            "strategy": ["signal_shadow"] * 5,
+            "exit_index": [1, 5, 9, 12, 3],
+            "return_%": [10.0, -20.0, 5.0, 10.0, -4.0],
+        })
+
+    def test_summary_statistics(self):
+        summary = summarize_trades(self.trades_df).set_index("symbol")
+        aaa = summary.loc["AAA"]
+        self.assertEqual(aaa["total_trades"], 4)
+        self.assertEqual(aaa["win_rate"], 75.0)
+        self.assertEqual(aaa["expectancy"], 1.25)
+        self.assertEqual(aaa["profit_factor"], 1.25)
+        self.assertEqual(aaa["total_return"], round((1.1 * 0.8 * 1.05 * 1.1 - 1) * 100, 2))
+        self.assertEqual(aaa["max_drawdown"], 20.0)
+        self.assertEqual(summary.loc["BBB", "profit_factor"], 0.0)
+        self.assertEqual(summary.loc["BBB", "max_drawdown"], 4.0)
+
+    def test_equity_curve_follows_trade_order(self):
+        curves = equity_curves(self.trades_df.iloc[::-1])
+        aaa = curves[curves["symbol"] == "AAA"]
+        self.assertEqual(list(aaa["exit_index"]), [1, 5, 9, 12])
+        self.assertAlmostEqual(aaa["equity"].iloc[1], 0.88)
+
+    def test_write_report_outputs(self):
+        with tempfile.TemporaryDirectory() as out_dir:
+            written = write_report(self.trades_df, out_dir=out_dir)
+            self.assertEqual(len(written), 6)
+            for path in written:
+                self.assertTrue(os.path.getsize(path) > 0)
+            summary = pd.read_parquet(os.path.join(out_dir, "backtest_summary.parquet"))
+            self.assertEqual(len(summary), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
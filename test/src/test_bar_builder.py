@@ -0,0 +1,85 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from bar_builder import BarBuilder, BarSeries, poll_binance_1m, strategy_listener
+from strategy_registry import IndicatorEngine, Strategy
+
+START_MS = 1_700_000_000_000 - 1_700_000_000_000 % 3_600_000
+
+
+def one_minute_bars(n):
+    close = 100 + np.arange(n, dtype=np.float64)
+    return pd.DataFrame({
+        "ts": START_MS + np.arange(n) * 60_000,
+        "open": close - 0.5, "high": close + 1, "low": close - 2, "close": close, "volume": np.ones(n),
+    })
+
+
+class TestBarBuilder(unittest.TestCase):
+
+    def test_multi_timeframe_bars_from_one_minute_feed(self):
+        builder = BarBuilder(intervals=("1m", "5m", "15m"))
+        events = []
+        for interval in ("5m", "15m"):
+            builder.subscribe(interval, lambda symbol, interval, bar: events.append((interval, bar["ts"])))
+
+        bars = one_minute_bars(30)
+        for row in bars.itertuples(index=False):
+            builder.on_bar("BTC-USDT", row.ts, row.open, row.high, row.low, row.close, row.volume)
+            if row.ts == START_MS + 14 * 60_000:
+                # The 15m bar is published with its last 1m bar, not with the next update
+                self.assertEqual(events[-1], ("15m", START_MS))
+
+        self.assertEqual([ts for interval, ts in events if interval == "5m"],
+                         [START_MS + i * 300_000 for i in range(6)])
+        five = builder.frame("BTC-USDT", "5m")
+        expected = bars.groupby(np.arange(30) // 5).agg(
+            {"ts": "first", "open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"})
+        pd.testing.assert_frame_equal(five, expected.reset_index(drop=True))
+        self.assertEqual(len(builder.frame("BTC-USDT", "1m")), 30)
+        self.assertEqual(len(builder.frame("BTC-USDT", "15m")), 2)
+
+    def test_trades_close_bars_on_next_trade_or_clock(self):
+        builder = BarBuilder(intervals=("1m", "5m"))
+        closed = []
+        builder.subscribe("1m", lambda symbol, interval, bar: closed.append(bar))
+        for second, price in ((0, 10.0), (20, 12.0), (40, 9.0), (59, 11.0)):
+            builder.on_trade("ETH-USDT", START_MS + second * 1000, price, 1.0)
+        self.assertEqual(closed, [])
+
+        builder.on_trade("ETH-USDT", START_MS + 61_000, 11.5, 2.0)
+        self.assertEqual(closed, [{"ts": START_MS, "open": 10.0, "high": 12.0, "low": 9.0, "close": 11.0,
+                                   "volume": 4.0}])
+        builder.on_trade("ETH-USDT", START_MS + 30_000, 50.0, 1.0)  # late trade of a closed bar
+        builder.advance("ETH-USDT", START_MS + 120_000)
+        self.assertEqual(closed[-1]["close"], 11.5)
+        self.assertEqual(builder.frame("ETH-USDT", "1m")["high"].max(), 12.0)
+
+    def test_ring_buffer_keeps_last_bars(self):
+        series = BarSeries(60_000, capacity=4)
+        for i in range(10):
+            series.update(START_MS + i * 60_000, i, i, i, i, 1)
+        series.close_current()
+        self.assertEqual(series.frame()["close"].tolist(), [6.0, 7.0, 8.0, 9.0])
+        self.assertEqual(series.frame(2)["close"].tolist(), [8.0, 9.0])
+
+    def test_strategies_run_on_bar_close_and_seed_is_silent(self):
+        builder = BarBuilder(intervals=("1m", "5m"))
+        seen = []
+
+        def last_close(df, trades):
+            trades.append({"close": df["close"].iloc[-1], "bars": len(df)})
+
+        builder.seed("SOL-USDT", one_minute_bars(10))
+        builder.subscribe("5m", strategy_listener(builder, [Strategy("last", last_close)], IndicatorEngine(),
+                                                  lambda symbol, interval, trades: seen.extend(trades)))
+        self.assertEqual(seen, [])
+
+        poll_binance_1m(builder, ["SOL-USDT"], fetch=lambda symbol: one_minute_bars(15).iloc[10:])
+        self.assertEqual(seen, [{"close": 114.0, "bars": 3}])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import tempfile
+import threading
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from backtest_report import write_report
+from chart_service import ChartService, attach_trade_bars, chart_key, signal_chart, trade_chart
+
+BAR_MS = 900_000
+START_MS = 1_700_000_100_000 - 1_700_000_100_000 % BAR_MS
+
+
+def bars(n):
+    rng = np.random.default_rng(3)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    return pd.DataFrame({
+        "ts": START_MS + np.arange(n, dtype=np.int64) * BAR_MS,
+        "open": close - 0.3, "high": close + 1, "low": close - 1, "close": close, "volume": np.full(n, 10.0),
+    })
+
+
+class TestChartKey(unittest.TestCase):
+
+    def test_key_follows_bar_range_and_overlay(self):
+        df = bars(50)
+        key = chart_key("BTC-USDT", "15m", df)
+        self.assertEqual(key, chart_key("BTC-USDT", "15m", df.copy()))
+        self.assertTrue(key.startswith(f"BTC-USDT-15m-{START_MS}-{START_MS + 49 * BAR_MS}-"))
+        self.assertNotEqual(key, chart_key("BTC-USDT", "15m", df.iloc[1:]))
+        self.assertNotEqual(key, chart_key("BTC-USDT", "15m", df, levels={"entry": 101.0}))
+
+
+class TestChartService(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.service = ChartService(self.tmp.name, workers=1)
+
+    def tearDown(self):
+        self.service.close()
+        self.tmp.cleanup()
+
+    def test_renders_once_and_serves_cache(self):
+        df = bars(80)
+        first = signal_chart(self.service, "PETR4", "15m", df, "BUY", entry=df["close"].iloc[-1],
+                             stop_loss=df["close"].iloc[-1] - 2, take_profit=df["close"].iloc[-1] + 4)
+        again = signal_chart(self.service, "PETR4", "15m", df, "BUY", entry=df["close"].iloc[-1],
+                             stop_loss=df["close"].iloc[-1] - 2, take_profit=df["close"].iloc[-1] + 4)
+        path = first.result(timeout=60)
+        self.assertEqual(again.result(timeout=60), path)
+        self.assertEqual(self.service.renders, 1)
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(8), b"\x89PNG\r\n\x1a\n")
+
+        cached = signal_chart(self.service, "PETR4", "15m", df, "BUY", entry=df["close"].iloc[-1],
+                              stop_loss=df["close"].iloc[-1] - 2, take_profit=df["close"].iloc[-1] + 4)
+        self.assertTrue(cached.done())
+        self.assertEqual(self.service.hits, 1)
+
+        delivered = []
+        ready = threading.Event()
+        self.service.attach(cached, lambda p: (delivered.append(p), ready.set()))
+        self.assertTrue(ready.wait(10))
+        self.assertEqual(delivered, [path])
+
+    def test_trade_charts(self):
+        df = bars(200)
+        trades = [{"symbol": "BTC-USDT", "strategy": "signal_shadow", "entry_index": i, "exit_index": i + 5,
+                   "entry_price": df["close"].iloc[i], "exit_price": df["close"].iloc[i + 5], "return_%": 1.5}
+                  for i in (10, 100, 190)]
+        attach_trade_bars(df, trades, 2, padding=20)
+        self.assertNotIn("chart_bars", trades[0])
+        self.assertEqual(trades[1]["chart_start"], 80)
+        self.assertEqual(len(trades[1]["chart_bars"]), 46)
+        self.assertEqual(len(trades[2]["chart_bars"]), 30)  # clipped at the last bar
+
+        futures = [trade_chart(self.service, t, "15m") for t in trades[1:]]
+        paths = self.service.results(futures, timeout=120)
+        self.assertTrue(all(p is not None and os.path.exists(p) for p in paths))
+
+        out_dir = os.path.join(self.tmp.name, "report")
+        write_report(pd.DataFrame(trades).drop(columns=["chart_bars", "chart_start"]), out_dir=out_dir,
+                     formats=("pdf",), charts=[("BTC-USDT signal_shadow +1.50%", p) for p in paths])
+        pdf = os.path.join(out_dir, "backtest_report.pdf")
+        self.assertTrue(os.path.exists(pdf))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from backtest_engine import BacktestState, resolve_signals, backtest_arrays
+from chunked_backtester import backtest_chunks, read_bar_chunks, backtest_file
+
+
+def breakout_signals(df, params):
+    # Causal test strategy: BUY on a 10-bar low, SELL on a 10-bar high
+    df = df.copy()
+    lowest = df["Close"].rolling(10).min()
+    highest = df["Close"].rolling(10).max()
+    df["signal_shadow"] = np.where(df["Close"] <= lowest, "BUY", np.where(df["Close"] >= highest, "SELL", None))
+    return df
+
+
+class TestChunkedBacktester(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        close = np.round(100 + np.cumsum(rng.normal(0, 1, 5000)), 2)
+        self.df = pd.DataFrame({"Close": close})
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def in_memory_trades(self):
+        signals = breakout_signals(self.df, {})
+        codes, strategy_ids = resolve_signals(signals)
+        return backtest_arrays(signals["Close"].to_numpy(), codes, strategy_ids, "FAKE", BacktestState())
+
+    def test_signal_exit_and_timeout(self):
+        df = pd.DataFrame([
+            {"Close": 100, "signal_shadow": "BUY"},
+            {"Close": 102},
+            {"Close": 105},
+            {"Close": 106, "signal_shadow": "SELL"},
+            {"Close": 107, "signal_engulfing": "BUY"},
+            {"Close": 108},
+            {"Close": 109},
+            {"Close": 110},
+            {"Close": 111},
+        ])
+        codes, strategy_ids = resolve_signals(df)
+        trades = backtest_arrays(df["Close"].to_numpy(), codes, strategy_ids, "FAKE", BacktestState(), timeout=4)
+        self.assertEqual(len(trades), 2)
+        self.assertEqual((trades[0]["exit_index"], trades[0]["exit_reason"]), (3, "signal"))
+        self.assertEqual(trades[0]["return_%"], 6.0)
+        self.assertEqual((trades[1]["strategy"], trades[1]["exit_reason"]), ("signal_engulfing", "timeout"))
+
+    def test_chunked_matches_in_memory(self):
+        expected = self.in_memory_trades()
+        self.assertGreater(len(expected), 10)
+        for chunk_size in (97, 500, 10_000):
+            chunks = (self.df.iloc[i:i + chunk_size] for i in range(0, len(self.df), chunk_size))
+            trades = list(backtest_chunks(chunks, "FAKE", breakout_signals, {}, warmup_bars=20))
+            self.assertEqual(trades, expected)
+
+    def test_backtest_from_csv_and_parquet(self):
+        expected = self.in_memory_trades()
+        for ext in ("csv", "parquet"):
+            path = os.path.join(self.tmpdir.name, f"FAKE.{ext}")
+            if ext == "csv":
+                self.df.to_csv(path, index=False)
+            else:
+                self.df.to_parquet(path, index=False, row_group_size=300)
+            self.assertEqual(len(next(read_bar_chunks(path, chunk_size=250))), 250)
+            trades = backtest_file(path, "FAKE", breakout_signals, {"chunk_size": 250, "warmup_bars": 20})
+            self.assertEqual(trades, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from compact_frames import compact_ohlc, memory_report, TradeLog, to_epoch_ms
+
+
+class TestCompactFrames(unittest.TestCase):
+
+    def setUp(self):
+        n = 500
+        self.df = pd.DataFrame({
+            "Date": pd.date_range("2025-01-01", periods=n, freq="15min").strftime("%Y-%m-%d %H:%M"),
+            "Open": np.linspace(10, 20, n),
+            "High": np.linspace(11, 21, n),
+            "Low": np.linspace(9, 19, n),
+            "Close": np.linspace(10, 20, n),
+            "signal_shadow": np.where(np.arange(n) % 7 == 0, "BUY", np.where(np.arange(n) % 11 == 0, "SELL", None)),
+        })
+
+    def test_compact_ohlc(self):
+        compact = compact_ohlc(self.df, float32=True)
+        self.assertEqual(compact["ts"].dtype, np.int64)
+        self.assertEqual(compact["ts"].iloc[1] - compact["ts"].iloc[0], 15 * 60 * 1000)
+        self.assertEqual(compact["Close"].dtype, np.float32)
+        self.assertEqual(compact["signal_shadow"].dtype, np.int8)
+        self.assertEqual(list(compact["signal_shadow"].iloc[[0, 11, 1]]), [1, -1, 0])
+        self.assertEqual(to_epoch_ms(["1970-01-01 00:00:01"])[0], 1000)
+
+    def test_memory_report_shrinks(self):
+        report = memory_report({"AAA": self.df, "BBB": self.df}, float32=True)
+        self.assertEqual(report["bars"], 1000)
+        self.assertLess(report["bytes_per_bar_after"], 30)
+        self.assertGreater(report["ratio"], 3)
+
+    def test_trade_log_round_trip(self):
+        trades = [{"symbol": f"S{i % 3}", "strategy": "signal_shadow", "entry_index": i, "exit_index": i + 2,
+                   "entry_price": 10.0, "exit_price": 10.5, "bars_held": 2, "return_%": 5.0,
+                   "exit_reason": "take_profit"} for i in range(3000)]
+        log = TradeLog(capacity=16)
+        log.extend(trades[:10])
+        log.extend(trades[10:])
+        df = log.to_frame()
+        self.assertEqual(len(log), 3000)
+        self.assertEqual(df["symbol"].dtype, "category")
+        self.assertEqual(list(df["symbol"].cat.categories), ["S0", "S1", "S2"])
+        self.assertEqual(df.iloc[4][["symbol", "entry_index", "exit_reason"]].tolist(), ["S1", 4, "take_profit"])
+        self.assertLess(df.memory_usage(deep=True).sum(), pd.DataFrame(trades).memory_usage(deep=True).sum() / 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+import time
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from correlation import RollingCorrelation, align_closes, closed_closes, flag_correlated, track_open_signals
+
+
+class TestRollingCorrelation(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        base = rng.normal(0, 0.01, (300, 1))
+        self.returns = np.hstack([
+            base + rng.normal(0, 0.002, (300, 1)),   # BTC-USDT
+            base + rng.normal(0, 0.002, (300, 1)),   # BTC-BRL
+            -base + rng.normal(0, 0.002, (300, 1)),  # inverse
+            rng.normal(0, 0.01, (300, 1)),           # unrelated
+        ])
+        self.symbols = ["BTC-USDT", "BTC-BRL", "INVERSE", "AAPL"]
+
+    def test_incremental_matches_full_recompute(self):
+        engine = RollingCorrelation(self.symbols, window=64)
+        for i, row in enumerate(self.returns):
+            engine.update_returns(row)
+            if i in (10, 63, 64, 100, 299):
+                window = self.returns[max(0, i - 63):i + 1]
+                np.testing.assert_allclose(engine.covariance(), np.cov(window, rowvar=False), atol=1e-12)
+                np.testing.assert_allclose(engine.correlation(), np.corrcoef(window, rowvar=False), atol=1e-9)
+                np.testing.assert_allclose(engine.correlation_row("BTC-BRL"), engine.correlation()[1], atol=1e-9)
+
+    def test_seed_from_prices(self):
+        prices = 100 * np.exp(np.cumsum(self.returns, axis=0))
+        bars = {symbol: pd.DataFrame({"ts": np.arange(300) * 60_000, "close": prices[:, i]})
+                for i, symbol in enumerate(self.symbols)}
+        bars["AAPL"] = bars["AAPL"].iloc[::2]
+        closes = align_closes(bars)
+        self.assertFalse(closes.iloc[1:].isna().any().any())
+
+        engine = RollingCorrelation.from_prices(closes, window=100)
+        self.assertEqual(engine.count, 100)
+        expected = np.corrcoef(np.diff(np.log(closes.to_numpy()), axis=0)[-100:], rowvar=False)
+        np.testing.assert_allclose(engine.correlation(), expected, atol=1e-9)
+
+        engine.update_prices({"BTC-USDT": prices[-1, 0] * 1.01, "UNKNOWN": 5.0})
+        self.assertAlmostEqual(engine.buffer[engine.position - 1][0], np.log(1.01))
+        self.assertEqual(engine.buffer[engine.position - 1][1], 0.0)
+
+    def test_flags_correlated_exposure(self):
+        engine = RollingCorrelation(self.symbols, window=300)
+        engine.update_returns_many(self.returns)
+
+        self.assertEqual([other for other, _ in engine.correlated_with("BTC-USDT", self.symbols)],
+                         ["BTC-BRL", "INVERSE"])
+
+        signals = [{"ativo": "BTC-BRL", "signal": "BUY"}, {"ativo": "INVERSE", "signal": "SELL"},
+                   {"ativo": "AAPL", "signal": "BUY"}]
+        flagged = flag_correlated(signals, {"BTC-USDT": "BUY"}, engine)
+        self.assertEqual([(signal["ativo"], sorted(other for other, _ in pairs)) for signal, pairs in flagged],
+                         [("BTC-BRL", ["BTC-USDT"]), ("INVERSE", ["BTC-BRL", "BTC-USDT"])])
+
+        # Opposite positions on positively correlated assets hedge each other
+        self.assertEqual(flag_correlated([{"ativo": "BTC-BRL", "signal": "SELL"}], {"BTC-USDT": "BUY"}, engine), [])
+
+    def test_update_closes_adds_only_new_bars(self):
+        prices = 100 * np.exp(np.cumsum(self.returns, axis=0))
+        bars = {symbol: pd.DataFrame({"ts": np.arange(300) * 60_000, "close": prices[:, i]})
+                for i, symbol in enumerate(self.symbols)}
+        closes = align_closes(bars)
+        engine = RollingCorrelation.from_prices(closes.iloc[:200], window=100)
+
+        # Each cycle reads a window overlapping the bars already added
+        self.assertEqual(engine.update_closes(closes.iloc[150:250]), 50)
+        self.assertEqual(engine.update_closes(closes.iloc[150:250]), 0)
+        self.assertEqual(engine.update_closes(closes.iloc[240:300]), 50)
+        expected = RollingCorrelation.from_prices(closes, window=100)
+        np.testing.assert_allclose(engine.correlation(), expected.correlation(), atol=1e-9)
+        self.assertEqual(engine.last_ts, 299 * 60_000)
+
+    def test_mixed_interval_windows_are_resampled(self):
+        bar, minute = 900_000, 60_000
+        crypto = pd.DataFrame({"ts": np.arange(10) * bar, "close": 100.0 + np.arange(10)})
+        # 1m stock bars: the last close of each 15 minutes is the 15m close
+        stock = pd.DataFrame({"ts": np.arange(150) * minute, "close": 50.0 + np.arange(150)})
+        now = 9 * bar + 7 * minute  # crypto bar 9 and the 10th span of the stock still forming
+
+        closes = closed_closes({"BTC-USDT": crypto, "AAPL": stock}, {"BTC-USDT": bar, "AAPL": minute}, now)
+        self.assertEqual(list(closes.index), list(np.arange(9) * bar))
+        self.assertEqual(list(closes["AAPL"]), [50.0 + 15 * i + 14 for i in range(9)])
+        self.assertEqual(list(closes["BTC-USDT"]), [100.0 + i for i in range(9)])
+
+        engine = RollingCorrelation(["BTC-USDT", "AAPL"], window=20)
+        self.assertEqual(engine.update_closes(closes), 9)
+        self.assertEqual(engine.update_closes(closed_closes(
+            {"BTC-USDT": crypto, "AAPL": stock}, {"BTC-USDT": bar, "AAPL": minute}, 10 * bar)), 1)
+
+    def test_open_signals_close_renew_and_expire(self):
+        minute = 60_000
+        open_signals = {}
+        track_open_signals(open_signals, [{"ativo": "BTC-USDT", "signal": "BUY"},
+                                          {"ativo": "ETH-USDT", "signal": "SELL"}], 0)
+        track_open_signals(open_signals, [{"ativo": "BTC-USDT", "signal": "SELL"},
+                                          {"ativo": "ETH-USDT", "signal": "SELL"}], 60 * minute)
+        self.assertEqual(open_signals, {"ETH-USDT": {"signal": "SELL", "ts": 60 * minute,
+                                                     "expires": 60 * minute + 7 * 15 * minute}})
+
+        track_open_signals(open_signals, [{"ativo": "AAPL", "signal": "BUY"}], 200 * minute)
+        self.assertEqual(list(open_signals), ["AAPL"])
+
+    def test_open_signals_expire_after_bars_of_their_interval(self):
+        minute = 60_000
+        open_signals = {}
+        # 7 bars: 7 minutes for a 1m stock, 105 minutes for a 15m pair
+        track_open_signals(open_signals, [{"ativo": "AAPL", "signal": "BUY"}, {"ativo": "BTC-USDT", "signal": "BUY"}],
+                           0, {"AAPL": minute, "BTC-USDT": 15 * minute})
+        track_open_signals(open_signals, [], 6 * minute)
+        self.assertEqual(sorted(open_signals), ["AAPL", "BTC-USDT"])
+        track_open_signals(open_signals, [], 7 * minute)
+        self.assertEqual(list(open_signals), ["BTC-USDT"])
+        track_open_signals(open_signals, [], 105 * minute)
+        self.assertEqual(open_signals, {})
+
+    def test_update_is_fast_for_large_universe(self):
+        n = 2000
+        engine = RollingCorrelation([f"S{i}" for i in range(n)], window=250)
+        rng = np.random.default_rng(0)
+        engine.update_returns_many(rng.normal(0, 0.01, (250, n)))
+        rows = rng.normal(0, 0.01, (5, n))
+        started = time.perf_counter()
+        for row in rows:
+            engine.update_returns(row)
+        self.assertLess((time.perf_counter() - started) / len(rows), 0.25)
+        self.assertEqual(engine.correlation_row("S0").shape, (n,))
+
+
+if __name__ == "__main__":
+    unittest.main()
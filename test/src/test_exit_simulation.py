@@ -0,0 +1,73 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from backtest_engine import BacktestState, backtest_frame
+from chunked_backtester import backtest_chunks
+from exit_simulation import first_passage, NO_HIT, STOP_LOSS_HIT, TAKE_PROFIT_HIT
+
+
+class TestExitSimulation(unittest.TestCase):
+
+    def setUp(self):
+        self.high = np.array([101, 102, 103, 104, 110, 104, 103], dtype=float)
+        self.low = np.array([99, 100, 98, 101, 94, 100, 100], dtype=float)
+        self.open = np.array([100, 101, 101, 102, 103, 103, 102], dtype=float)
+
+    def test_first_touch_of_each_level(self):
+        bar, price, kind = first_passage(self.high, self.low, [0, 0, 0], [98.5, 90, np.nan], [120, 103.5, np.nan], 6)
+        self.assertEqual(list(bar), [2, 3, -1])
+        self.assertEqual(list(kind), [STOP_LOSS_HIT, TAKE_PROFIT_HIT, NO_HIT])
+        self.assertEqual(price[0], 98.5)
+
+    def test_horizon_and_end_of_data(self):
+        bar, _, kind = first_passage(self.high, self.low, [0, 5], [95, 95], [105, 105], 3)
+        self.assertEqual(list(bar), [-1, -1])
+        self.assertEqual(list(kind), [NO_HIT, NO_HIT])
+
+    def test_tie_break_on_bar_touching_both(self):
+        args = (self.high, self.low, [3], [95], [109], 2)
+        self.assertEqual(first_passage(*args, tie_break="stop")[2][0], STOP_LOSS_HIT)
+        self.assertEqual(first_passage(*args, tie_break="target")[2][0], TAKE_PROFIT_HIT)
+        self.assertEqual(first_passage(*args, open_prices=self.open, tie_break="open")[2][0], TAKE_PROFIT_HIT)
+        with self.assertRaises(ValueError):
+            first_passage(*args, tie_break="close")
+
+    def test_gap_through_stop_fills_at_open(self):
+        _, price, kind = first_passage(self.high, self.low, [3], [103.5], [np.nan], 2, open_prices=self.open)
+        self.assertEqual((kind[0], price[0]), (STOP_LOSS_HIT, 103.0))
+
+    def test_matches_bar_by_bar_search(self):
+        rng = np.random.default_rng(3)
+        close = 100 + np.cumsum(rng.normal(0, 1, 2000))
+        high, low = close + rng.random(2000), close - rng.random(2000)
+        entries = rng.integers(0, 2000, 500)
+        sl, tp = close[entries] - 3, close[entries] + 3
+        bar, _, kind = first_passage(high, low, entries, sl, tp, 20)
+        for j, e in enumerate(entries):
+            expected = -1
+            for b in range(e + 1, min(e + 21, 2000)):
+                if low[b] <= sl[j] or high[b] >= tp[j]:
+                    expected = b
+                    break
+            self.assertEqual(bar[j], expected)
+
+    def test_backtest_exits_on_levels_in_chunks(self):
+        rng = np.random.default_rng(11)
+        close = np.round(100 + np.cumsum(rng.normal(0, 1, 3000)), 2)
+        df = pd.DataFrame({"Open": close, "High": close + 0.8, "Low": close - 0.8, "Close": close})
+        df["signal_shadow"] = np.where(rng.random(3000) < 0.05, "BUY", None)
+        params = {"timeout": 15, "stop_loss_pct": 1, "take_profit_pct": 1.5}
+
+        expected = backtest_frame(df, "FAKE", BacktestState(), params)
+        reasons = {t["exit_reason"] for t in expected}
+        self.assertTrue({"stop_loss", "take_profit"} <= reasons)
+
+        chunks = (df.iloc[i:i + 113] for i in range(0, len(df), 113))
+        trades = list(backtest_chunks(chunks, "FAKE", lambda frame, p: frame, params, warmup_bars=0))
+        self.assertEqual(trades, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from backtest_engine import BacktestState, backtest_frame
+from incremental_backtest import IncrementalStore, incremental_backtest
+from strategy_runner import apply_strategy
+
+
+class CountingSignals:
+    def __init__(self):
+        self.bars = 0
+
+    def __call__(self, df, params):
+        self.bars += len(df)
+        return apply_strategy(df, params)
+
+
+class TestIncrementalBacktest(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(8)
+        n = 3000
+        close = 100 + np.cumsum(rng.normal(0, 1, n))
+        open_ = close + rng.normal(0, 0.6, n)
+        self.df = pd.DataFrame({
+            "Date": pd.date_range("2025-01-01", periods=n, freq="15min").strftime("%Y-%m-%d %H:%M"),
+            "Open": open_, "High": np.maximum(open_, close) + rng.uniform(0, 1.5, n),
+            "Low": np.minimum(open_, close) - rng.uniform(0, 1.5, n), "Close": close,
+        })
+        self.params = {"timeout": 7, "stop_loss_pct": 2, "period": "30d"}
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = IncrementalStore(self.tmp.name)
+        self.full = backtest_frame(apply_strategy(self.df.copy(), self.params), "BTC", BacktestState(), self.params)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_daily_runs_match_full_run(self):
+        signals = CountingSignals()
+        incremental_backtest(self.df.iloc[:2000], "BTC", signals, self.params, self.store)
+        # Each later run fetches a sliding window that overlaps the previous one
+        for end in range(2096, 3001, 96):
+            signals.bars = 0
+            incremental_backtest(self.df.iloc[end - 1000:end], "BTC", signals, self.params, self.store)
+            self.assertLessEqual(signals.bars, 96 + 100)
+        incremental_backtest(self.df, "BTC", signals, self.params, self.store)
+
+        self.assertGreater(len(self.full), 20)
+        self.assertEqual(self.store.trades("BTC", self.params), self.full)
+
+    def test_no_new_bars_and_other_params(self):
+        incremental_backtest(self.df, "BTC", apply_strategy, self.params, self.store)
+        self.assertEqual(incremental_backtest(self.df, "BTC", apply_strategy, self.params, self.store), [])
+        self.assertEqual(self.store.trades("BTC", {**self.params, "timeout": 9}), [])
+        self.assertEqual(self.store.trades("BTC", {**self.params, "period": "60d"}), self.full)
+
+    def test_revised_bar_restarts(self):
+        incremental_backtest(self.df.iloc[:2000], "BTC", apply_strategy, self.params, self.store)
+        revised = self.df.copy()
+        revised.loc[1999, "Close"] += 1
+        incremental_backtest(revised, "BTC", apply_strategy, self.params, self.store)
+        expected = backtest_frame(apply_strategy(revised.copy(), self.params), "BTC", BacktestState(), self.params)
+        self.assertEqual(self.store.trades("BTC", self.params), expected)
+
+    def test_forming_bar_is_left_for_the_next_run(self):
+        signals = CountingSignals()
+        times = pd.to_datetime(self.df["Date"]).to_numpy(dtype="datetime64[ms]").astype(np.int64)
+        # Run N sees bar 1999 still forming, run N+1 gets it closed and revised
+        forming = self.df.iloc[:2000].copy()
+        forming.loc[1999, ["High", "Close"]] = forming.loc[1999, "Open"] + 0.1
+        incremental_backtest(forming, "BTC", signals, self.params, self.store, now=times[1999] + 60_000)
+        self.assertEqual(self.store.load("BTC", self.params)["last_ts"], times[1998])
+
+        signals.bars = 0
+        incremental_backtest(self.df.iloc[1000:2096], "BTC", signals, self.params, self.store,
+                             now=times[2095] + 900_000)
+        self.assertLessEqual(signals.bars, 97 + 100)
+        incremental_backtest(self.df, "BTC", signals, self.params, self.store, now=times[-1] + 900_000)
+        self.assertEqual(self.store.trades("BTC", self.params), self.full)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import tracemalloc
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import indicator_kernels as kernels
+
+
+class TestIndicatorKernels(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        n = 3000
+        self.close = 60000 + np.cumsum(rng.normal(0, 50, n))
+        self.high = self.close + rng.random(n) * 30
+        self.low = self.close - rng.random(n) * 30
+        self.series = pd.Series(self.close)
+
+    def test_rolling_kernels_match_pandas(self):
+        np.testing.assert_allclose(kernels.sma(self.close, 20), self.series.rolling(20).mean(), rtol=1e-10)
+        np.testing.assert_allclose(kernels.rolling_std(self.close, 20), self.series.rolling(20).std(), rtol=1e-6)
+        np.testing.assert_array_equal(kernels.rolling_min(self.close, 14), self.series.rolling(14).min())
+        np.testing.assert_array_equal(kernels.rolling_max(self.close, 14), self.series.rolling(14).max())
+
+    def test_ema_matches_pandas(self):
+        for span in (1, 2, 9, 26, 200):
+            with self.subTest(span=span):
+                np.testing.assert_allclose(kernels.ema(self.close, span),
+                                           self.series.ewm(span=span, adjust=False).mean(), rtol=1e-10)
+
+    def test_rsi_matches_simple_average_definition(self):
+        delta = self.series.diff()
+        gain = pd.Series(np.where(delta > 0, delta, 0)).rolling(14).mean()
+        loss = pd.Series(np.where(delta < 0, -delta, 0)).rolling(14).mean()
+        np.testing.assert_allclose(kernels.rsi(self.close, 14), 100 - 100 / (1 + gain / loss), rtol=1e-9)
+
+    def test_stochastic_matches_definition(self):
+        lowest = pd.Series(self.low).rolling(14).min()
+        highest = pd.Series(self.high).rolling(14).max()
+        percent_k = 100 * (self.series - lowest) / (highest - lowest)
+        k, d = kernels.stochastic(self.high, self.low, self.close, 14, 3)
+        np.testing.assert_allclose(k, percent_k, rtol=1e-9)
+        np.testing.assert_allclose(d, percent_k.rolling(3).mean(), rtol=1e-9)
+
+    def test_warmup_is_nan_and_matches_mask(self):
+        n = len(self.close)
+        k, d = kernels.stochastic(self.high, self.low, self.close, 14, 3)
+        outputs = {
+            "rsi": (kernels.rsi(self.close, 14), {"length": 14}),
+            "stochastic_k": (k, {"k_period": 14}),
+            "stochastic_d": (d, {"k_period": 14, "d_period": 3}),
+            "bollinger": (kernels.bollinger(self.close, 20)[0], {"period": 20}),
+        }
+        for name, (values, params) in outputs.items():
+            with self.subTest(name=name):
+                mask = kernels.warmup_mask(n, kernels.WARMUP[name](**params))
+                self.assertTrue(np.isnan(values[mask]).all())
+                self.assertFalse(np.isnan(values[~mask]).any())
+
+    def test_writes_into_caller_buffers(self):
+        n = len(self.close)
+        macd, signal, hist = np.empty(n), np.empty(n), np.empty(n)
+        result = kernels.macd(self.close, 12, 26, 9, macd, signal, hist)
+        self.assertIs(result[0], macd)
+        self.assertIs(result[1], signal)
+        self.assertIs(result[2], hist)
+        fast = self.series.ewm(span=12, adjust=False).mean()
+        slow = self.series.ewm(span=26, adjust=False).mean()
+        np.testing.assert_allclose(hist, (fast - slow) - (fast - slow).ewm(span=9, adjust=False).mean(),
+                                   rtol=1e-7, atol=1e-7)
+
+        with self.assertRaises(ValueError):
+            kernels.rsi(self.close, 14, out=np.empty(n - 1))
+
+    def test_repeated_calls_do_not_allocate(self):
+        n = len(self.close)
+        buffers = [np.empty(n) for _ in range(3)]
+
+        def cycle():
+            kernels.rsi(self.close, 14, buffers[0])
+            kernels.bollinger(self.close, 20, 2, *buffers)
+            kernels.stochastic(self.high, self.low, self.close, 14, 3, buffers[0], buffers[1])
+            kernels.macd(self.close, 12, 26, 9, *buffers)
+
+        cycle()  # fills the scratch pool
+        tracemalloc.start()
+        try:
+            for _ in range(5):
+                cycle()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertLess(peak, n * 8)
+
+    def test_short_series(self):
+        values = kernels.sma(np.array([1.0, 2.0]), 5)
+        self.assertTrue(np.isnan(values).all())
+        self.assertEqual(len(kernels.ema(np.array([]), 12)), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -23,7 +23,9 @@ class TestIndicators(unittest.TestCase):
         self.assertIn("Upper Band", result.columns)
         self.assertIn("Middle Band", result.columns)
         self.assertIn("Lower Band", result.columns)
-        self.assertFalse(result.isnull().any().any())
+        # Warm-up rows are NaN, not zero
+        self.assertTrue(result.iloc[:19].isnull().all().all())
+        self.assertFalse(result.iloc[19:].isnull().any().any())
         # import matplotlib.pyplot as plt
         # plt.figure(figsize=(14, 7))
         # plt.plot(self.df['close'], label='Closing Price', color='blue')
@@ -40,12 +42,15 @@ class TestIndicators(unittest.TestCase):
         result = calculate_stochastic(self.df)
         self.assertIn("stoch_k", result.columns)
         self.assertIn("stoch_d", result.columns)
-        self.assertFalse(result.isnull().any().any())
+        self.assertTrue(result["stoch_k"].iloc[:13].isnull().all())
+        self.assertTrue(result["stoch_d"].iloc[:15].isnull().all())
+        self.assertFalse(result.iloc[15:].isnull().any().any())
 
     def test_calculate_rsi(self):
         result = calculate_rsi(self.df)
         self.assertIn("rsi", result.columns)
-        self.assertFalse(result.isnull().any().any())
+        self.assertTrue(result["rsi"].iloc[:13].isnull().all())
+        self.assertFalse(result.iloc[13:].isnull().any().any())
 
     def test_calculate_macd(self):
         result = calculate_macd(self.df)
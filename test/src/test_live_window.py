@@ -0,0 +1,91 @@
+import os
+import tempfile
+import tracemalloc
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from backfill import BAR_COLUMNS
+from live_window import LiveWindowStore
+
+BAR_MS = 900_000
+
+
+def bars(first, last):
+    close = 100 + np.arange(first, last, dtype=np.float64)
+    return pd.DataFrame({
+        "ts": np.arange(first, last, dtype=np.int64) * BAR_MS,
+        "open": close - 0.5, "high": close + 1, "low": close - 1, "close": close, "volume": np.ones(last - first),
+    })
+
+
+class TestLiveWindowStore(unittest.TestCase):
+
+    def test_keeps_last_bars_in_order(self):
+        store = LiveWindowStore(capacity=100, slack=10, rows=1)
+        self.assertEqual(store.write("BTC-USDT", bars(0, 150)), 100)
+        for i in range(150, 400):
+            # Each cycle re-sends the forming bar along with the new one
+            self.assertEqual(store.write("BTC-USDT", bars(i - 1, i + 1)), 1)
+
+        pd.testing.assert_frame_equal(store.frame("BTC-USDT"), bars(300, 400))
+        pd.testing.assert_frame_equal(store.frame("BTC-USDT", 5), bars(395, 400))
+        self.assertEqual(store.last_ts("BTC-USDT"), 399 * BAR_MS)
+        self.assertLessEqual(store.compactions, 250 // 10)  # one move of the window per `slack` bars
+
+    def test_forming_bar_is_replaced_and_old_bars_ignored(self):
+        store = LiveWindowStore(capacity=10)
+        store.write("PETR4", bars(0, 5))
+        update = bars(4, 5)
+        update["close"] = 999.0
+        self.assertEqual(store.write("PETR4", update), 0)
+        self.assertEqual(store.write("PETR4", bars(0, 3)), 0)
+        frame = store.frame("PETR4")
+        self.assertEqual(len(frame), 5)
+        self.assertEqual(frame["close"].iloc[-1], 999.0)
+
+    def test_frames_are_canonical_views(self):
+        store = LiveWindowStore(capacity=50, rows=1)
+        store.reserve(["A", "B", "C"])
+        for symbol in ("A", "B", "C"):
+            store.write(symbol, bars(0, 30))
+        frame = store.frame("B")
+        self.assertEqual(list(frame.columns), BAR_COLUMNS)
+        self.assertEqual(frame["ts"].dtype, np.int64)
+        self.assertTrue(all(np.shares_memory(frame[col].to_numpy(), store.block) for col in BAR_COLUMNS))
+        self.assertTrue(store.frame("missing").empty)
+
+    def test_steady_state_writes_do_not_grow_memory(self):
+        store = LiveWindowStore(capacity=1000, rows=200)
+        symbols = [f"S{i}" for i in range(200)]
+        store.reserve(symbols)
+        for symbol in symbols:
+            store.write(symbol, bars(0, 1000))
+        updates = [bars(999 + i, 1001 + i) for i in range(50)]
+
+        tracemalloc.start()
+        try:
+            for update in updates:
+                for symbol in symbols:
+                    store.write(symbol, update)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertLess(peak, 1_000_000)  # the store itself holds ~10 MB
+        pd.testing.assert_frame_equal(store.frame("S7", 3), bars(1047, 1050))
+
+    def test_memory_mapped_store_grows_in_place(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "windows.f64")
+            store = LiveWindowStore(capacity=20, slack=5, rows=2, path=path)
+            for i in range(5):
+                store.write(f"S{i}", bars(i, i + 10))
+            store.flush()
+            self.assertEqual(os.path.getsize(path), 8 * len(BAR_COLUMNS) * 25 * len(store.block))
+            for i in range(5):
+                pd.testing.assert_frame_equal(store.frame(f"S{i}"), bars(i, i + 10))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+import os
+import tempfile
+import time
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from backfill import BAR_COLUMNS
+from market_data import BinanceSource, FileSource, MarketDataSource, YFinanceSource, is_canonical, \
+    normalize_bars
+
+BAR_MS = 900_000
+START_MS = 1_700_000_100_000 - 1_700_000_100_000 % BAR_MS
+
+
+def canonical(n, offset=0):
+    close = 100 + np.arange(n, dtype=np.float64)
+    return pd.DataFrame({
+        "ts": START_MS + (np.arange(n, dtype=np.int64) + offset) * BAR_MS,
+        "open": close - 0.5, "high": close + 1, "low": close - 1, "close": close, "volume": np.full(n, 10.0),
+    })
+
+
+class TestNormalizeBars(unittest.TestCase):
+
+    def test_binance_shape(self):
+        bars = canonical(5)
+        dates = pd.to_datetime(bars["ts"], unit="ms").dt.strftime("%Y-%m-%d %H:%M")
+        df = pd.DataFrame({"Date": dates, "Open": bars["open"], "High": bars["high"], "Low": bars["low"],
+                           "Close": bars["close"]})
+        result = normalize_bars(df)
+        self.assertEqual(list(result.columns), BAR_COLUMNS)
+        np.testing.assert_array_equal(result["ts"], bars["ts"])
+        np.testing.assert_array_equal(result["close"], bars["close"])
+        self.assertTrue(result["volume"].isna().all())
+
+    def test_polygon_shape(self):
+        bars = canonical(5)
+        df = bars[["open", "high", "low", "close", "volume"]].copy()
+        df.index = pd.Index(pd.to_datetime(bars["ts"], unit="ms"), name="timestamp")
+        result = normalize_bars(df)
+        self.assertTrue(is_canonical(result))
+        pd.testing.assert_frame_equal(result, bars)
+
+    def test_yfinance_multiindex_shape(self):
+        bars = canonical(5)
+        index = pd.to_datetime(bars["ts"], unit="ms").dt.tz_localize("UTC").dt.tz_convert("America/Sao_Paulo")
+        df = pd.DataFrame({("Close", "PETR4.SA"): bars["close"].to_numpy(), ("High", "PETR4.SA"): bars["high"].to_numpy(),
+                           ("Low", "PETR4.SA"): bars["low"].to_numpy(), ("Open", "PETR4.SA"): bars["open"].to_numpy(),
+                           ("Volume", "PETR4.SA"): bars["volume"].to_numpy()}, index=pd.DatetimeIndex(index))
+        pd.testing.assert_frame_equal(normalize_bars(df), bars)
+
+    def test_canonical_frames_pass_through(self):
+        bars = canonical(5)
+        self.assertIs(normalize_bars(bars), bars)
+
+    def test_sorts_and_drops_duplicate_bars(self):
+        bars = canonical(5)
+        shuffled = pd.concat([bars.iloc[[3, 0, 1]], bars.iloc[[4, 2, 3]]], ignore_index=True)
+        result = normalize_bars(shuffled.rename(columns={"ts": "timestamp"}))
+        pd.testing.assert_frame_equal(result, bars)
+
+
+class TestFileSource(unittest.TestCase):
+
+    def test_reads_interval_folder_and_flat_files(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            os.makedirs(os.path.join(tmp, "15m"))
+            canonical(50).to_parquet(os.path.join(tmp, "15m", "BTC-USDT.parquet"), index=False)
+            canonical(20).to_csv(os.path.join(tmp, "ETH-USDT.csv"), index=False)
+            source = FileSource(tmp)
+
+            bars = source.fetch("BTC-USDT", "15m", since=START_MS + 10 * BAR_MS, limit=5)
+            self.assertEqual(len(bars), 5)
+            self.assertEqual(bars["ts"].iloc[-1], START_MS + 49 * BAR_MS)
+            self.assertEqual(bars["ts"].iloc[0], START_MS + 45 * BAR_MS)
+
+            many = source.fetch_many(["BTC-USDT", "ETH-USDT", "SOL-USDT"], "15m",
+                                     since=pd.Timestamp(START_MS + 40 * BAR_MS, unit="ms"))
+            self.assertEqual(sorted(many), ["BTC-USDT"])
+            self.assertEqual(len(many["BTC-USDT"]), 10)
+            self.assertEqual(len(source.fetch("ETH-USDT", "15m")), 20)
+
+
+class TestYFinanceSource(unittest.TestCase):
+
+    def test_batched_download_keeps_caller_names(self):
+        calls = []
+
+        def download(tickers, period=None, interval=None):
+            calls.append(list(tickers))
+            bars = canonical(30)
+            index = pd.to_datetime(bars["ts"], unit="ms")
+            return pd.concat({ticker: bars.drop(columns="ts").set_axis(["Open", "High", "Low", "Close", "Volume"], axis=1)
+                             .set_index(index) for ticker in tickers}, axis=1).swaplevel(axis=1)
+
+        source = YFinanceSource(suffix=".SA", download=download)
+        frames = source.fetch_many(["PETR4", "VALE3"], "15m", limit=10)
+        self.assertEqual(calls, [["PETR4.SA", "VALE3.SA"]])
+        self.assertEqual(sorted(frames), ["PETR4", "VALE3"])
+        self.assertTrue(is_canonical(frames["VALE3"]))
+        self.assertEqual(len(frames["VALE3"]), 10)
+        self.assertEqual(frames["VALE3"]["close"].iloc[-1], 129.0)
+
+
+class FakePages(BinanceSource):
+    def __init__(self, bars):
+        super().__init__(session=object(), rate=1000)
+        self.bars = bars
+        self.requests = []
+
+    def _page(self, symbol, interval, start_ms, end_ms):
+        self.requests.append((start_ms, end_ms))
+        ts = self.bars["ts"].to_numpy()
+        return self.bars[(ts >= start_ms) & (ts <= end_ms)]
+
+
+class TestPagedSource(unittest.TestCase):
+
+    def test_pages_since_and_limit(self):
+        now_bar = int(time.time() * 1000) // BAR_MS * BAR_MS
+        bars = canonical(2500)
+        bars["ts"] = now_bar - (2499 - np.arange(2500, dtype=np.int64)) * BAR_MS
+        source = FakePages(bars)
+
+        result = source.fetch("BTC-USDT", "15m", since=int(bars["ts"].iloc[100]))
+        self.assertEqual(len(source.requests), 3)
+        self.assertEqual(source.requests, sorted(source.requests))
+        pd.testing.assert_frame_equal(result, bars.iloc[100:].reset_index(drop=True))
+
+        self.assertEqual(len(source.fetch("BTC-USDT", "15m", limit=300)), 300)
+
+
+class TestFetchMany(unittest.TestCase):
+
+    def test_failures_are_skipped(self):
+        class Flaky(MarketDataSource):
+            def fetch(self, symbol, interval, since=None, limit=None):
+                if symbol == "BAD":
+                    raise ConnectionError("timeout")
+                return canonical(3)
+
+        self.assertEqual(sorted(Flaky().fetch_many(["A", "BAD", "B"], "15m")), ["A", "B"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from live_window import LiveWindowStore
+from monitor_checkpoint import load_checkpoint, save_checkpoint, state_path
+from signal_state import SignalStateTable
+
+BAR_MS = 900_000
+
+
+def bars(first, last):
+    close = 100 + np.arange(first, last, dtype=np.float64)
+    return pd.DataFrame({
+        "ts": np.arange(first, last, dtype=np.int64) * BAR_MS,
+        "open": close - 0.5, "high": close + 1, "low": close - 1, "close": close, "volume": np.ones(last - first),
+    })
+
+
+class TestMonitorCheckpoint(unittest.TestCase):
+
+    def test_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            windows = LiveWindowStore(capacity=100, slack=10)
+            windows.write("BTC-USDT", bars(0, 250))
+            windows.write("PETR4", bars(10, 40))
+            state = SignalStateTable(state_path(tmp))
+            state.mark_bar("BTC-USDT", 249 * BAR_MS)
+            state.transitions("BTC-USDT", {"stochastic": "BUY"})
+            open_signals = {"BTC-USDT": {"signal": "BUY", "ts": 249 * BAR_MS, "expires": 256 * BAR_MS}}
+            save_checkpoint(tmp, windows, state, open_signals)
+
+            restored = LiveWindowStore(capacity=100, slack=10, rows=1)
+            meta = load_checkpoint(tmp, restored)
+            self.assertEqual(meta["open_signals"], open_signals)
+            pd.testing.assert_frame_equal(restored.frame("BTC-USDT"), bars(150, 250))
+            pd.testing.assert_frame_equal(restored.frame("PETR4"), bars(10, 40))
+
+            # The next cycle only appends the gap, and does not alert again
+            self.assertEqual(restored.write("BTC-USDT", bars(249, 253)), 3)
+            restored_state = SignalStateTable(state_path(tmp))
+            self.assertFalse(restored_state.is_new_bar("BTC-USDT", 249 * BAR_MS))
+            self.assertEqual(restored_state.transitions("BTC-USDT", {"stochastic": "BUY"}), {})
+
+    def test_new_checkpoint_replaces_the_previous_one(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            windows = LiveWindowStore(capacity=50)
+            windows.write("ETH-USDT", bars(0, 20))
+            first = save_checkpoint(tmp, windows)
+            windows.write("ETH-USDT", bars(20, 30))
+            second = save_checkpoint(tmp, windows)
+            self.assertNotEqual(first["bars_file"], second["bars_file"])
+            self.assertEqual(sorted(f for f in os.listdir(tmp) if f.endswith(".npy")), [second["bars_file"]])
+
+            restored = LiveWindowStore(capacity=20)
+            load_checkpoint(tmp, restored)
+            pd.testing.assert_frame_equal(restored.frame("ETH-USDT"), bars(10, 30))
+
+    def test_missing_checkpoint(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.assertIsNone(load_checkpoint(tmp, LiveWindowStore()))
+
+
+if __name__ == "__main__":
+    unittest.main()
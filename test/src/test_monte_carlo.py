@@ -0,0 +1,83 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import monte_carlo
+from backtest_engine import BacktestState, backtest_frame
+from backtest_report import summarize_trades
+from monte_carlo import run_monte_carlo, simulate, trade_log_returns
+
+
+class TestMonteCarlo(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(5)
+        self.trades = pd.DataFrame({
+            "symbol": "BTC-USDT", "strategy": "stochastic_cross",
+            "exit_index": np.arange(400),
+            "return_%": np.round(rng.normal(0.3, 2.0, 400), 2),
+        })
+
+    def test_original_order_matches_backtest_report(self):
+        report = summarize_trades(self.trades).iloc[0]
+        final, drawdown, _ = simulate("skip", trade_log_returns(self.trades), 3, seed=1, skip_rate=0.0)
+        np.testing.assert_allclose(np.expm1(final) * 100, report["total_return"], rtol=1e-3)
+        np.testing.assert_allclose(-np.expm1(-drawdown) * 100, report["max_drawdown"], atol=0.01)
+
+    def test_symbols_are_ordered_by_exit_time(self):
+        # Bar indexes restart per symbol; only the exit time interleaves them
+        trades = pd.DataFrame({
+            "symbol": ["A", "A", "B", "B"], "exit_index": [10, 20, 5, 30],
+            "exit_ts": [100, 300, 200, 400], "return_%": [1.0, 3.0, 2.0, 4.0],
+        })
+        np.testing.assert_allclose(np.expm1(trade_log_returns(trades)) * 100, [1.0, 2.0, 3.0, 4.0])
+
+        backtested = pd.DataFrame({
+            "Date": pd.date_range("2025-01-01", periods=60, freq="15min").strftime("%Y-%m-%d %H:%M"),
+            "Close": 100 + np.sin(np.arange(60) / 3), "signal_stochastic": np.tile([1, 0, 0, 0, -1, 0], 10),
+        })
+        frame_trades = backtest_frame(backtested, "A", BacktestState(), {"timeout": 7},
+                                      columns=["signal_stochastic"])
+        self.assertTrue(frame_trades)
+        expected = pd.to_datetime(backtested["Date"]).to_numpy(dtype="datetime64[ms]").astype(np.int64)
+        self.assertEqual([trade["exit_ts"] for trade in frame_trades],
+                         [expected[trade["exit_index"]] for trade in frame_trades])
+
+    def test_shuffle_keeps_total_return(self):
+        result = run_monte_carlo(self.trades, simulations=2000, seed=3).set_index("kind")
+        shuffle = result.loc["shuffle"]
+        self.assertAlmostEqual(shuffle["return_low"], shuffle["return_high"], delta=0.05)
+        self.assertLessEqual(shuffle["drawdown_low"], shuffle["drawdown_high"])
+        bootstrap = result.loc["bootstrap"]
+        self.assertLess(bootstrap["return_low"], shuffle["return_median"])
+        self.assertGreater(bootstrap["return_high"], shuffle["return_median"])
+        self.assertEqual(list(result["simulations"].unique()), [2000])
+
+    def test_ruin_and_loss_probabilities(self):
+        trades = pd.DataFrame({"return_%": [-60.0, 1.0, 1.0]})
+        result = run_monte_carlo(trades, simulations=500, kinds=("shuffle",), seed=1).iloc[0]
+        self.assertEqual(result["ruin_probability"], 100.0)
+        self.assertEqual(result["loss_probability"], 100.0)
+
+        winners = pd.DataFrame({"return_%": [1.0, 2.0, 0.5]})
+        result = run_monte_carlo(winners, simulations=500, seed=1)
+        self.assertTrue((result[["drawdown_high", "ruin_probability", "loss_probability"]] == 0).all().all())
+
+        with self.assertRaises(ValueError):
+            run_monte_carlo(winners, simulations=10, kinds=("reverse",))
+
+    def test_parallel_run_splits_simulations(self):
+        previous = monte_carlo.PARALLEL_MIN_CELLS
+        monte_carlo.PARALLEL_MIN_CELLS = 0
+        try:
+            final, drawdown, lowest = simulate("bootstrap", trade_log_returns(self.trades), 1001, seed=7, workers=2)
+        finally:
+            monte_carlo.PARALLEL_MIN_CELLS = previous
+        self.assertEqual(len(final), 1001)
+        self.assertEqual(len(np.unique(final)), 1001)
+        self.assertTrue((drawdown >= 0).all() and (lowest <= 0).all())
+
+
+if __name__ == "__main__":
+    unittest.main()
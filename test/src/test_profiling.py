@@ -0,0 +1,79 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from profiling import Profiler, profiler_from_params, tag, _thread_tags
+
+
+def busy_indicator(seconds):
+    deadline = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < deadline:
+        total += 1
+    return total
+
+
+def check_symbol(symbol, seconds):
+    with tag(symbol=symbol, stage="indicators"):
+        return busy_indicator(seconds)
+
+
+class TestProfiling(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read_dump(self, path):
+        with open(path, encoding="utf-8") as f:
+            return [line.rsplit(" ", 1) for line in f.read().splitlines()]
+
+    def test_slow_cycle_is_sampled_with_tags(self):
+        profiler = Profiler(budget_seconds=0.05, out_dir=self.tmp.name, interval=0.002)
+        with profiler.cycle("monitor", cycle=7):
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                list(executor.map(check_symbol, ["BTC-USDT", "ETH-USDT"], [0.3, 0.3]))
+
+        self.assertEqual(len(profiler.dumps), 1)
+        self.assertTrue(os.path.basename(profiler.dumps[0]).startswith("monitor-7-"))
+        lines = self.read_dump(profiler.dumps[0])
+        hot = [stack for stack, count in lines if "busy_indicator (test_profiling.py" in stack]
+        self.assertTrue(any(stack.startswith("cycle=7;symbol=BTC-USDT;stage=indicators;") for stack in hot))
+        self.assertTrue(any("symbol=ETH-USDT" in stack for stack in hot))
+        self.assertTrue(all(int(count) > 0 for _, count in lines))
+
+    def test_fast_cycle_writes_nothing_unless_requested(self):
+        profiler = Profiler(budget_seconds=1.0, out_dir=self.tmp.name)
+        with profiler.cycle("backtest", symbol="AAPL"):
+            busy_indicator(0.02)
+        self.assertEqual(profiler.dumps, [])
+
+        profiler.request()
+        with profiler.cycle("backtest", symbol="AAPL"):
+            busy_indicator(0.05)
+        self.assertEqual(len(profiler.dumps), 1)
+        with profiler.cycle("backtest", symbol="AAPL"):
+            busy_indicator(0.02)
+        self.assertEqual(len(profiler.dumps), 1)
+
+    def test_tags_nest_and_restore(self):
+        thread_id = threading.get_ident()
+        with tag(symbol="BTC"):
+            with tag(stage="fetch"):
+                self.assertEqual(_thread_tags[thread_id], {"symbol": "BTC", "stage": "fetch"})
+            self.assertEqual(_thread_tags[thread_id], {"symbol": "BTC"})
+        self.assertNotIn(thread_id, _thread_tags)
+
+    def test_profiler_from_params(self):
+        self.assertIsNone(profiler_from_params({"timeout": 7}))
+        profiler = profiler_from_params({"profile_budget": 2.5, "profile_dir": self.tmp.name})
+        self.assertEqual((profiler.budget_seconds, profiler.always), (2.5, False))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from replay import ReplayFeed, RecordingSink, run_replay, scale_universe
+from strategy_profile_enum import StrategyProfileEnum
+
+try:
+    import signal_monitor
+except Exception:  # strategy_utils needs the polygon client and ../config.ini
+    signal_monitor = None
+
+BAR_MS = 900_000
+START_MS = 1_700_000_200_000 - 1_700_000_200_000 % BAR_MS
+
+
+def make_walk(n, seed):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    open_ = close + rng.normal(0, 0.8, n)
+    return pd.DataFrame({
+        "ts": START_MS + np.arange(n) * BAR_MS,
+        "open": open_, "high": np.maximum(open_, close) + rng.uniform(0, 1, n),
+        "low": np.minimum(open_, close) - rng.uniform(0, 1, n), "close": close, "volume": rng.uniform(5, 15, n),
+    })
+
+
+def make_bars(n, offset=0):
+    close = 100 + np.arange(n, dtype=np.float64)
+    return pd.DataFrame({
+        "ts": START_MS + (np.arange(n) + offset) * BAR_MS,
+        "open": close - 0.5, "high": close + 1, "low": close - 1, "close": close,
+        "volume": np.full(n, 10.0),
+    })
+
+
+class TestReplayFeed(unittest.TestCase):
+
+    def test_fetch_never_returns_future_bars(self):
+        feed = ReplayFeed({"BTC-USDT": make_bars(50)}, window=20)
+        feed.clock = START_MS + 9 * BAR_MS
+        df, interval = feed.fetch("BTC-USDT", "BINANCE")
+        self.assertEqual(interval, "15m")
+        self.assertEqual(list(df.columns), ["Date", "Open", "High", "Low", "Close"])
+        self.assertEqual(len(df), 10)
+        self.assertEqual(df["Close"].iloc[-1], 109.0)
+
+        feed.clock = START_MS + 45 * BAR_MS
+        df, _ = feed.fetch("BTC-USDT", "BINANCE")
+        self.assertEqual(len(df), 20)
+        self.assertEqual(df["Close"].iloc[-1], 145.0)
+
+    def test_fetch_shapes_polygon_frames(self):
+        feed = ReplayFeed({"AAPL": make_bars(5)})
+        feed.clock = START_MS + 4 * BAR_MS
+        df, _ = feed.fetch("AAPL", "IB")
+        self.assertEqual(list(df.columns), ["open", "high", "low", "close", "volume"])
+        self.assertEqual(df.index.name, "timestamp")
+        self.assertEqual(df.index[0], pd.Timestamp(START_MS, unit="ms"))
+
+    def test_scale_universe(self):
+        bars = scale_universe({"A": make_bars(3), "B": make_bars(3)}, 3)
+        self.assertEqual(sorted(bars), ["A", "A#1", "A#2", "B", "B#1", "B#2"])
+
+
+class TestRunReplay(unittest.TestCase):
+
+    def test_replays_every_bar_once_in_time_order(self):
+        seen = {}
+        lock = threading.Lock()
+
+        def check(ticker, broker, fetcher, alert, state):
+            df, _ = fetcher(ticker, broker)
+            with lock:
+                seen.setdefault(ticker, []).append(df["Close"].iloc[-1])
+            if len(df) == 30:
+                alert(f"{ticker} sinal")
+                return [{"ativo": ticker, "signal": "BUY"}]
+            return None
+
+        bars = {"A": make_bars(40), "B": make_bars(35, offset=10)}
+        sink = RecordingSink()
+        stats = run_replay(bars, check_fn=check, sink=sink)
+
+        self.assertEqual(stats["steps"], 45)
+        self.assertEqual(stats["bars"], 75)
+        self.assertEqual(stats["signals"], 2)
+        self.assertEqual(sorted(sink.messages), ["A sinal", "B sinal"])
+        self.assertEqual(seen["A"], list(bars["A"]["close"]))
+        self.assertEqual(seen["B"], list(bars["B"]["close"]))
+        self.assertIsNotNone(stats["latency_p95_ms"])
+
+    def test_window_limits_replay(self):
+        bars = {"A": make_bars(40)}
+        stats = run_replay(bars, start=START_MS + 10 * BAR_MS, end=START_MS + 19 * BAR_MS,
+                           check_fn=lambda ticker, broker, fetcher, alert, state: None)
+        self.assertEqual(stats["bars"], 10)
+
+    def test_each_replay_gets_its_own_signal_state(self):
+        states = []
+
+        def check(ticker, broker, fetcher, alert, state):
+            states.append(state)
+            return None
+
+        run_replay({"A": make_bars(3)}, check_fn=check)
+        run_replay({"A": make_bars(3)}, check_fn=check)
+        self.assertEqual(len({id(state) for state in states}), 2)
+        self.assertIsNot(states[0], getattr(signal_monitor, "signal_state", None))
+
+    @unittest.skipIf(signal_monitor is None, "signal_monitor indisponível (polygon/config.ini)")
+    def test_live_path_replays_the_same_signals_twice(self):
+        bars = {"BTC-USDT": make_walk(300, 5), "ETH-USDT": make_walk(300, 6)}
+        runs = []
+        # POSITION runs the 123 pattern, which fires on these bars
+        with tempfile.TemporaryDirectory() as tmp, \
+                mock.patch.object(signal_monitor, "STRATEGY_PROFILE", StrategyProfileEnum.POSITION):
+            for i in range(2):
+                export_file = os.path.join(tmp, f"replay{i}.csv")
+                stats = run_replay(bars, export_file=export_file, sink=RecordingSink(), max_workers=1)
+                runs.append((stats["signals"], pd.read_csv(export_file)))
+        self.assertGreater(runs[0][0], 0)
+        self.assertEqual(runs[0][0], runs[1][0])
+        pd.testing.assert_frame_equal(runs[0][1], runs[1][1])
+
+if __name__ == "__main__":
+    unittest.main()
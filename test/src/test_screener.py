@@ -0,0 +1,88 @@
+import time
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from screener import IndicatorPanel, build_panel, compile_expression, panel_for, resolve_field, screen
+
+
+class TestScreener(unittest.TestCase):
+
+    def setUp(self):
+        self.panel = IndicatorPanel(["AAA", "BBB", "CCC", "DDD"], {
+            "rsi": np.array([[35.0, 25.0], [20.0, 28.0], [50.0, 45.0], [22.0, 10.0]]),
+            "stoch_k": np.array([[10.0, 30.0], [40.0, 50.0], [10.0, 30.0], [10.0, 30.0]]),
+            "stoch_d": np.array([[20.0, 20.0], [30.0, 40.0], [20.0, 20.0], [20.0, 20.0]]),
+            "close": np.array([[100.0, 110.0], [10.0, 11.0], [5.0, 6.0], [50.0, 49.0]]),
+            "ema_200": np.array([[90.0, 100.0], [12.0, 12.0], [4.0, 4.0], [40.0, 40.0]]),
+        })
+
+    def test_crosses_and_comparisons(self):
+        result = screen(self.panel, "rsi < 30 and stoch_k crosses_above stoch_d and close > ema_200")
+        self.assertEqual(list(result["symbol"]), ["DDD", "AAA"])
+        self.assertEqual(list(result.columns), ["symbol", "score", "close", "ema_200", "rsi", "stoch_d", "stoch_k"])
+        self.assertEqual(result["rsi"].tolist(), [10.0, 25.0])
+
+    def test_precedence_and_rank_by(self):
+        result = screen(self.panel, "not rsi >= 30 or close * 2 - 1 > 100 + ema_200 / 2", rank_by="-rsi")
+        self.assertEqual(list(result["symbol"]), ["DDD", "AAA", "BBB"])
+        self.assertEqual(len(screen(self.panel, "(rsi < 30 or rsi > 40) and close < 7")), 1)
+
+    def test_syntax_errors(self):
+        for expression in ("rsi <", "rsi < 30 and", "(rsi < 30", "rsi < 30 $"):
+            with self.assertRaises(SyntaxError):
+                compile_expression(expression)
+        with self.assertRaises(KeyError):
+            screen(self.panel, "macd > 0")
+
+    def test_expression_must_be_a_condition(self):
+        self.panel.fields["rsi"][0, -1] = np.nan  # still in warm-up
+        for expression in ("rsi", "rsi - 30", "rsi < 30 and close", "not rsi"):
+            with self.assertRaises(SyntaxError):
+                screen(self.panel, expression)
+        self.assertNotIn("AAA", list(screen(self.panel, "rsi > 0")["symbol"]))
+
+    def test_fields_resolve_to_indicator_columns(self):
+        self.assertEqual(resolve_field("close"), (None, "close"))
+        self.assertEqual(resolve_field("stoch_k"), (("stochastic", {}), "stoch_k"))
+        self.assertEqual(resolve_field("upper_band"), (("bollinger", {}), "Upper Band"))
+        self.assertEqual(resolve_field("ema_50"), (("ema", {"span": 50}), "ema_50"))
+        self.assertEqual(resolve_field("ema_200"), (("ema", {"span": 200}), "ema"))
+        with self.assertRaises(KeyError):
+            resolve_field("volatility")
+
+    def test_panel_from_frames(self):
+        close = np.linspace(10, 20, 60)
+        frames = {
+            "UP": pd.DataFrame({"close": close, "high": close + 1, "low": close - 1}),
+            "DOWN": pd.DataFrame({"close": close[::-1], "high": close[::-1] + 1, "low": close[::-1] - 1}),
+            "SHORT": pd.DataFrame({"close": [10.0], "high": [11.0], "low": [9.0]}),
+        }
+        panel = panel_for(frames, "close > ema_20 and rsi > 50")
+        self.assertEqual(panel.fields["close"].shape, (3, 2))
+        self.assertTrue(np.isnan(panel.fields["close"][2, 0]))
+        self.assertEqual(list(screen(panel, "close > ema_20")["symbol"]), ["UP"])
+
+        panel = build_panel(frames, ["close"], rows=3)
+        np.testing.assert_allclose(panel.get("close", lag=2)[:2], [close[-3], close[2]])
+
+    def test_large_universe_is_fast(self):
+        rng = np.random.default_rng(7)
+        n = 2000
+        panel = IndicatorPanel([f"S{i}" for i in range(n)], {
+            field: rng.uniform(0, 100, (n, 2)) for field in ("rsi", "stoch_k", "stoch_d", "close", "ema_200")
+        })
+        expression = "rsi < 30 and stoch_k crosses_above stoch_d and close > ema_200"
+        screen(panel, expression)
+        started = time.perf_counter()
+        result = screen(panel, expression)
+        self.assertLess(time.perf_counter() - started, 0.05)
+        rsi, k, d = panel.fields["rsi"], panel.fields["stoch_k"], panel.fields["stoch_d"]
+        expected = (rsi[:, 1] < 30) & (k[:, 1] > d[:, 1]) & (k[:, 0] <= d[:, 0]) & \
+            (panel.fields["close"][:, 1] > panel.fields["ema_200"][:, 1])
+        self.assertEqual(set(result["symbol"]), set(panel.symbols[expected]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import os
+import tempfile
+import unittest
+
+from sharded_monitor import ShardedMonitor, shard_of
+
+CRASH_MARKER = os.path.join(tempfile.gettempdir(), "test_sharded_monitor.crashed")
+
+
+def fake_check(ticker, broker):
+    if ticker.startswith("SIG"):
+        return [{"ativo": ticker, "signal": "BUY", "pid": os.getpid()}]
+    return None
+
+
+def crashing_check(ticker, broker):
+    # Kills the worker the first time it sees CRASH, as a segfault in a native library would
+    if ticker == "CRASH" and not os.path.exists(CRASH_MARKER):
+        open(CRASH_MARKER, "w").close()
+        os._exit(1)
+    return fake_check(ticker, broker)
+
+
+class TestShardedMonitor(unittest.TestCase):
+
+    def setUp(self):
+        self.assets = [(f"SIG{i}", "BINANCE") for i in range(40)] + [(f"QUIET{i}", "IB") for i in range(60)]
+        if os.path.exists(CRASH_MARKER):
+            os.remove(CRASH_MARKER)
+
+    def tearDown(self):
+        if os.path.exists(CRASH_MARKER):
+            os.remove(CRASH_MARKER)
+
+    def test_shards_are_stable(self):
+        self.assertEqual(shard_of("BTC-USDT", 4), shard_of("BTC-USDT", 4))
+        self.assertEqual({shard_of(ticker, 4) for ticker, _ in self.assets}, {0, 1, 2, 3})
+
+    def test_cycles_collect_all_signals(self):
+        with ShardedMonitor(n_workers=3, check_fn=fake_check) as monitor:
+            for _ in range(2):
+                results = monitor.run_cycle(self.assets)
+                self.assertEqual(sorted(r["ativo"] for r in results), sorted(f"SIG{i}" for i in range(40)))
+            self.assertGreater(len({r["pid"] for r in results}), 1)
+
+    def test_crashed_worker_is_restarted(self):
+        assets = self.assets + [("CRASH", "IB")]
+        with ShardedMonitor(n_workers=2, threads_per_worker=1, check_fn=crashing_check) as monitor:
+            results = monitor.run_cycle(assets)
+            self.assertTrue(os.path.exists(CRASH_MARKER))
+            self.assertEqual(len(results), 40)
+            self.assertEqual(len(monitor.run_cycle(self.assets)), 40)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from signal_state import SignalStateTable
+
+try:
+    import signal_monitor
+except Exception:  # strategy_utils needs the polygon client and ../config.ini
+    signal_monitor = None
+
+BAR_MS = 900_000
+
+
+def make_bars(n):
+    close = 100 + np.sin(np.arange(n) / 4)
+    return pd.DataFrame({
+        "ts": np.arange(n, dtype=np.int64) * BAR_MS,
+        "open": close - 0.2, "high": close + 1, "low": close - 1, "close": close, "volume": np.full(n, 10.0),
+    })
+
+
+class FakeChartService:
+    """Keeps the delivery callbacks, to run them after check_signals returns (as the real pool does)."""
+    def __init__(self):
+        self.deliveries = []
+
+    def submit(self, *args, **kwargs):
+        return None
+
+    def attach(self, future, deliver):
+        self.deliveries.append(deliver)
+
+
+@unittest.skipIf(signal_monitor is None, "signal_monitor indisponível (polygon/config.ini)")
+class TestCheckSignals(unittest.TestCase):
+
+    def test_two_transitions_on_one_bar_keep_their_captions(self):
+        trades = [{"signal": "BUY", "strategy": "s1", "entry": 101.0, "stop_loss": 99.0},
+                  {"signal": "SELL", "strategy": "s2", "entry": 100.0, "stop_loss": 102.0}]
+        strategy = mock.Mock()
+        strategy.return_value.apply.return_value = trades
+        charts = FakeChartService()
+        captions = []
+        alerts = []
+
+        with mock.patch.object(signal_monitor, "InvestmentStrategy", strategy), \
+                mock.patch.object(signal_monitor, "chart_service", charts), \
+                mock.patch.object(signal_monitor, "send_telegram_photo",
+                                  lambda path, caption: captions.append(caption)):
+            results = signal_monitor.check_signals("X", "BINANCE", fetcher=lambda *_: (make_bars(60), "15m"),
+                                                   alert=alerts.append, state=SignalStateTable())
+            for deliver in charts.deliveries:
+                deliver("chart.png")
+
+        self.assertEqual([(result["signal"], result["strategy"]) for result in results],
+                         [("BUY", "s1"), ("SELL", "s2")])
+        self.assertEqual(len(alerts), 2)
+        self.assertEqual(captions, ["X BUY (s1)", "X SELL (s2)"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+
+from signal_state import SignalStateTable
+
+BAR_MS = 900_000
+
+
+class TestSignalStateTable(unittest.TestCase):
+
+    def test_skips_bars_already_evaluated(self):
+        state = SignalStateTable()
+        self.assertTrue(state.is_new_bar("BTC-USDT", 10 * BAR_MS))
+        state.mark_bar("BTC-USDT", 10 * BAR_MS)
+        self.assertFalse(state.is_new_bar("BTC-USDT", 10 * BAR_MS))
+        self.assertFalse(state.is_new_bar("BTC-USDT", 9 * BAR_MS))
+        self.assertTrue(state.is_new_bar("ETH-USDT", 10 * BAR_MS))
+        self.assertTrue(state.is_new_bar("BTC-USDT", 11 * BAR_MS))
+
+    def test_bar_is_only_skipped_once_marked(self):
+        state = SignalStateTable()
+        # An evaluation that failed before mark_bar leaves the bar to the next cycle
+        self.assertTrue(state.is_new_bar("BTC-USDT", 10 * BAR_MS))
+        self.assertTrue(state.is_new_bar("BTC-USDT", 10 * BAR_MS))
+        state.mark_bar("BTC-USDT", 11 * BAR_MS)
+        state.mark_bar("BTC-USDT", 10 * BAR_MS)
+        self.assertEqual(state.symbols["BTC-USDT"]["last_bar"], 11 * BAR_MS)
+
+    def test_only_transitions_are_returned(self):
+        state = SignalStateTable()
+        self.assertEqual(state.transitions("PETR4", {"stochastic": "BUY"}), {"stochastic": "BUY"})
+        self.assertEqual(state.transitions("PETR4", {"stochastic": "BUY"}), {})
+        self.assertEqual(state.transitions("PETR4", {"stochastic": "BUY", "engulfing": "SELL"}),
+                         {"engulfing": "SELL"})
+        self.assertEqual(state.transitions("PETR4", {"stochastic": "SELL", "engulfing": "SELL"}),
+                         {"stochastic": "SELL"})
+
+    def test_setup_that_comes_back_is_a_transition(self):
+        state = SignalStateTable()
+        state.transitions("PETR4", {"stochastic": "BUY"})
+        self.assertEqual(state.transitions("PETR4", {}), {})
+        self.assertEqual(state.transitions("PETR4", {"stochastic": "BUY"}), {"stochastic": "BUY"})
+
+    def test_persists_between_runs(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "state.json")
+            state = SignalStateTable(path)
+            state.mark_bar("PETR4", 5 * BAR_MS)
+            state.transitions("PETR4", {"stochastic": "BUY"})
+            state.save()
+
+            restored = SignalStateTable(path)
+            self.assertFalse(restored.is_new_bar("PETR4", 5 * BAR_MS))
+            self.assertEqual(restored.transitions("PETR4", {"stochastic": "BUY"}), {})
+
+    def test_save_skips_unchanged_table(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "state.json")
+            state = SignalStateTable(path)
+            state.save()
+            self.assertFalse(os.path.exists(path))
+            state.mark_bar("PETR4", BAR_MS)
+            state.save()
+            mtime = os.stat(path).st_mtime_ns
+            state.mark_bar("PETR4", BAR_MS)
+            state.save()
+            self.assertEqual(os.stat(path).st_mtime_ns, mtime)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from spread_scanner import SpreadScanner, asof_align, group_pairs
+
+BAR_MS = 900_000
+START_MS = 1_700_000_100_000 - 1_700_000_100_000 % BAR_MS
+
+
+def bars(close, shift_ms=0):
+    close = np.asarray(close, dtype=np.float64)
+    return pd.DataFrame({
+        "ts": START_MS + np.arange(len(close), dtype=np.int64) * BAR_MS + shift_ms,
+        "open": close, "high": close, "low": close, "close": close, "volume": np.ones(len(close)),
+    })
+
+
+class TestSpreadScanner(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(2)
+        n = 200
+        self.btc = 60000 * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+        self.eth = 3000 * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+        self.brl = 5.0 * np.exp(rng.normal(0, 0.0005, n))  # BRL per USDT, with the BTC premium folded in
+        self.noise = rng.normal(0, 0.0003, (2, n))
+
+    def test_group_pairs(self):
+        groups = group_pairs(["BTC-USDT", "BTC-BRL", "ETH-USDT", "SOL-USD", "PETR4", "ADA-USDT"])
+        self.assertEqual(groups, {"BTC": {"USDT": "BTC-USDT", "BRL": "BTC-BRL"}})
+
+    def test_asof_align(self):
+        ts = np.array([0, 10, 20, 40])
+        aligned = asof_align(np.array([-5, 0, 15, 35, 60]), ts, [1.0, 2.0, 3.0, 4.0], tolerance_ms=10)
+        np.testing.assert_array_equal(aligned, [np.nan, 1.0, 2.0, np.nan, np.nan])
+
+    def test_flags_extreme_spreads(self):
+        eth_brl = self.eth * self.brl * np.exp(self.noise[0])
+        eth_brl[-1] *= 1.01  # +100 bps dislocation on the last bar
+        eth_usd = self.eth * np.exp(self.noise[1])
+        data = {
+            "BTC-USDT": bars(self.btc), "BTC-BRL": bars(self.btc * self.brl),
+            "ETH-USDT": bars(self.eth),
+            # Off-grid bars are matched to the last reference bar before them
+            "ETH-BRL": bars(eth_brl, shift_ms=-60_000), "ETH-USD": bars(eth_usd),
+        }
+        scanner = SpreadScanner(list(data))
+        result = scanner.scan(data).set_index("symbol")
+
+        self.assertEqual(result.loc["ETH-BRL", "fx"], "implied")
+        self.assertEqual(result.loc["ETH-USD", "fx"], "peg")
+        self.assertNotIn("BTC-BRL", result.index)  # the anchor defines the implied rate
+        self.assertTrue(result.loc["ETH-BRL", "extreme"])
+        self.assertAlmostEqual(result.loc["ETH-BRL", "spread_bps"], 100, delta=10)
+        self.assertFalse(result.loc["ETH-USD", "extreme"])
+
+    def test_cross_pair_is_preferred(self):
+        data = {"BTC-USDT": bars(self.btc), "BTC-BRL": bars(self.btc * self.brl * 1.002),
+                "USDT-BRL": bars(self.brl)}
+        result = SpreadScanner(list(data)).scan(data)
+        self.assertEqual(result["fx"].tolist(), ["cross"])
+        self.assertAlmostEqual(result["spread_bps"].iloc[0], 20, delta=0.1)
+
+
+if __name__ == "__main__":
+    unittest.main()
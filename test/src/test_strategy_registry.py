@@ -0,0 +1,78 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import strategy_catalog
+from investment_strategy import InvestmentStrategy
+from strategy_profile_enum import StrategyProfileEnum
+from strategy_registry import IndicatorEngine, resolve_indicators, register_indicator, strategies_for_profile, \
+    STRATEGIES, INDICATORS
+
+
+class TestStrategyRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.df = pd.DataFrame({
+            "date": pd.date_range("2025-01-01", periods=120, freq="15min"),
+            "close": np.linspace(10, 20, 120),
+            "high": np.linspace(12, 22, 120),
+            "low": np.linspace(8, 18, 120),
+        })
+
+    def test_dependencies_resolved_once_in_order(self):
+        order = resolve_indicators([("cci_sma", {}), ("cci", {}), ("rsi", {"length": 14}), ("rsi", {"length": 21})])
+        self.assertEqual([name for name, _ in order], ["cci", "cci_sma", "rsi", "rsi"])
+        self.assertEqual(order[3], ("rsi", {"length": 21}))
+
+    def test_circular_dependency(self):
+        register_indicator("loop_a", lambda df: df, ["a"], depends_on=["loop_b"])
+        register_indicator("loop_b", lambda df: df, ["b"], depends_on=["loop_a"])
+        try:
+            with self.assertRaises(ValueError):
+                resolve_indicators([("loop_a", {})])
+        finally:
+            del INDICATORS["loop_a"], INDICATORS["loop_b"]
+
+    def test_engine_memoizes_per_symbol_and_bar(self):
+        engine = IndicatorEngine()
+        strategies = [STRATEGIES["bollinger_cci"]]
+        engine.compute(self.df.copy(), "AAA", "15m", strategies, extra=["rsi"])
+        self.assertEqual((engine.hits, engine.misses), (0, 4))
+
+        df = engine.compute(self.df.copy(), "AAA", "15m", strategies, extra=["rsi", ("rsi", {"length": 21})])
+        self.assertEqual((engine.hits, engine.misses), (4, 5))
+        self.assertIn("cci_sma", df.columns)
+        self.assertIn("rsi_21", df.columns)
+        self.assertFalse(np.allclose(df["rsi"], df["rsi_21"]))
+
+        engine.compute(self.df.iloc[:-1].copy(), "AAA", "15m", extra=["rsi"])
+        self.assertEqual(engine.misses, 6)
+
+    def test_engine_cache_is_bounded(self):
+        engine = IndicatorEngine(max_entries=3)
+        for symbol in ("A", "B", "C", "D", "E"):
+            engine.compute(self.df.copy(), symbol, "15m", extra=["rsi"])
+        self.assertEqual(len(engine.cache), 3)
+        self.assertEqual({key[0] for key in engine.cache}, {"C", "D", "E"})
+
+    def test_profiles_and_signal_columns(self):
+        names = [strategy.name for strategy in strategies_for_profile(StrategyProfileEnum.POSITION)]
+        self.assertIn("123_pattern", names)
+        # The live monitor runs DAYTRADE and does not alert on the 123 pattern
+        daytrade = [strategy.name for strategy in strategies_for_profile(StrategyProfileEnum.DAYTRADE)]
+        self.assertNotIn("123_pattern", daytrade)
+        self.assertEqual(strategy_catalog.SIGNAL_COLUMNS,
+                         ["signal_shadow", "signal_engulfing", "signal_insidebar", "signal_stochastic"])
+
+    def test_investment_strategy_runs_profile(self):
+        candles = pd.DataFrame({
+            "open": [12, 10, 11], "close": [10, 11, 13], "high": [12.5, 11.5, 14], "low": [9.5, 9, 10.5],
+        })
+        trades = InvestmentStrategy(StrategyProfileEnum.POSITION, candles, []).apply()
+        self.assertEqual([trade["strategy"] for trade in trades], ["123_buy"])
+        self.assertEqual(trades[0]["entry"], 14)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import signal_generators
+from backtest_engine import BacktestState, backtest_frame, first_signals, resolve_signals
+from strategy_runner import apply_strategy, enabled_signals, signal_matrix
+
+
+def candles(rows):
+    return pd.DataFrame(rows, columns=["open", "high", "low", "close"], dtype=np.float64)
+
+
+class TestSignalGenerators(unittest.TestCase):
+
+    def test_shadow_reversal(self):
+        df = candles([[10, 10.5, 9.5, 10], [10, 10.1, 8, 9.9], [9.9, 12, 9.85, 10.1]])
+        self.assertEqual(signal_generators.shadow_reversal(df).tolist(), [0, 1, -1])
+
+    def test_engulfing(self):
+        df = candles([[10, 10.5, 9.5, 9.6], [9.5, 10.6, 9.4, 10.2], [10.3, 10.4, 9.0, 9.4], [9.4, 9.6, 9.2, 9.5]])
+        self.assertEqual(signal_generators.engulfing(df).tolist(), [0, 1, -1, 0])
+
+    def test_inside_bar_breakout(self):
+        df = candles([[10, 12, 8, 11], [11, 11.5, 9, 10], [10, 12.5, 9.5, 12.2],
+                      [12, 13, 11, 12], [12, 12.5, 11.5, 12], [12, 12.2, 10, 10.5]])
+        self.assertEqual(signal_generators.inside_bar(df).tolist(), [0, 0, 1, 0, 0, -1])
+
+    def test_stochastic_cross_skips_warmup(self):
+        df = pd.DataFrame({"stoch_k": [0, 15, 10, 12, 85, 90, 82], "stoch_d": [0, 0, 12, 11, 80, 85, 86]},
+                          dtype=np.float64)
+        self.assertEqual(signal_generators.stochastic_cross(df).tolist(), [0, 1, 0, 1, 0, 0, -1])
+        self.assertEqual(signal_generators.stochastic_cross(df, warmup=2).tolist(), [0, 0, 0, 1, 0, 0, -1])
+
+
+class TestStrategyRunner(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(11)
+        close = 100 + np.cumsum(rng.normal(0, 1, 600))
+        open_ = close + rng.normal(0, 0.6, 600)
+        self.df = pd.DataFrame({
+            "Date": pd.date_range("2025-01-01", periods=600, freq="15min").strftime("%Y-%m-%d %H:%M"),
+            "Open": open_,
+            "High": np.maximum(open_, close) + rng.uniform(0, 1.5, 600),
+            "Low": np.minimum(open_, close) - rng.uniform(0, 1.5, 600),
+            "Close": close,
+        })
+
+    def test_signal_matrix_is_int8_in_priority_order(self):
+        matrix, columns = signal_matrix(self.df)
+        self.assertEqual(matrix.dtype, np.int8)
+        self.assertEqual(columns, ["signal_shadow", "signal_engulfing", "signal_insidebar", "signal_stochastic"])
+        self.assertTrue(set(np.unique(matrix)) <= {-1, 0, 1})
+        self.assertTrue((matrix != 0).any(axis=0).all())
+
+        codes, strategy_ids = first_signals(np.array([[0, 1, -1], [0, 0, 0], [-1, 1, 0]], dtype=np.int8))
+        self.assertEqual(codes.tolist(), [1, 0, -1])
+        self.assertEqual(strategy_ids.tolist(), [1, -1, 0])
+
+    def test_params_select_signals(self):
+        params = {"signal_stochastic": True, "shadow_reversal": True, "engulfing": False}
+        self.assertEqual([s.name for s in enabled_signals(params)], ["shadow_reversal", "stochastic_cross"])
+        self.assertEqual(len(enabled_signals({"timeout": 7})), 4)
+
+        df = apply_strategy(self.df.copy(), params)
+        self.assertEqual(df["signal_shadow"].dtype, np.int8)
+        self.assertNotIn("signal_engulfing", df.columns)
+
+    def test_backtest_matches_string_signals(self):
+        df = apply_strategy(self.df.copy(), {})
+        labels = df.copy()
+        for col in ("signal_shadow", "signal_engulfing", "signal_insidebar", "signal_stochastic"):
+            labels[col] = pd.Series(df[col]).map({1: "BUY", -1: "SELL", 0: None})
+        np.testing.assert_array_equal(resolve_signals(df)[0], resolve_signals(labels)[0])
+
+        trades = backtest_frame(df, "TEST", BacktestState(), {"timeout": 7})
+        self.assertGreater(len(trades), 0)
+        self.assertEqual(trades, backtest_frame(labels, "TEST", BacktestState(), {"timeout": 7}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from backtest_engine import BacktestState, backtest_frame
+from backtest_report import summarize_trades
+from compact_frames import TradeLog
+from trade_excursions import RangeExtremes, excursions
+
+
+class TestRangeExtremes(unittest.TestCase):
+
+    def test_matches_brute_force(self):
+        rng = np.random.default_rng(5)
+        high = np.round(rng.normal(100, 5, 1000), 1)  # rounded, so ties happen
+        low = high - 1
+        starts = rng.integers(0, 1000, 500)
+        ends = np.minimum(starts + rng.integers(0, 300, 500), 999)
+        extremes = RangeExtremes(high, low)
+        peaks = extremes.max_index(starts, ends)
+        troughs = extremes.min_index(starts, ends)
+        for s, e, peak, trough in zip(starts, ends, peaks, troughs):
+            self.assertEqual(peak, s + np.argmax(high[s:e + 1]))
+            self.assertEqual(trough, s + np.argmin(low[s:e + 1]))
+
+
+class TestExcursions(unittest.TestCase):
+
+    def test_signal_and_level_exits(self):
+        close = np.array([100, 102, 97, 105, 99, 101], dtype=np.float64)
+        high = close + 1
+        low = close - 1
+        stats = excursions(RangeExtremes(high, low), close, [0, 0], [4, 3], [100.0, 100.0], [99.0, 104.0],
+                           level_exit=[False, True])
+        # Held bars 1..4: lowest low 96 (bar 2), highest high 106 (bar 3)
+        self.assertEqual(stats["mae_%"][0], -4.0)
+        self.assertEqual(stats["mfe_%"][0], 6.0)
+        self.assertEqual(stats["bars_to_peak"][0], 3)
+        self.assertEqual(stats["bars_under_water"][0], 2)
+        # Take-profit filled at 104 inside bar 3: the rest of that bar is not counted
+        self.assertEqual(stats["mfe_%"][1], 4.0)
+        self.assertEqual(stats["bars_to_peak"][1], 3)
+        self.assertEqual(stats["bars_under_water"][1], 1)
+
+    def test_backtest_trades_match_slicing(self):
+        rng = np.random.default_rng(3)
+        close = np.round(100 + np.cumsum(rng.normal(0, 1, 2000)), 2)
+        df = pd.DataFrame({"Open": close, "High": close + 0.6, "Low": close - 0.6, "Close": close})
+        df["signal_shadow"] = np.where(rng.random(2000) < 0.05, "BUY", None)
+        trades = backtest_frame(df, "FAKE", BacktestState(), {"timeout": 10, "stop_loss_pct": 2})
+        self.assertTrue(trades)
+        for trade in trades:
+            entry, exit_ = trade["entry_index"], trade["exit_index"]
+            held = df.iloc[entry + 1:exit_ + 1]
+            if trade["exit_reason"] == "stop_loss":
+                held = held.iloc[:-1]
+            trough = min([*held["Low"], trade["exit_price"]])
+            peak = max([*held["High"], trade["exit_price"]])
+            self.assertAlmostEqual(trade["mae_%"], round(min(trough - trade["entry_price"], 0) / trade["entry_price"] * 100, 2))
+            self.assertAlmostEqual(trade["mfe_%"], round(max(peak - trade["entry_price"], 0) / trade["entry_price"] * 100, 2))
+
+        log = TradeLog()
+        log.extend(trades)
+        summary = summarize_trades(log.to_frame())
+        self.assertAlmostEqual(summary["avg_mae"].iloc[0], round(np.mean([t["mae_%"] for t in trades]), 2))
+
+
+if __name__ == "__main__":
+    unittest.main()